@@ -5,24 +5,56 @@ Script FACILE pour ajouter des offres de stages manuellement
 Pas besoin de scraping - juste remplir les informations !
 """
 
-import json
-from datetime import datetime
+from classification import classer, noms_domaines
+from donnees import charger_donnees, compacter_journal, exporter, journaliser, offres_en_attente
+from sources import SAISIE_MANUELLE
+from stage import CHAMPS, Stage
+from statistiques import Statistiques, afficher_classement
 
-def charger_donnees():
-    """Charge le fichier JSON"""
-    try:
-        with open('stages_data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"derniere_maj": "", "stages": []}
+def valider_stage(stage):
+    """
+    Renvoie la liste des problèmes d'une offre (vide si elle est correcte) :
+    tous les champs sont obligatoires, entreprise et titre non vides
+    """
+    if not isinstance(stage, (dict, Stage)):
+        return ["ce n'est pas un dictionnaire"]
+    problemes = []
+    for champ in CHAMPS:
+        if champ not in stage:
+            problemes.append(f"champ '{champ}' manquant")
+        elif not isinstance(stage[champ], str):
+            problemes.append(f"champ '{champ}' n'est pas du texte")
+    for champ in ("company", "title"):
+        if isinstance(stage.get(champ), str) and not stage[champ].strip():
+            problemes.append(f"champ '{champ}' vide")
+    return problemes
 
-def sauvegarder_donnees(data):
-    """Sauvegarde dans le fichier JSON"""
-    with open('stages_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def ajouter_stages_lot(offres, compacter=True):
+    """
+    Ajoute beaucoup d'offres d'un coup :
+    toutes sont vérifiées, puis écrites dans le journal en une fois.
+    Si une seule offre est invalide, rien n'est écrit.
+    Avec compacter=True, le journal est ensuite intégré à la base (une passe)
+    et stages_data.json est publié.
+    """
+    offres = list(offres)
+    erreurs = []
+    for numero, offre in enumerate(offres, 1):
+        for probleme in valider_stage(offre):
+            erreurs.append(f"offre {numero} : {probleme}")
+    if erreurs:
+        raise ValueError("Offres invalides :\n   " + "\n   ".join(erreurs[:20]))
+    
+    # Marquées saisies à la main : la reclassification garde leur domaine
+    nombre = journaliser(dict(offre, saisie=SAISIE_MANUELLE) for offre in offres)
+    if compacter:
+        compacter_journal()
+        exporter()
+    print(f"✅ {nombre} offres ajoutées")
+    return nombre
 
-def ajouter_stage_interactif():
-    """Ajoute un stage en posant des questions"""
+def demander_stage():
+    """Pose les questions et renvoie l'offre"""
     print("\n" + "="*60)
     print("✨ AJOUTER UN NOUVEAU STAGE")
     print("="*60)
@@ -32,13 +64,10 @@ def ajouter_stage_interactif():
     title = input("2️⃣  Titre du poste : ")
     
     print("\nDomaines disponibles :")
-    print("   - Finance")
-    print("   - Analytics")
-    print("   - Investment Banking")
-    print("   - Risk Management")
-    print("   - Wealth Management")
-    print("   - Data Science")
-    domain = input("3️⃣  Domaine : ")
+    for nom in noms_domaines():
+        print(f"   - {nom}")
+    propose = classer(title, defaut="Finance").domaine
+    domain = input(f"3️⃣  Domaine [{propose}] : ") or propose
     
     location = input("4️⃣  Ville : ")
     
@@ -51,53 +80,56 @@ def ajouter_stage_interactif():
     link = input("7️⃣  Lien vers l'offre : ")
     
     # Créer l'offre
-    nouveau_stage = {
+    return {
         "company": company,
         "title": title,
         "domain": domain,
         "location": location,
         "duration": duration,
         "startDate": startDate,
-        "link": link
+        "link": link,
+        "saisie": SAISIE_MANUELLE
     }
-    
-    # Confirmer
-    print("\n" + "="*60)
-    print("📋 RÉSUMÉ DE L'OFFRE")
-    print("="*60)
-    for key, value in nouveau_stage.items():
-        print(f"   {key:12} : {value}")
-    
-    confirmer = input("\n✅ Ajouter cette offre ? (oui/non) : ").lower()
-    
-    if confirmer in ['oui', 'o', 'yes', 'y']:
-        # Charger les données
-        data = charger_donnees()
-        
-        # Ajouter le nouveau stage
-        data['stages'].append(nouveau_stage)
-        
-        # Mettre à jour la date
-        now = datetime.now()
-        data['derniere_maj'] = now.strftime("%d %B %Y - %H:%M")
+
+def ajouter_stage_interactif():
+    """Ajoute des stages en posant des questions (intégrés à la base en quittant)"""
+    while True:
+        nouveau_stage = demander_stage()
         
-        # Sauvegarder
-        sauvegarder_donnees(data)
+        # Confirmer
+        print("\n" + "="*60)
+        print("📋 RÉSUMÉ DE L'OFFRE")
+        print("="*60)
+        for key, value in nouveau_stage.items():
+            print(f"   {key:12} : {value}")
         
-        print("\n🎉 Offre ajoutée avec succès !")
-        print(f"📊 Total : {len(data['stages'])} offres dans la base")
+        problemes = valider_stage(nouveau_stage)
+        if problemes:
+            print(f"\n❌ Offre incomplète : {', '.join(problemes)}")
+        else:
+            confirmer = input("\n✅ Ajouter cette offre ? (oui/non) : ").lower()
+            
+            if confirmer in ['oui', 'o', 'yes', 'y']:
+                # Le journal garde l'offre tout de suite, sans réécrire la base
+                journaliser([nouveau_stage])
+                
+                print("\n🎉 Offre ajoutée avec succès !")
+                print(f"📝 {offres_en_attente()} offre(s) en attente dans le journal")
+            else:
+                print("\n❌ Offre non ajoutée")
         
         # Demander si on veut en ajouter une autre
         continuer = input("\n➕ Ajouter une autre offre ? (oui/non) : ").lower()
-        if continuer in ['oui', 'o', 'yes', 'y']:
-            ajouter_stage_interactif()
-    else:
-        print("\n❌ Offre non ajoutée")
+        if continuer not in ['oui', 'o', 'yes', 'y']:
+            break
 
-def ajouter_stage_rapide(company, title, domain, location, duration, startDate, link):
-    """Ajoute un stage rapidement (sans questions)"""
-    data = charger_donnees()
-    
+def ajouter_stage_rapide(company, title, domain, location, duration, startDate, link, publier=True):
+    """
+    Ajoute un stage rapidement (sans questions) et le publie.
+    Pour une série d'ajouts : publier=False garde l'offre dans le journal,
+    puis compacter_journal() (ou python donnees.py compacter) publie tout
+    d'un coup ; ou utiliser ajouter_stages_lot.
+    """
     nouveau_stage = {
         "company": company,
         "title": title,
@@ -105,16 +137,21 @@ def ajouter_stage_rapide(company, title, domain, location, duration, startDate,
         "location": location,
         "duration": duration,
         "startDate": startDate,
-        "link": link
+        "link": link,
+        "saisie": SAISIE_MANUELLE
     }
     
-    data['stages'].append(nouveau_stage)
-    
-    now = datetime.now()
-    data['derniere_maj'] = now.strftime("%d %B %Y - %H:%M")
-    
-    sauvegarder_donnees(data)
-    print(f"✅ {company} - {title} ajouté !")
+    problemes = valider_stage(nouveau_stage)
+    if problemes:
+        raise ValueError(f"Offre invalide : {', '.join(problemes)}")
+    journaliser([nouveau_stage])
+    if publier:
+        compacter_journal()
+        exporter()
+        print(f"✅ {company} - {title} ajouté !")
+    else:
+        print(f"✅ {company} - {title} ajouté au journal ({offres_en_attente()} offre(s) en attente)")
+        print("   Pour les publier : python donnees.py compacter")
 
 def voir_statistiques():
     """Affiche les statistiques"""
@@ -127,25 +164,11 @@ def voir_statistiques():
     print(f"\nTotal d'offres : {len(stages)}")
     print(f"Dernière mise à jour : {data.get('derniere_maj', 'Jamais')}")
     
-    # Par domaine
-    domaines = {}
-    for stage in stages:
-        domain = stage.get('domain', 'Non spécifié')
-        domaines[domain] = domaines.get(domain, 0) + 1
-    
-    print("\n📌 Par domaine :")
-    for domain, count in sorted(domaines.items(), key=lambda x: x[1], reverse=True):
-        print(f"   • {domain:25} : {count:2} offres")
-    
-    # Par ville
-    villes = {}
-    for stage in stages:
-        location = stage.get('location', 'Non spécifié')
-        villes[location] = villes.get(location, 0) + 1
-    
-    print("\n📍 Par ville :")
-    for ville, count in sorted(villes.items(), key=lambda x: x[1], reverse=True)[:10]:
-        print(f"   • {ville:25} : {count:2} offres")
+    stats = Statistiques(stages)
+    afficher_classement(stats, 'domaine', "📌 Par domaine :")
+    afficher_classement(stats, 'ville', "📍 Par ville :", limite=10)
+    afficher_classement(stats, 'source', "🌐 Par site :")
+    afficher_classement(stats, 'semaine', "🗓️  Par semaine d'apparition :", limite=8)
 
 def menu_principal():
     """Menu principal"""
@@ -164,6 +187,11 @@ def menu_principal():
         elif choix == '2':
             voir_statistiques()
         elif choix == '3':
+            # Intégrer les offres du journal, puis (avec SQLite) produire stages_data.json
+            nombre = compacter_journal()
+            if nombre:
+                print(f"\n💾 {nombre} offre(s) du journal intégrée(s) à la base")
+            exporter()
             print("\n👋 À bientôt !")
             break
         else:
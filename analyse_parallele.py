@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analyse des pages de résultats dans des processus à part
+Le crawl télécharge (boucle asyncio) et l'analyse HTML (BeautifulSoup) tourne
+ailleurs. Avec un seul thread d'analyse, un seul cœur travaille : ici, les
+pages partent vers un groupe de processus (un par cœur), qui renvoient des
+offres sous forme de simples dictionnaires.
+
+    - le nombre de pages en attente d'analyse est borné (EN_ATTENTE_PAR_PROCESSUS
+      par processus) : si l'analyse prend du retard, les recherches attendent
+      avant de rendre leur page et de demander la suivante
+    - les offres déjà connues (urls.IndexIdentifiants) sont envoyées une seule
+      fois à chaque processus, à son démarrage, et non avec chaque page
+    - les mesures prises dans les processus (cartes, temps d'analyse) sont
+      rapatriées dans celles du passage (metriques.py)
+
+Nombre de processus : STAGES_PROCESSUS=4 (défaut : un par cœur). Avec 1 (ou
+sur une machine à un cœur), l'analyse se fait dans un thread, sans processus.
+Profiler l'analyse (STAGES_PROFIL=analyse) se fait aussi dans un thread.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import metriques
+import parseurs
+from extraction import extraire_offres
+from metriques import chronometre, phase
+from stage import en_dicts, en_stages
+
+CONFIG = {
+    "processus": int(os.environ.get('STAGES_PROCESSUS', 0)),   # 0 = un par cœur
+}
+
+# Pages téléchargées en attente d'analyse, par processus
+EN_ATTENTE_PAR_PROCESSUS = 2
+
+# Offres connues de ce processus d'analyse (données une fois, au démarrage)
+_connus = {"index": None}
+
+
+def nombre_processus():
+    if metriques.phase_profilee('analyse'):
+        return 1
+    return CONFIG['processus'] or os.cpu_count() or 1
+
+
+class Analyse:
+    """
+    Analyse des pages d'un site : analyse(contenu, url) -> offres.
+    Envoyée à un processus, elle n'emporte que la description du site ;
+    les offres connues sont celles données au processus à son démarrage.
+    """
+
+    def __init__(self, source, connus=None):
+        self.source = source
+        self.connus = connus
+
+    def __call__(self, contenu, url):
+        return extraire_offres(contenu, url, self.source, self.connus)
+
+    def __getstate__(self):
+        return {"source": self.source, "avec_connus": self.connus is not None}
+
+    def __setstate__(self, etat):
+        self.source = etat['source']
+        self.connus = _connus['index'] if etat['avec_connus'] else None
+
+
+def analyser_page(analyser, contenu, url):
+    """Analyse mesurée (et profilée avec STAGES_PROFIL=analyse)"""
+    with phase('analyse'), chronometre('analyse_secondes'):
+        return analyser(contenu, url)
+
+
+def demarrer_processus(connus, parseur):
+    """Exécuté une fois dans chaque processus d'analyse"""
+    _connus['index'] = connus
+    parseurs.configurer(parseur)
+
+
+def analyser_dans_processus(analyser, contenu, url):
+    """Analyse dans un processus : offres en dictionnaires, et mesures prises"""
+    offres = en_dicts(analyser_page(analyser, contenu, url))
+    return offres, metriques.REGISTRE.vider()
+
+
+class Atelier:
+    """Les processus d'analyse d'un crawl (un thread s'il n'y en a qu'un)"""
+
+    def __init__(self, connus=None, processus=None):
+        self.processus = processus or nombre_processus()
+        self.places = asyncio.Semaphore(self.processus * EN_ATTENTE_PAR_PROCESSUS)
+        self.pool = None
+        if self.processus > 1:
+            # "spawn" : des processus neufs, sans les verrous des threads du crawl
+            self.pool = ProcessPoolExecutor(
+                self.processus, mp_context=multiprocessing.get_context('spawn'),
+                initializer=demarrer_processus, initargs=(connus, parseurs.CONFIG['parseur']))
+
+    async def analyser(self, analyser, contenu, url):
+        """Offres d'une page (attend une place si trop de pages sont en attente)"""
+        async with self.places:
+            if self.pool is None:
+                return await asyncio.to_thread(analyser_page, analyser, contenu, url)
+            boucle = asyncio.get_running_loop()
+            offres, mesures = await boucle.run_in_executor(self.pool, analyser_dans_processus, analyser, contenu, url)
+        metriques.REGISTRE.fusionner(mesures)
+        return en_stages(offres)
+
+    def fermer(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enregistre les pages des vrais sites dans benchmarks/fixtures/
+(première page de la première recherche de chaque site, et la page de
+détail de la première offre trouvée). À relancer quand un site change sa
+mise en page, puis refaire les références : python -m benchmarks.lancer --enregistrer
+Chaque page enregistrée est notée dans fixtures/origine.json : les mesures
+faites sur ces pages servent alors de seuil (voir benchmarks/lancer.py).
+
+Usage : python -m benchmarks.enregistrer [site ...]
+"""
+
+import datetime
+import json
+import os
+import sys
+
+import transport
+from benchmarks.serveur import DOSSIER_FIXTURES, SITES, lire_origines
+from extraction import extraire_offres
+from sources import get_source, url_page
+
+
+def enregistrer(site):
+    source = get_source(site)
+    url = url_page(source, source['recherches'][0], 1)
+    response = transport.get(url, utiliser_cache=False)
+    response.raise_for_status()
+    with open(os.path.join(DOSSIER_FIXTURES, f"{site}.html"), 'wb') as f:
+        f.write(response.content)
+    offres = extraire_offres(response.content, url, source)
+    print(f"  ✓ {site} : {len(response.content) // 1024} Ko, {len(offres)} offres")
+    return offres
+
+
+def noter_origines(pages):
+    """Ajoute les pages enregistrées aujourd'hui à fixtures/origine.json"""
+    origines = lire_origines()
+    origines.update(dict.fromkeys(pages, datetime.date.today().isoformat()))
+    with open(os.path.join(DOSSIER_FIXTURES, 'origine.json'), 'w', encoding='utf-8') as f:
+        json.dump(origines, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+if __name__ == "__main__":
+    os.makedirs(DOSSIER_FIXTURES, exist_ok=True)
+    detail_enregistre = False
+    enregistrees = []
+    for site in sys.argv[1:] or SITES:
+        try:
+            offres = enregistrer(site)
+        except Exception as e:
+            print(f"  ❌ {site} : {str(e)[:60]}")
+            continue
+        enregistrees.append(site)
+        if not detail_enregistre and offres:
+            response = transport.get(offres[0]['link'], utiliser_cache=False)
+            if response.status_code == 200:
+                with open(os.path.join(DOSSIER_FIXTURES, 'detail.html'), 'wb') as f:
+                    f.write(response.content)
+                detail_enregistre = True
+                enregistrees.append('detail')
+                print(f"  ✓ page de détail : {offres[0]['link']}")
+    if enregistrees:
+        noter_origines(enregistrees)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesures de performance, sans Internet (pages enregistrées dans fixtures/,
+servies par benchmarks/serveur.py)
+    analyse/<site>               lecture d'une page de résultats (s par page)
+    analyse/atelier              PAGES_ATELIER pages de tous les sites, analysées
+                                 par les processus d'analyse (un par cœur)
+    pipeline/bout_en_bout        crawl de tous les sites (PAGES pages par recherche),
+                                 dédoublonnage, fusion, pages de détail,
+                                 quasi-doublons et sauvegarde
+    nettoyer_doublons/<n>        sur une archive synthétique de n offres
+    fusionner_avec_existants/<n> n/10 offres fusionnées dans une archive de n offres
+
+Chaque mesure est le MEILLEUR temps de plusieurs essais, sur des données
+préparées à neuf pour chaque essai. Les références sont dans
+benchmarks/references.json : une mesure plus lente que sa référence de plus
+de TOLERANCE fait échouer le lancement (code de sortie 1).
+
+Certaines mesures sont seulement INDICATIVES (affichées, jamais bloquantes) :
+    - celles faites sur des pages synthétiques : analyse/* et pipeline/* tant que
+      fixtures/ n'a pas de vraies pages (python -m benchmarks.enregistrer) ;
+    - analyse/atelier avec un seul processus, ou un autre nombre de processus
+      que la référence : elle ne mesure alors pas le parallélisme.
+
+Usage (depuis la racine du projet) :
+    python -m benchmarks.lancer                  compare aux références
+    python -m benchmarks.lancer --enregistrer    remplace les références (même machine !)
+    python -m benchmarks.lancer --complet        ajoute l'archive d'un million d'offres
+    python -m benchmarks.lancer --seulement analyse
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from functools import partial
+
+import limiteur
+import transport
+from analyse_parallele import Analyse, Atelier, nombre_processus
+from benchmarks import serveur
+from crawl import iterer_stages
+from donnees import sauvegarder_donnees
+from doublons import fusionner_quasi_doublons
+from enrichissement import enrichir
+from extraction import extraire_offres
+from scraper_suisse_complet import filtrer_doublons, fusionner_avec_existants, nettoyer_doublons
+from sources import enregistrer_source, get_source
+from stage import Stage
+
+FICHIER_REFERENCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'references.json')
+
+TOLERANCE = 0.25
+# En dessous, l'écart est du bruit de mesure
+ECART_MIN = 0.002
+
+TAILLES = (10_000, 100_000)
+TAILLES_COMPLET = TAILLES + (1_000_000,)
+
+ESSAIS_ANALYSE = 20
+PAGES_ATELIER = 200
+ESSAIS_PIPELINE = 3
+ESSAIS_DOUBLONS = 3
+
+ENTREPRISES = ['UBS AG', 'Pictet & Cie', 'Lombard Odier SA', 'Julius Bär', 'Zürcher Kantonalbank',
+               'Swiss Re', 'Vontobel', 'Partners Group', 'Deloitte SA', 'KPMG AG']
+TITRES = ['Stage en Finance', 'Internship Investment Banking', 'Praktikum Risk Controlling',
+          'Trainee Wealth Management', 'Graduate Program Asset Management', 'Stage Audit Financier']
+DOMAINES = ['Finance', 'Investment Banking', 'Risk Management', 'Wealth Management', 'Audit']
+VILLES = ['Zürich', 'Genève', 'Lausanne', 'Basel', 'Bern', 'Lugano']
+
+
+def meilleur_temps(fonction, essais, preparer=None):
+    """Meilleur temps (s) de fonction(), préparée à neuf avant chaque essai"""
+    meilleur = float('inf')
+    for _ in range(essais):
+        argument = preparer() if preparer else None
+        debut = time.perf_counter()
+        fonction(argument) if preparer else fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def sources_locales(serveurs):
+    """Une copie de chaque site du registre, dirigée vers son serveur local"""
+    noms = []
+    for site, (_, adresse) in serveurs.items():
+        config = {cle: valeur for cle, valeur in get_source(site).items() if cle != 'nom'}
+        config['url_recherche'] = f"{adresse}/recherche?q={{terme}}"
+        config['base_lien'] = adresse
+        noms.append(enregistrer_source(f"banc_{site}", **config)['nom'])
+    return noms
+
+
+def mesurer_analyse(mesures):
+    for site in serveur.SITES:
+        source = get_source(site)
+        contenu = serveur.lire_fixture(site)
+        url = source['url_recherche'].format(terme=source['recherches'][0])
+        offres = len(extraire_offres(contenu, url, source))
+        duree = meilleur_temps(lambda: extraire_offres(contenu, url, source), ESSAIS_ANALYSE)
+        mesures[f"analyse/{site}"] = duree
+        print(f"   {site:20} {duree * 1000:7.2f} ms/page  {offres / duree:8.0f} offres/s  "
+              f"{len(contenu) / duree / 2 ** 20:6.1f} Mo/s")
+
+    pages = [(Analyse(source), serveur.lire_fixture(source['nom']),
+              source['url_recherche'].format(terme=source['recherches'][0]))
+             for source in map(get_source, serveur.SITES)]
+    pages = (pages * PAGES_ATELIER)[:PAGES_ATELIER]
+
+    async def tout_analyser():
+        atelier = Atelier()
+        try:
+            # Processus démarrés avant la mesure
+            await asyncio.gather(*(atelier.analyser(*page) for page in pages[:atelier.processus]))
+            debut = time.perf_counter()
+            await asyncio.gather(*(atelier.analyser(*page) for page in pages))
+            return time.perf_counter() - debut
+        finally:
+            atelier.fermer()
+
+    duree = asyncio.run(tout_analyser())
+    mesures["analyse/atelier"] = duree
+    print(f"   atelier ({nombre_processus()} processus) {len(pages) / duree:6.0f} pages/s")
+
+
+def pipeline(noms):
+    """Le parcours de scraper_suisse_complet.main, sans questions ni affichage"""
+    tous = fusionner_avec_existants(filtrer_doublons(iterer_stages(noms, pages_max=serveur.PAGES + 1)), [])
+    enrichir(tous)
+    tous = fusionner_quasi_doublons(tous)
+    sauvegarder_donnees({"derniere_maj": "banc", "stages": tous})
+    return len(tous)
+
+
+def mesurer_pipeline(mesures):
+    serveurs = serveur.demarrer()
+    dossier_initial = os.getcwd()
+    try:
+        noms = sources_locales(serveurs)
+        meilleur = float('inf')
+        for _ in range(ESSAIS_PIPELINE):
+            # Dossier neuf : ni cache HTTP, ni détails, ni base d'un essai précédent
+            with tempfile.TemporaryDirectory() as dossier, contextlib.redirect_stdout(io.StringIO()):
+                os.chdir(dossier)
+                try:
+                    debut = time.perf_counter()
+                    nombre = pipeline(noms)
+                    meilleur = min(meilleur, time.perf_counter() - debut)
+                finally:
+                    os.chdir(dossier_initial)
+    finally:
+        serveur.arreter(serveurs)
+    mesures["pipeline/bout_en_bout"] = meilleur
+    print(f"   {len(noms)} sites, {nombre} offres gardées : {meilleur:.2f} s")
+
+
+def archive_synthetique(taille, graine=2026):
+    """taille offres, dont environ 10 % en double (même entreprise et même titre)"""
+    hasard = random.Random(graine)
+    uniques = taille - taille // 10
+    stages = []
+    for i in range(taille):
+        numero = i if i < uniques else hasard.randrange(uniques)
+        stages.append(Stage(
+            title=f"{TITRES[numero % len(TITRES)]} {numero}",
+            company=ENTREPRISES[numero % len(ENTREPRISES)],
+            location=VILLES[numero % len(VILLES)],
+            domain=DOMAINES[numero % len(DOMAINES)],
+            duration="6 mois",
+            startDate="Variable",
+            link=f"https://www.example.ch/job/{numero}/",
+        ))
+    hasard.shuffle(stages)
+    return stages
+
+
+def nouvelles_et_archive(taille):
+    """
+    Archive de taille offres et taille/10 nouvelles : la moitié déjà dans l'archive
+    (copies, comme au retour d'un crawl), le reste inédit. Objets neufs à chaque
+    appel : aucune clé de dédoublonnage n'est encore calculée.
+    """
+    archive = archive_synthetique(taille)
+    nouveaux = [Stage(**stage.en_dict()) for stage in archive[:taille // 20]]
+    inedits = archive_synthetique(taille // 20, graine=taille)
+    for stage in inedits:
+        stage['title'] += " (nouveau)"
+    return nouveaux + inedits, archive
+
+
+def mesurer_doublons(mesures, tailles):
+    for taille in tailles:
+        duree = meilleur_temps(nettoyer_doublons, ESSAIS_DOUBLONS, partial(archive_synthetique, taille))
+        mesures[f"nettoyer_doublons/{taille}"] = duree
+        print(f"   nettoyer_doublons        {taille:>9} offres : {duree * 1000:8.1f} ms")
+        duree = meilleur_temps(lambda jeu: fusionner_avec_existants(*jeu), ESSAIS_DOUBLONS,
+                               partial(nouvelles_et_archive, taille))
+        mesures[f"fusionner_avec_existants/{taille}"] = duree
+        print(f"   fusionner_avec_existants {taille:>9} offres : {duree * 1000:8.1f} ms")
+
+
+def pages_utilisees(nom):
+    """Pages de fixtures/ dont dépend une mesure"""
+    if nom.startswith('pipeline/'):
+        return set(serveur.SITES) | {'detail'}
+    if nom == 'analyse/atelier':
+        return set(serveur.SITES)
+    if nom.startswith('analyse/'):
+        return {nom.split('/', 1)[1]}
+    return set()
+
+
+def mesures_indicatives(mesures, references):
+    """{mesure: raison} des mesures qui ne doivent pas faire échouer le lancement"""
+    origines = serveur.lire_origines()
+    indicatives = {}
+    for nom in mesures:
+        if pages_utilisees(nom) - set(origines):
+            indicatives[nom] = "pages synthétiques"
+    processus = nombre_processus()
+    if 'analyse/atelier' in mesures:
+        if processus < 2:
+            indicatives['analyse/atelier'] = "un seul processus"
+        elif references.get('processus') != processus:
+            indicatives['analyse/atelier'] = f"{processus} processus, référence : {references.get('processus')}"
+    return indicatives
+
+
+def lire_references(chemin=FICHIER_REFERENCES):
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"mesures": {}}
+
+
+def ecrire_references(mesures, chemin=FICHIER_REFERENCES):
+    references = lire_references(chemin)
+    references['machine'] = f"{platform.machine()}, {os.cpu_count()} cpu, Python {platform.python_version()}"
+    if 'analyse/atelier' in mesures:
+        references['processus'] = nombre_processus()
+    references['mesures'].update({nom: round(duree, 6) for nom, duree in mesures.items()})
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(references, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def comparer(mesures, references, tolerance=TOLERANCE, indicatives=None):
+    """
+    Affiche l'écart à la référence de chaque mesure ; renvoie les mesures en régression
+    (sauf les indicatives : {mesure: raison}, affichées seulement)
+    """
+    indicatives = indicatives or {}
+    regressions = []
+    print(f"\n   {'mesure':36} {'référence':>11} {'actuel':>11}   écart")
+    for nom, duree in mesures.items():
+        reference = references.get(nom)
+        if reference is None:
+            print(f"   {nom:36} {'—':>11} {duree * 1000:9.2f}ms   (pas de référence)")
+            continue
+        ecart = duree / reference - 1
+        en_regression = ecart > tolerance and duree - reference > ECART_MIN
+        if nom in indicatives:
+            remarque = f"  (indicatif : {indicatives[nom]})"
+        elif en_regression:
+            regressions.append(nom)
+            remarque = "  ❌ RÉGRESSION"
+        else:
+            remarque = ""
+        print(f"   {nom:36} {reference * 1000:9.2f}ms {duree * 1000:9.2f}ms  {ecart:+6.0%}{remarque}")
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance du scraper")
+    parser.add_argument('--enregistrer', action='store_true', help="remplacer les références par ces mesures")
+    parser.add_argument('--complet', action='store_true', help="ajouter l'archive d'un million d'offres")
+    parser.add_argument('--seulement', help="préfixe des mesures à lancer (analyse, pipeline, ...)")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="ralentissement toléré (0.25 = 25 %%)")
+    options = parser.parse_args(arguments)
+
+    # Le serveur local répond sans limite : pas de politesse à respecter ici
+    limiteur.DEBIT_INITIAL = limiteur.DEBIT_MAX = 10_000.0
+    limiteur.RAFALE = 10_000
+    transport.configurer(cache=False)
+
+    parties = [
+        ("analyse", "🔎 Lecture des pages de résultats", mesurer_analyse),
+        ("pipeline", "🚀 Parcours complet (serveurs locaux)", mesurer_pipeline),
+        ("nettoyer_doublons fusionner_avec_existants", "🧹 Doublons sur archives synthétiques",
+         lambda mesures: mesurer_doublons(mesures, TAILLES_COMPLET if options.complet else TAILLES)),
+    ]
+    mesures = {}
+    for prefixes, titre, mesurer in parties:
+        if options.seulement and not any(p.startswith(options.seulement) for p in prefixes.split()):
+            continue
+        print(f"\n{titre}")
+        mesurer(mesures)
+
+    if options.enregistrer:
+        ecrire_references(mesures)
+        print(f"\n✅ {len(mesures)} références enregistrées dans {os.path.relpath(FICHIER_REFERENCES)}")
+        return 0
+
+    references = lire_references()
+    indicatives = mesures_indicatives(mesures, references)
+    regressions = comparer(mesures, references['mesures'], options.tolerance, indicatives)
+    if regressions:
+        print(f"\n❌ {len(regressions)} mesure(s) plus lente(s) que la référence de plus de {options.tolerance:.0%}")
+        return 1
+    print("\n✅ Aucune régression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux sites d'emploi pour les mesures (aucun accès à Internet)
+Un serveur HTTP local par site, sur son propre port (chaque site a donc sa
+propre limite de débit, comme en vrai) :
+    /recherche?...&page=N   page de résultats enregistrée (fixtures/<site>.html) ;
+                            les liens des pages 2 et suivantes sont changés pour
+                            que chaque page apporte des offres « nouvelles »
+                            au-delà de PAGES : une page sans résultat
+    tout autre chemin       page de détail (fixtures/detail.html)
+Chaque page a un ETag (réponse 304 si elle n'a pas changé, comme les vrais sites).
+Les pages livrées dans fixtures/ sont SYNTHÉTIQUES (même structure que les vrais
+sites, contenu de remplissage) ; fixtures/origine.json liste celles remplacées par
+de vraies pages (python -m benchmarks.enregistrer).
+
+Usage : python -m benchmarks.serveur   (affiche les adresses, Ctrl+C pour arrêter)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DOSSIER_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SITES = ('jobs_ch', 'jobup_ch', 'travail_swiss', 'efinancialcareers', 'indeed_ch')
+PAGES = 5
+PAGE_VIDE = b"<!DOCTYPE html><html><body><main><p>Aucun resultat</p></main></body></html>"
+
+
+def lire_fixture(nom, dossier=DOSSIER_FIXTURES):
+    with open(os.path.join(dossier, f"{nom}.html"), 'rb') as f:
+        return f.read()
+
+
+def lire_origines(dossier=DOSSIER_FIXTURES):
+    """{page: date d'enregistrement} des pages prises sur les vrais sites (les autres sont synthétiques)"""
+    try:
+        with open(os.path.join(dossier, 'origine.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def numero_page(requete):
+    """Numéro de page (paramètre page=, ou start= par dizaines comme Indeed)"""
+    parametres = parse_qs(requete)
+    if 'start' in parametres:
+        return int(parametres['start'][0]) // 10 + 1
+    return int(parametres.get('page', ['1'])[0])
+
+
+def page_numero(contenu, page):
+    """Même page, liens différents (?bench_page=N) pour les pages suivantes"""
+    if page == 1:
+        return contenu
+
+    def remplacer(trouve):
+        lien = trouve.group(1)
+        separateur = b'&amp;' if b'?' in lien else b'?'
+        return b'href="' + lien + separateur + b'bench_page=' + str(page).encode() + b'"'
+    return re.sub(rb'href="([^"#]*)"', remplacer, contenu)
+
+
+def gestionnaire(resultats, detail, pages):
+    """Classe de gestion des requêtes pour un site"""
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            morceaux = urlsplit(self.path)
+            if morceaux.path.startswith('/recherche'):
+                page = numero_page(morceaux.query)
+                corps = page_numero(resultats, page) if page <= pages else PAGE_VIDE
+            else:
+                corps = detail
+            etag = '"' + hashlib.sha1(corps).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(corps)))
+            self.end_headers()
+            self.wfile.write(corps)
+
+        def log_message(self, *args):
+            pass
+
+    return Gestionnaire
+
+
+class Serveur(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, requete, adresse):
+        # Le client a fermé la connexion avant la fin (lecture arrêtée exprès)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(requete, adresse)
+
+
+def demarrer(sites=SITES, pages=PAGES, dossier=DOSSIER_FIXTURES):
+    """Lance un serveur par site ; renvoie {site: (serveur, adresse de base)}"""
+    detail = lire_fixture('detail', dossier)
+    serveurs = {}
+    for site in sites:
+        serveur = Serveur(('127.0.0.1', 0), gestionnaire(lire_fixture(site, dossier), detail, pages))
+        threading.Thread(target=serveur.serve_forever, daemon=True).start()
+        serveurs[site] = (serveur, f"http://127.0.0.1:{serveur.server_port}")
+    return serveurs
+
+
+def arreter(serveurs):
+    for serveur, _ in serveurs.values():
+        serveur.shutdown()
+        serveur.server_close()
+
+
+if __name__ == "__main__":
+    serveurs = demarrer()
+    for site, (_, adresse) in serveurs.items():
+        print(f"{site:20} {adresse}/recherche?page=1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        arreter(serveurs)
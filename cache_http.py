@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache HTTP sur disque (requêtes conditionnelles)
+On garde chaque page avec son ETag / Last-Modified : au passage suivant,
+le serveur répond 304 si rien n'a changé et on réutilise la copie locale,
+ainsi que les offres déjà extraites (pas de nouvelle analyse HTML).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+CONFIG = {
+    "dossier": ".cache_http",
+    "taille_max": 50 * 1024 * 1024,     # octets (pages + offres extraites)
+    "age_max": 30 * 24 * 3600,          # secondes depuis le dernier accès
+}
+
+_verrou = threading.Lock()
+
+
+def _chemin(url, extension):
+    """Fichier du cache pour une URL"""
+    nom = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(CONFIG['dossier'], f"{nom}.{extension}")
+
+
+def _ecrire(chemin, contenu):
+    """Écriture atomique (fichier temporaire puis renommage)"""
+    os.makedirs(CONFIG['dossier'], exist_ok=True)
+    temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    mode = 'wb' if isinstance(contenu, bytes) else 'w'
+    with open(temporaire, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+        f.write(contenu)
+    os.replace(temporaire, chemin)
+
+
+def lire_meta(url):
+    """Infos gardées pour une URL (None si absente du cache)"""
+    try:
+        with open(_chemin(url, 'json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def lire_corps(url):
+    """Contenu de la page gardée (None si absente)"""
+    try:
+        with open(_chemin(url, 'html'), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def en_tetes_conditionnels(url):
+    """If-None-Match / If-Modified-Since à envoyer pour cette URL"""
+    meta = lire_meta(url)
+    if not meta:
+        return {}
+    en_tetes = {}
+    if meta.get('etag'):
+        en_tetes['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        en_tetes['If-Modified-Since'] = meta['last_modified']
+    return en_tetes
+
+
+def enregistrer(url, response):
+    """Garde une réponse 200 si le serveur a fourni un validateur"""
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+    with _verrou:
+        _ecrire(_chemin(url, 'html'), response.content)
+        # Les offres extraites de l'ancienne version ne sont plus valables
+        supprimer_fichier(_chemin(url, 'offres.json'))
+        _ecrire(_chemin(url, 'json'), json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stocke_le": time.time(),
+            "dernier_acces": time.time(),
+        }))
+
+
+def rafraichir(url, response):
+    """Réponse 304 : on note l'accès et les éventuels nouveaux validateurs"""
+    meta = lire_meta(url)
+    if not meta:
+        return
+    meta['dernier_acces'] = time.time()
+    meta['etag'] = response.headers.get('ETag', meta.get('etag'))
+    meta['last_modified'] = response.headers.get('Last-Modified', meta.get('last_modified'))
+    with _verrou:
+        _ecrire(_chemin(url, 'json'), json.dumps(meta))
+
+
+def lire_offres(url, cle):
+    """Offres déjà extraites de cette page avec le même extracteur (ou None)"""
+    try:
+        with open(_chemin(url, 'offres.json'), 'r', encoding='utf-8') as f:
+            extrait = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return extrait['offres'] if extrait.get('cle') == cle else None
+
+
+def enregistrer_offres(url, cle, offres):
+    """Garde les offres extraites d'une page présente dans le cache"""
+    if lire_meta(url) is None:
+        return
+    with _verrou:
+        _ecrire(_chemin(url, 'offres.json'), json.dumps({"cle": cle, "offres": offres}, ensure_ascii=False))
+
+
+def oublier(url):
+    """Retire une URL du cache (page, validateurs et offres extraites)"""
+    with _verrou:
+        for extension in ('json', 'html', 'offres.json'):
+            supprimer_fichier(_chemin(url, extension))
+
+
+def supprimer_fichier(chemin):
+    """Supprime un fichier s'il existe"""
+    try:
+        os.remove(chemin)
+    except FileNotFoundError:
+        pass
+
+
+def nettoyer():
+    """
+    Éviction : supprime les pages non utilisées depuis age_max,
+    puis les moins récemment utilisées tant que le cache dépasse taille_max.
+    Renvoie le nombre de pages supprimées.
+    """
+    if not os.path.isdir(CONFIG['dossier']):
+        return 0
+
+    entrees = []
+    for nom in os.listdir(CONFIG['dossier']):
+        if not nom.endswith('.json') or nom.endswith('.offres.json'):
+            continue
+        base = os.path.join(CONFIG['dossier'], nom[:-len('.json')])
+        fichiers = [f"{base}.json", f"{base}.html", f"{base}.offres.json"]
+        taille = sum(os.path.getsize(f) for f in fichiers if os.path.exists(f))
+        try:
+            with open(f"{base}.json", 'r', encoding='utf-8') as f:
+                dernier_acces = json.load(f).get('dernier_acces', 0)
+        except ValueError:
+            dernier_acces = 0
+        entrees.append((dernier_acces, taille, fichiers))
+
+    maintenant = time.time()
+    total = sum(taille for _, taille, _ in entrees)
+    supprimees = 0
+    with _verrou:
+        # Les plus anciennes d'abord
+        for dernier_acces, taille, fichiers in sorted(entrees, key=lambda e: e[0]):
+            if maintenant - dernier_acces <= CONFIG['age_max'] and total <= CONFIG['taille_max']:
+                break
+            for fichier in fichiers:
+                supprimer_fichier(fichier)
+            total -= taille
+            supprimees += 1
+    return supprimees
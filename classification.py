@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Domaine et niveau d'une offre d'après son titre (et un extrait du texte)
+Les mots-clés français, allemands et anglais de tous les domaines et de
+tous les niveaux sont compilés en UNE expression régulière : le texte est
+parcouru une seule fois et chaque mot trouvé vote pour son domaine (le
+titre compte double). Le niveau est le premier trouvé : "Stage",
+"Trainee", "Graduate" ou "Junior" (premier emploi, pas un stage).
+
+    classer("Praktikum Risk Controlling (m/w/d)")  -> Classement(domaine='Risk Management', niveau='Stage')
+
+Après un changement de règles, augmenter VERSION_REGLES (les pages en
+cache seront réanalysées) et reclasser l'archive :
+    python classification.py           (aperçu des changements)
+    python classification.py ecrire    (enregistre les nouveaux domaines)
+Les offres saisies à la main (ajouter_stage.py) gardent leur domaine.
+"""
+
+import re
+import sys
+from collections import Counter, namedtuple
+
+from localisation import normaliser
+
+VERSION_REGLES = 2
+
+Classement = namedtuple('Classement', ['domaine', 'niveau'])
+
+# Domaines, du plus précis au plus général (en cas d'égalité, le premier gagne).
+# Les motifs s'appliquent au texte normalisé : minuscules, sans accents,
+# ponctuation remplacée par des espaces ("M&A" -> "m a")
+DOMAINES = [
+    ("Investment Banking", [
+        r'investment ?bank\w*', r'm a', r'mergers?', r'acquisitions?', r'fusions? acquisitions?',
+        r'corporate finance', r'ecm', r'dcm', r'leveraged finance', r'capital markets?',
+        r'banque d affaires', r'kapitalmarkt\w*',
+    ]),
+    ("Wealth Management", [
+        r'wealth\w*', r'private bank\w*', r'gestion de fortune', r'banque privee',
+        r'vermogensverwaltung', r'vermoegensverwaltung', r'relationship manager\w*', r'family office',
+    ]),
+    ("Asset Management", [
+        r'asset management', r'portfolio\w*', r'portefeuilles?', r'fund\w*', r'fonds',
+        r'gestion d actifs', r'investment analyst\w*', r'equity research', r'anlage\w*',
+    ]),
+    ("Risk Management", [
+        r'risk\w*', r'risques?', r'risiko\w*', r'credit analyst\w*', r'analyste credit\w*',
+        r'kredit\w*', r'market risk', r'var',
+    ]),
+    ("Compliance", [
+        r'compliance', r'conformite', r'aml', r'kyc', r'anti money laundering', r'blanchiment',
+        r'regulatory', r'reglementaire\w*', r'regulator\w*',
+    ]),
+    ("Audit", [
+        r'audit\w*', r'revision', r'revisor\w*', r'wirtschaftsprufung',
+        r'wirtschaftspruefung',
+    ]),
+    ("Comptabilité", [
+        r'accounting', r'accountant', r'comptab\w*', r'buchhaltung', r'buchhalter\w*',
+        r'rechnungswesen', r'fiscal\w*', r'tax', r'steuer\w*',
+    ]),
+    ("Controlling", [
+        r'controll\w*', r'fp a', r'financial planning', r'controle de gestion', r'treasury',
+        r'tresorerie', r'treasur\w*',
+    ]),
+    ("Data Science", [
+        r'data scien\w*', r'machine learning', r'quant\w*', r'data engineer\w*',
+        r'intelligence artificielle', r'ml', r'python',
+    ]),
+    ("Analytics", [
+        r'analytics?', r'business intelligence', r'bi', r'data analyst\w*', r'reporting',
+        r'datenanalyse', r'analyse de donnees',
+    ]),
+    ("Finance", [
+        r'financ\w*', r'banking', r'bank', r'banque', r'investment\w*', r'economics?',
+        r'econom\w*', r'wirtschaft\w*',
+    ]),
+]
+
+# Niveaux (le premier trouvé dans le titre, puis dans l'extrait)
+NIVEAUX = [
+    ("Stage", [
+        r'intern', r'internships?', r'stages?', r'stagiaires?', r'praktik\w*', r'tirocin\w*',
+        r'stagista', r'werkstudent\w*', r'working student', r'summer analyst',
+    ]),
+    ("Trainee", [r'trainee\w*', r'apprenti\w*', r'volontariat', r'hochschulpraktik\w*']),
+    ("Graduate", [
+        r'graduates?', r'jeunes? diplome\w*', r'hochschulabsolvent\w*', r'absolvent\w*',
+    ]),
+    ("Junior", [r'berufseinst\w*', r'entry level', r'junior']),
+]
+
+POIDS_TITRE = 2
+POIDS_EXTRAIT = 1
+
+
+def compiler(domaines, niveaux):
+    """Une expression pour tout : chaque motif est un groupe nommé r<n>"""
+    regles = {}
+    morceaux = []
+    for sorte, familles in (('domaine', domaines), ('niveau', niveaux)):
+        for rang, (nom, motifs) in enumerate(familles):
+            groupe = f"r{len(regles)}"
+            regles[groupe] = (sorte, nom, rang)
+            morceaux.append(rf"(?P<{groupe}>{'|'.join(motifs)})")
+    # Un seul \b autour de l'ensemble : les essais ne commencent qu'en début de mot
+    return re.compile(rf"\b(?:{'|'.join(morceaux)})\b"), regles
+
+
+EXPRESSION, REGLES = compiler(DOMAINES, NIVEAUX)
+
+
+def classer(titre, extrait='', defaut=None):
+    """Domaine (defaut si aucun mot-clé) et niveau (None si aucun) d'une offre"""
+    votes = Counter()
+    niveaux = [None, None]
+    for partie, (texte, poids) in enumerate(((titre, POIDS_TITRE), (extrait, POIDS_EXTRAIT))):
+        if not texte:
+            continue
+        for trouve in EXPRESSION.finditer(normaliser(texte)):
+            sorte, nom, rang = REGLES[trouve.lastgroup]
+            if sorte == 'domaine':
+                votes[(nom, rang)] += poids
+            elif niveaux[partie] is None:
+                niveaux[partie] = nom
+    domaine = defaut
+    if votes:
+        domaine = min(votes, key=lambda cle: (-votes[cle], cle[1]))[0]
+    return Classement(domaine, niveaux[0] or niveaux[1])
+
+
+def noms_domaines():
+    return [nom for nom, _ in DOMAINES]
+
+
+def reclasser(stages):
+    """Recalcule le domaine de chaque offre ; renvoie le nombre d'offres changées"""
+    changes = 0
+    for stage in stages:
+        domaine = classer(stage.get('title', ''), defaut=stage.get('domain')).domaine
+        if domaine != stage.get('domain'):
+            stage['domain'] = domaine
+            changes += 1
+    return changes
+
+
+if __name__ == "__main__":
+    import time
+
+    from donnees import charger_donnees, exporter, sauvegarder_donnees
+    from sources import saisie_manuelle
+
+    data = charger_donnees()
+    stages = [stage for stage in data.get('stages', []) if not saisie_manuelle(stage)]
+    avant = Counter(stage.get('domain') for stage in stages)
+    debut = time.perf_counter()
+    changes = reclasser(stages)
+    duree = time.perf_counter() - debut
+    apres = Counter(stage.get('domain') for stage in stages)
+    print(f"{len(stages)} offres reclassées en {duree * 1000:.0f} ms : {changes} changements "
+          f"({len(data.get('stages', [])) - len(stages)} saisies à la main ignorées)")
+    for domaine in sorted(set(avant) | set(apres), key=lambda d: -apres[d]):
+        print(f"   • {domaine:25} : {avant[domaine]:5} -> {apres[domaine]}")
+    if sys.argv[1:] == ['ecrire']:
+        sauvegarder_donnees(data)
+        exporter()
+        print("✅ Domaines enregistrés")
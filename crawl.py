@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur de crawl asynchrone
+Lance toutes les recherches de tous les sites en même temps,
+avec une limite de politesse par site au lieu de pauses globales
+(débit adaptatif, reprises et coupure des sites qui bloquent : limiteur.py).
+Les pages téléchargées sont analysées à part, sur tous les cœurs
+(analyse_parallele.py), pendant que les téléchargements continuent.
+Les offres sont produites au fil de l'eau, page après page (iterer_stages).
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+import requests
+
+import cache_http
+import transport
+from analyse_parallele import Analyse, Atelier
+from lecture_flux import lecteur
+from limiteur import CircuitOuvert, Limiteurs, duree_retry_after
+from metriques import chronometre, compter, etiquettes, observer
+from sources import empreinte_source, get_source, url_page
+from stage import en_dicts, en_stages
+
+# Politesse : requêtes simultanées par site (le rythme est géré par limiteur.py)
+REQUETES_PAR_HOTE = 1
+# Essais par requête : réponses à réessayer (le site est surchargé ou nous freine)
+ESSAIS_MAX = 3
+STATUTS_A_REESSAYER = {429, 500, 502, 503, 504}
+# Réponses d'un site qui nous bloque : pas de nouvel essai, mais comptées comme échecs
+STATUTS_BLOCAGE = {401, 403}
+
+# Pagination : nombre maximum de pages lues par recherche
+PAGES_MAX = 5
+# Nombre d'offres en attente entre le crawl et la suite du traitement
+TAILLE_FILE = 100
+
+FIN = object()
+
+
+def creer_tache(source, terme, url, analyser, cle_cache=None, lecteur=None, connus=None, analyser_connus=None):
+    """
+    Décrit une page de recherche à télécharger (parcourir_recherche) :
+    analyser(contenu, url) reçoit le HTML et renvoie la liste de TOUTES ses offres.
+    cle_cache identifie l'extracteur : si la page n'a pas changé (304),
+    les offres gardées avec la même clé sont réutilisées sans analyse.
+    lecteur (lecture_flux.lecteur) lit la page en flux et peut l'arrêter avant la fin.
+    connus (urls.IndexIdentifiants) : offres à ne pas rendre ; analyser_connus les
+    saute dès la carte, pour les pages dont les offres ne sont pas gardées.
+    """
+    return {"source": source, "terme": terme, "url": url, "analyser": analyser, "cle_cache": cle_cache,
+            "lecteur": lecteur, "connus": connus, "analyser_connus": analyser_connus}
+
+
+def telecharger(url, **options):
+    """Téléchargement bloquant (exécuté dans un thread par le moteur)"""
+    return transport.get(url, **options)
+
+
+async def requeter(url, limiteur, essais=ESSAIS_MAX, **options):
+    """
+    Télécharge url au rythme permis par le limiteur du site.
+    Un 429/5xx ou une erreur réseau ralentit le site et la requête est
+    refaite (au plus essais fois) ; la dernière réponse est renvoyée.
+    Lève CircuitOuvert si le site est coupé.
+    """
+    for essai in range(1, essais + 1):
+        try:
+            async with limiteur:
+                with chronometre('http_latence_secondes'):
+                    response = await asyncio.to_thread(telecharger, url, **options)
+        except requests.RequestException as e:
+            limiteur.echec()
+            compter('http_reponses', statut=type(e).__name__)
+            if essai == essais or limiteur.coupe():
+                raise
+            continue
+
+        compter('http_reponses', statut=response.status_code)
+        # Une page inchangée (304) ne transfère que ses en-têtes
+        observer('http_octets', 0 if getattr(response, 'non_modifie', False) else len(response.content))
+
+        if response.status_code in STATUTS_A_REESSAYER:
+            limiteur.echec(duree_retry_after(response.headers.get('Retry-After')))
+            if essai == essais or limiteur.coupe():
+                return response
+            continue
+        if response.status_code in STATUTS_BLOCAGE:
+            limiteur.echec()
+        else:
+            limiteur.succes()
+        return response
+
+
+async def executer_tache(tache, limiteurs, atelier):
+    """Télécharge puis analyse (dans l'atelier) une recherche, sans jamais lever d'exception"""
+    resultat = {"tache": tache, "stages": [], "erreur": None}
+    try:
+        response = await requeter(tache['url'], limiteurs.pour(tache['url']), lecteur=tache.get('lecteur'))
+
+        if response.status_code == 200:
+            resultat['stages'] = await analyser_reponse(tache, response, atelier)
+        else:
+            resultat['erreur'] = f"Statut HTTP {response.status_code}"
+    except CircuitOuvert as e:
+        resultat['erreur'] = str(e)
+    except Exception as e:
+        resultat['erreur'] = str(e)[:60]
+
+    return resultat
+
+
+def sans_connus(offres, connus, url):
+    """Offres dont le lien n'est pas dans connus (comme extraire_carte avec connus)"""
+    if connus is None:
+        return offres
+    return [offre for offre in offres if offre['link'] == url or offre['link'] not in connus]
+
+
+async def analyser_reponse(tache, response, atelier):
+    """
+    Offres d'une page : reprises du cache si elle n'a pas changé, sinon analysées.
+    Le cache garde toutes les offres de la page ; les connues sont retirées ensuite.
+    """
+    cle, connus, url = tache.get('cle_cache'), tache.get('connus'), tache['url']
+    if cle and getattr(response, 'non_modifie', False):
+        offres = cache_http.lire_offres(url, cle)
+        if offres is not None:
+            compter('pages_non_modifiees')
+            return sans_connus(en_stages(offres), connus, url)
+
+    # Page gardée dans le cache HTTP (une page tronquée ne l'est pas) : ses offres aussi
+    gardee = (cle and not getattr(response, 'tronquee', None)
+              and await asyncio.to_thread(cache_http.lire_meta, url) is not None)
+    # L'analyse HTML se fait hors de la boucle (processus d'analyse, ou thread)
+    if not gardee and tache.get('analyser_connus') is not None:
+        return await atelier.analyser(tache['analyser_connus'], response.content, url)
+    offres = await atelier.analyser(tache['analyser'], response.content, url)
+    if gardee:
+        await asyncio.to_thread(cache_http.enregistrer_offres, url, cle, en_dicts(offres))
+    return sans_connus(offres, connus, url)
+
+
+async def parcourir_recherche(source, terme, limiteurs, atelier, sortie, pages_max, max_offres=None, connus=None):
+    """
+    Lit les pages d'une recherche l'une après l'autre et pousse chaque offre
+    dans la file dès qu'elle est extraite.
+    S'arrête à pages_max, à max_offres, sur une erreur ou sur une page
+    qui n'apporte aucune offre nouvelle (fin des résultats, ou page dont
+    toutes les offres sont dans connus : on a rattrapé le passage précédent).
+    """
+    analyser = Analyse(source)
+    analyser_connus = Analyse(source, connus) if connus is not None else None
+    lire_page = lecteur(source)
+    cle_cache = empreinte_source(source)
+    deja_vues = set()
+    total = 0
+    page = 0
+    erreur = None
+
+    # Toutes les mesures de cette recherche (requêtes, analyse, cartes) en portent le nom
+    with etiquettes(source=source['nom'], terme=terme):
+        while page < pages_max:
+            page += 1
+            tache = creer_tache(source['libelle'], terme, url_page(source, terme, page), analyser, cle_cache,
+                                lire_page, connus, analyser_connus)
+            resultat = await executer_tache(tache, limiteurs, atelier)
+            if resultat['erreur']:
+                erreur = resultat['erreur']
+                break
+
+            nouvelles = [stage for stage in resultat['stages'] if (stage['link'], stage['title']) not in deja_vues]
+            if not nouvelles:
+                break
+            for stage in nouvelles:
+                deja_vues.add((stage['link'], stage['title']))
+                stage.source = source['nom']
+                await sortie.put(stage)
+                total += 1
+                if max_offres and total >= max_offres:
+                    break
+            if max_offres and total >= max_offres:
+                break
+
+    libelle = f"{source['libelle']} / {terme.replace('+', ' ')}"
+    if erreur and not total:
+        print(f"  ❌ {libelle} : {erreur}")
+    else:
+        print(f"  ✓ {libelle} : {total} offres trouvées ({page} page(s))")
+
+
+async def flux_crawl(noms, pages_max=PAGES_MAX, max_offres=None, connus=None):
+    """
+    Générateur asynchrone : toutes les recherches de tous les sites tournent
+    en parallèle et leurs offres sont rendues dès qu'elles arrivent.
+    La file est bornée : si la suite du traitement est lente, le crawl attend.
+    """
+    file = asyncio.Queue(maxsize=TAILLE_FILE)
+    limiteurs = Limiteurs(REQUETES_PAR_HOTE)
+    # Les offres connues partent une fois vers chaque processus d'analyse
+    atelier = Atelier(connus)
+
+    async def produire():
+        try:
+            await asyncio.gather(*(
+                parcourir_recherche(get_source(nom), terme, limiteurs, atelier, file, pages_max, max_offres, connus)
+                for nom in noms for terme in get_source(nom)['recherches']
+            ))
+        finally:
+            atelier.fermer()
+            limiteurs.sauvegarder()
+            coupes = limiteurs.coupes()
+            if coupes:
+                print(f"  ⛔ Sites coupés (trop de refus) : {', '.join(coupes)}")
+            await file.put(FIN)
+
+    producteurs = asyncio.create_task(produire())
+    try:
+        while True:
+            stage = await file.get()
+            if stage is FIN:
+                break
+            yield stage
+    finally:
+        producteurs.cancel()
+
+
+def iterer_stages(noms, pages_max=PAGES_MAX, max_offres=None, connus=None):
+    """
+    Générateur classique (synchrone) au-dessus de flux_crawl :
+    le crawl tourne dans un thread et les offres arrivent une à une.
+    On peut arrêter la boucle à tout moment, le crawl s'interrompt.
+    connus (urls.IndexIdentifiants) : offres déjà vues, ignorées dès la carte.
+    """
+    sortie = queue.Queue(maxsize=TAILLE_FILE)
+    arret = threading.Event()
+
+    async def pomper():
+        debut = time.monotonic()
+        async for stage in flux_crawl(noms, pages_max, max_offres, connus):
+            # Attendre de la place dans la file, sauf si le consommateur a abandonné
+            while not arret.is_set():
+                try:
+                    await asyncio.to_thread(sortie.put, stage, True, 0.5)
+                    break
+                except queue.Full:
+                    continue
+            if arret.is_set():
+                return
+        print(f"  ⏱️  Crawl terminé en {time.monotonic() - debut:.1f} s")
+
+    def travailler():
+        try:
+            asyncio.run(pomper())
+            cache_http.nettoyer()
+        finally:
+            sortie.put(FIN)
+
+    thread = threading.Thread(target=travailler, daemon=True)
+    thread.start()
+    try:
+        while True:
+            stage = sortie.get()
+            if stage is FIN:
+                break
+            yield stage
+    finally:
+        arret.set()
+
+
+def scraper_sources(noms, pages_max=PAGES_MAX):
+    """
+    Lance les recherches de plusieurs sites EN MÊME TEMPS
+    et renvoie toutes les offres dans une liste
+    """
+    return list(iterer_stages(noms, pages_max))
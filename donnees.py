@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture et écriture de la base d'offres, communes à tous les scripts
+Trois stockages possibles :
+    - "json"    : tout est dans stages_data.json (par défaut)
+    - "sqlite"  : les offres sont dans stages.db, une ligne par offre ;
+                  stages_data.json est exporté pour index.html par
+                  exporter(), à part (une fois les écritures faites)
+    - "binaire" : les offres sont dans stages.bin (instantane.py), plus
+                  petit et plus rapide à charger et à écrire ;
+                  stages_data.json est exporté par exporter(), comme avec
+                  SQLite. S'il a été modifié à la main après le dernier
+                  instantané, c'est lui qui est relu.
+Choisir avec la variable d'environnement STAGES_STOCKAGE=sqlite (ou binaire)
+
+Les ajouts en lot passent par un journal (stages_journal.jsonl) : on y
+écrit à la suite, sans relire la base. compacter_journal() intègre
+ensuite le journal dans la base en une seule fois.
+
+Chaque écriture de stages_data.json produit aussi stages_index.json
+(index de recherche de index.html, voir index_recherche.py) et, si
+STAGES_MORCEAUX=recence ou domaine, l'export en morceaux (voir morceaux.py).
+"""
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import index_recherche
+import instantane
+import morceaux
+import stockage_sqlite
+from stage import cle_stage, en_dicts, en_stages
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou entre processus
+    fcntl = None
+
+CONFIG = {
+    "stockage": os.environ.get('STAGES_STOCKAGE', 'json'),
+    "fichier_json": 'stages_data.json',
+    "fichier_base": stockage_sqlite.FICHIER_BASE,
+    "fichier_instantane": instantane.FICHIER_INSTANTANE,
+    "fichier_journal": 'stages_journal.jsonl',
+    "fichier_index": index_recherche.FICHIER_INDEX,
+    "morceaux": os.environ.get('STAGES_MORCEAUX', ''),
+}
+
+# Octets du journal déjà intégrés dans les données chargées (et ces offres),
+# et nombre d'offres du journal (None = pas encore compté)
+_journal = {"lu": 0, "offres": [], "en_attente": None}
+
+
+def ouvrir_base():
+    """Base SQLite (remplie depuis le JSON la première fois)"""
+    conn = stockage_sqlite.ouvrir(CONFIG['fichier_base'])
+    if stockage_sqlite.est_vide(conn):
+        stockage_sqlite.importer_json(conn, CONFIG['fichier_json'])
+    return conn
+
+
+def lire_journal():
+    """
+    Offres en attente dans le journal, et nombre d'octets lus.
+    Une dernière ligne incomplète (écriture interrompue) est ignorée.
+    """
+    try:
+        with open(CONFIG['fichier_journal'], 'rb') as f:
+            contenu = f.read()
+    except FileNotFoundError:
+        return [], 0
+    fin = contenu.rfind(b'\n') + 1
+    stages = [json.loads(ligne) for ligne in contenu[:fin].decode('utf-8').splitlines() if ligne.strip()]
+    return stages, fin
+
+
+@contextmanager
+def verrou_journal():
+    """
+    Verrou exclusif sur le journal (entre processus, fichier .verrou à côté) :
+    un ajout ne peut pas arriver pendant que oublier_journal() le raccourcit
+    """
+    with open(CONFIG['fichier_journal'] + '.verrou', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def offres_en_attente():
+    """
+    Nombre d'offres dans le journal : compté une fois (lignes, sans lire le JSON),
+    puis tenu à jour par journaliser() et oublier_journal()
+    """
+    if _journal['en_attente'] is None:
+        try:
+            with open(CONFIG['fichier_journal'], 'rb') as f:
+                _journal['en_attente'] = sum(morceau.count(b'\n') for morceau in iter(lambda: f.read(1 << 16), b''))
+        except FileNotFoundError:
+            _journal['en_attente'] = 0
+    return _journal['en_attente']
+
+
+def journaliser(stages):
+    """
+    Ajoute des offres à la fin du journal : une seule écriture, un seul fsync.
+    Renvoie le nombre d'offres écrites.
+    """
+    lignes = ''.join(json.dumps(stage, ensure_ascii=False) + '\n' for stage in en_dicts(stages))
+    if not lignes:
+        return 0
+    with verrou_journal(), open(CONFIG['fichier_journal'], 'a', encoding='utf-8') as f:
+        f.write(lignes)
+        f.flush()
+        os.fsync(f.fileno())
+    nombre = lignes.count('\n')
+    if _journal['en_attente'] is not None:
+        _journal['en_attente'] += nombre
+    return nombre
+
+
+def oublier_journal(octets):
+    """
+    Retire du journal ce qui a été intégré (les ajouts arrivés depuis sont gardés).
+    Sous verrou : aucune ligne ne peut être écrite entre la lecture et le remplacement.
+    """
+    if octets <= 0:
+        return
+    with verrou_journal():
+        try:
+            with open(CONFIG['fichier_journal'], 'rb') as f:
+                f.seek(octets)
+                reste = f.read()
+        except FileNotFoundError:
+            return
+        if reste:
+            temporaire = CONFIG['fichier_journal'] + '.tmp'
+            with open(temporaire, 'wb') as f:
+                f.write(reste)
+            os.replace(temporaire, CONFIG['fichier_journal'])
+        else:
+            os.remove(CONFIG['fichier_journal'])
+        _journal['en_attente'] = reste.count(b'\n')
+
+
+def rejouer_journal(stages, journal):
+    """
+    Applique le journal : une offre de même clé est remplacée sur place,
+    sinon ajoutée en tête (les plus récentes d'abord, comme le reste des données)
+    """
+    positions = {cle_stage(stage): i for i, stage in enumerate(stages)}
+    ajoutees = {}
+    for stage in journal:
+        cle = cle_stage(stage)
+        if cle in positions:
+            stages[positions[cle]] = stage
+        else:
+            ajoutees.pop(cle, None)
+            ajoutees[cle] = stage
+    stages[:0] = reversed(list(ajoutees.values()))
+    return stages
+
+
+def publier(data):
+    """Fichiers lus par index.html en plus de stages_data.json"""
+    index_recherche.ecrire_index(data, CONFIG['fichier_index'])
+    morceaux.publier(data, CONFIG['morceaux'])
+
+
+def ecrire_json(data):
+    """Écrit stages_data.json et les fichiers qui en dépendent (voir publier)"""
+    with open(CONFIG['fichier_json'], 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    publier(data)
+
+
+def modifie_apres(chemin, reference):
+    """chemin a été modifié après reference (ou reference n'existe pas)"""
+    try:
+        date_reference = os.stat(reference).st_mtime_ns
+    except FileNotFoundError:
+        return True
+    try:
+        return os.stat(chemin).st_mtime_ns > date_reference
+    except FileNotFoundError:
+        return False
+
+
+def lire_json():
+    """Contenu de stages_data.json (base vide s'il n'existe pas)"""
+    try:
+        with open(CONFIG['fichier_json'], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"derniere_maj": "", "stages": []}
+
+
+def charger_donnees():
+    """Charge toutes les offres (y compris celles en attente dans le journal)"""
+    if CONFIG['stockage'] == 'sqlite':
+        conn = ouvrir_base()
+        try:
+            data = {"derniere_maj": stockage_sqlite.lire_meta(conn, 'derniere_maj'),
+                    "stages": stockage_sqlite.lire_stages(conn)}
+        finally:
+            conn.close()
+    elif CONFIG['stockage'] == 'binaire':
+        if modifie_apres(CONFIG['fichier_json'], CONFIG['fichier_instantane']):
+            # Pas encore d'instantané, ou JSON modifié à la main depuis : on part du JSON
+            data = lire_json()
+        else:
+            data = instantane.charger(CONFIG['fichier_instantane'])
+    else:
+        data = lire_json()
+
+    journal, _journal['lu'] = lire_journal()
+    _journal['offres'] = journal
+    if journal:
+        rejouer_journal(data['stages'], journal)
+    data['stages'] = en_stages(data['stages'])
+    return data
+
+
+def differences(anciens, stages):
+    """
+    (offres nouvelles ou remplacées, clés retirées) entre les offres chargées
+    et celles à sauvegarder. Une offre gardée telle quelle est le MÊME objet
+    (fusionner_avec_existants et fusionner_quasi_doublons ne créent que les
+    offres qu'ils changent) : une offre modifiée sur place n'est pas vue ici.
+    """
+    chargees = {id(stage) for stage in anciens}
+    modifiees = [stage for stage in stages if id(stage) not in chargees]
+    cles = {cle_stage(stage) for stage in stages}
+    retirees = [cle for cle in dict.fromkeys(map(cle_stage, anciens)) if cle not in cles]
+    return modifiees, retirees
+
+
+def sauvegarder_donnees(data, changements=None):
+    """
+    Sauvegarde toutes les offres.
+    Avec SQLite, changements = differences(anciens, data['stages']) limite
+    l'écriture aux lignes ajoutées, remplacées ou retirées (sans : toutes les
+    lignes sont comparées). Avec SQLite ou l'instantané binaire,
+    stages_data.json n'est pas produit : c'est exporter(), à appeler une
+    fois les écritures faites.
+    Le journal lu par charger_donnees() fait maintenant partie de la base : il est vidé.
+    """
+    if CONFIG['stockage'] == 'sqlite':
+        conn = ouvrir_base()
+        try:
+            if changements is None:
+                stages = en_dicts(data.get('stages', []))
+                # Les plus récentes d'abord dans data : elles sont enregistrées en dernier
+                stockage_sqlite.enregistrer_stages(conn, reversed(stages))
+                stockage_sqlite.supprimer_absents(conn, stages)
+            else:
+                modifiees, retirees = changements
+                # Le journal rejoué au chargement n'est pas encore dans la base
+                stockage_sqlite.enregistrer_stages(conn, _journal['offres'])
+                stockage_sqlite.enregistrer_stages(conn, reversed(en_dicts(modifiees)))
+                stockage_sqlite.supprimer_cles(conn, retirees)
+            stockage_sqlite.ecrire_meta(conn, 'derniere_maj', data.get('derniere_maj', ''))
+        finally:
+            conn.close()
+    elif CONFIG['stockage'] == 'binaire':
+        instantane.sauvegarder(dict(data, stages=en_dicts(data.get('stages', []))), CONFIG['fichier_instantane'])
+    else:
+        ecrire_json(dict(data, stages=en_dicts(data.get('stages', []))))
+
+    oublier_journal(_journal['lu'])
+    _journal['lu'] = 0
+    _journal['offres'] = []
+
+
+def compacter_journal():
+    """
+    Intègre le journal dans la base en une passe.
+    Renvoie le nombre d'offres intégrées.
+    """
+    journal, octets = lire_journal()
+    if not journal:
+        return 0
+    maintenant = datetime.now().strftime("%d %B %Y - %H:%M")
+
+    if CONFIG['stockage'] == 'sqlite':
+        # Seules les lignes du journal sont écrites
+        conn = ouvrir_base()
+        try:
+            stockage_sqlite.enregistrer_stages(conn, journal)
+            stockage_sqlite.ecrire_meta(conn, 'derniere_maj', maintenant)
+        finally:
+            conn.close()
+        oublier_journal(octets)
+    else:
+        data = charger_donnees()
+        data['derniere_maj'] = maintenant
+        sauvegarder_donnees(data)
+    return len(journal)
+
+
+def exporter():
+    """Produit stages_data.json à partir de la base SQLite ou de l'instantané (rien à faire en mode JSON)"""
+    if CONFIG['stockage'] == 'binaire':
+        exporte = instantane.charger(CONFIG['fichier_instantane'])
+        ecrire_json(exporte)
+        # Le JSON exporté n'est pas une modification à la main : l'instantané reste le plus récent
+        os.utime(CONFIG['fichier_instantane'])
+    elif CONFIG['stockage'] == 'sqlite':
+        conn = ouvrir_base()
+        try:
+            exporte = stockage_sqlite.exporter_json(conn, CONFIG['fichier_json'])
+        finally:
+            conn.close()
+        publier(exporte)
+    else:
+        return
+    print(f"✅ {CONFIG['fichier_json']} exporté ({len(exporte['stages'])} offres)")
+
+
+if __name__ == "__main__":
+    # python donnees.py exporter | compacter
+    if sys.argv[1:] == ['exporter']:
+        if CONFIG['stockage'] == 'json':
+            CONFIG['stockage'] = 'sqlite'
+        exporter()
+    elif sys.argv[1:] == ['compacter']:
+        print(f"✅ {compacter_journal()} offres du journal intégrées")
+        exporter()
+    else:
+        print("Usage : python donnees.py exporter | compacter")
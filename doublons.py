@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection des QUASI-doublons entre sites
+La même offre UBS peut apparaître sur jobs.ch, jobup.ch et eFinancialCareers
+avec un titre un peu différent, ou avec "Entreprise non spécifiée".
+
+Méthode :
+    1. le titre normalisé est découpé en morceaux de 3 lettres (shingles)
+    2. une signature MinHash résume cet ensemble (64 valeurs) ; on utilise
+       la variante « une seule permutation » : un seul hachage par morceau
+    3. LSH : la signature est coupée en 16 bandes ; deux offres qui ont une
+       bande identique deviennent candidates. Chercher les candidats ne
+       parcourt que quelques seaux, pas toute l'archive.
+    4. les candidats sont vérifiés (similarité estimée, mêmes nombres dans
+       le titre, entreprises compatibles, lieux compatibles)
+
+Le regroupement est déterministe (ordre d'arrivée) et chaque groupe est
+fusionné en gardant l'offre la plus complète.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from localisation import localiser
+from metriques import compter
+from sources import ENTREPRISE_INCONNUE
+from stage import Stage
+
+BANDES = 16
+LIGNES = 4
+TAILLE_SIGNATURE = BANDES * LIGNES
+SEUIL = 0.7
+TAILLE_SHINGLE = 3
+# Au-delà, un seau correspond à un titre trop générique ("Stage") :
+# il n'accueille plus de nouvelles offres, pour garder un coût constant
+TAILLE_MAX_SEAU = 100
+VIDE = 0xFFFFFFFFFFFFFFFF
+
+# Mentions qui ne changent pas l'offre : (m/w/d), (h/f), 80-100%, ...
+BRUIT_TITRE = re.compile(r'\(?\b[mfwhd](?:\s*/\s*[mfwhd]){1,2}\b\)?|\d+\s*(?:-\s*\d+\s*)?%')
+MOTS_VIDES = {'de', 'des', 'du', 'd', 'en', 'la', 'le', 'les', 'l', 'et', 'a', 'au',
+              'im', 'in', 'und', 'der', 'die', 'das', 'fur', 'the', 'of', 'and', 'for'}
+FORMES_JURIDIQUES = {'sa', 'ag', 'gmbh', 'ltd', 'llc', 'inc', 'plc', 'co', 'group', 'groupe', 'holding', 'the'}
+
+# Valeurs par défaut des scrapers (n'apportent aucune information)
+VALEURS_PAR_DEFAUT = {
+    "company": {ENTREPRISE_INCONNUE, ''},
+    "location": {'Switzerland', 'Suisse', ''},
+    "duration": {'6 mois', ''},
+    "startDate": {'Variable', ''},
+}
+
+
+def sans_accents(texte):
+    return unicodedata.normalize('NFKD', texte).encode('ascii', 'ignore').decode('ascii')
+
+
+def normaliser_titre(titre):
+    """Minuscules, sans accents, sans (m/w/d), pourcentages, ponctuation ni mots vides"""
+    texte = BRUIT_TITRE.sub(' ', sans_accents(titre).lower())
+    return ' '.join(mot for mot in re.findall(r'[a-z0-9]+', texte) if mot not in MOTS_VIDES)
+
+
+def normaliser_entreprise(company):
+    """Mots significatifs du nom d'entreprise (None si inconnue)"""
+    if company.strip() in VALEURS_PAR_DEFAUT['company']:
+        return None
+    mots = re.findall(r'[a-z0-9]+', sans_accents(company).lower())
+    return frozenset(mot for mot in mots if mot not in FORMES_JURIDIQUES) or None
+
+
+def entreprises_compatibles(a, b):
+    """Même entreprise, l'une incluse dans l'autre, ou au moins une inconnue"""
+    if a is None or b is None:
+        return True
+    return a <= b or b <= a
+
+
+def normaliser_lieu(location):
+    """Lieu suisse reconnu (localisation.Lieu), None si inconnu ou seulement « Suisse »"""
+    if (location or '').strip() in VALEURS_PAR_DEFAUT['location']:
+        return None
+    return localiser(location)
+
+
+def lieux_compatibles(a, b):
+    """
+    Même ville, ou même canton si l'une n'a que le canton, ou au moins un lieu inconnu
+    (la même offre à Vevey et à Lausanne, ce sont deux offres)
+    """
+    if a is None or b is None:
+        return True
+    if a.ville and b.ville:
+        return a.ville == b.ville
+    return a.canton == b.canton
+
+
+def lieu_precis(a, b):
+    """Le plus précis de deux lieux compatibles (la ville plutôt que le canton)"""
+    if a is None or (b is not None and b.ville and not a.ville):
+        return b
+    return a
+
+
+def shingles(texte):
+    """Morceaux de TAILLE_SHINGLE caractères"""
+    if len(texte) <= TAILLE_SHINGLE:
+        return {texte}
+    return {texte[i:i + TAILLE_SHINGLE] for i in range(len(texte) - TAILLE_SHINGLE + 1)}
+
+
+def signature(texte):
+    """
+    Signature MinHash à une permutation : chaque morceau est haché une fois,
+    le hachage choisit une case et on garde le minimum par case.
+    Les cases vides empruntent la valeur de la case suivante (densification).
+    """
+    cases = [VIDE] * TAILLE_SIGNATURE
+    for morceau in shingles(texte):
+        h = int.from_bytes(hashlib.blake2b(morceau.encode('utf-8'), digest_size=8).digest(), 'big')
+        case = h % TAILLE_SIGNATURE
+        valeur = h // TAILLE_SIGNATURE
+        if valeur < cases[case]:
+            cases[case] = valeur
+    if all(v == VIDE for v in cases):
+        return tuple(cases)
+    for i in range(TAILLE_SIGNATURE):
+        j = i
+        decalage = 0
+        while cases[j] == VIDE:
+            j = (j + 1) % TAILLE_SIGNATURE
+            decalage += 1
+        if decalage:
+            # Le décalage distingue une valeur empruntée d'une vraie valeur
+            cases[i] = (cases[j] + decalage * 0x9E3779B97F4A7C15) & (VIDE - 1)
+    return tuple(cases)
+
+
+def similarite(sig_a, sig_b):
+    """Estimation de la similarité de Jaccard (part des cases égales)"""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / TAILLE_SIGNATURE
+
+
+def score_richesse(stage):
+    """Nombre de champs renseignés avec autre chose qu'une valeur par défaut"""
+    score = 0
+    for champ, valeur in stage.items():
+        if isinstance(valeur, str) and valeur.strip() and valeur.strip() not in VALEURS_PAR_DEFAUT.get(champ, ()):
+            score += 1
+    return score
+
+
+class IndexQuasiDoublons:
+    """
+    Index LSH incrémental : ajouter une offre renvoie le numéro de son groupe.
+    Chaque ajout ne consulte que BANDES seaux.
+    """
+
+    def __init__(self, seuil=SEUIL):
+        self.seuil = seuil
+        self.seaux = {}           # (bande, valeurs) -> numéros d'offres
+        self.signatures = []
+        self.entreprises = []
+        self.nombres = []         # nombres du titre (année, référence...) : doivent être égaux
+        self.parents = []         # union-find : numéro -> parent
+        self.entreprise_groupe = {}  # racine -> entreprise connue du groupe
+        self.lieux = []
+        self.lieu_groupe = {}     # racine -> lieu le plus précis du groupe
+
+    def racine(self, numero):
+        while self.parents[numero] != numero:
+            self.parents[numero] = self.parents[self.parents[numero]]
+            numero = self.parents[numero]
+        return numero
+
+    def unir(self, a, b):
+        """
+        Réunit les groupes de a et b, sauf si leurs entreprises ou leurs lieux
+        diffèrent (une offre sans entreprise ne doit pas relier UBS et Credit
+        Suisse, ni une offre sans lieu relier Vevey et Lausanne)
+        """
+        ra, rb = self.racine(a), self.racine(b)
+        if ra == rb:
+            return
+        ea, eb = self.entreprise_groupe.get(ra), self.entreprise_groupe.get(rb)
+        la, lb = self.lieu_groupe.get(ra), self.lieu_groupe.get(rb)
+        if not entreprises_compatibles(ea, eb) or not lieux_compatibles(la, lb):
+            return
+        # La plus petite racine (offre la plus ancienne) représente le groupe
+        petite, grande = min(ra, rb), max(ra, rb)
+        self.parents[grande] = petite
+        del self.entreprise_groupe[grande]
+        self.entreprise_groupe[petite] = ea | eb if ea and eb else ea or eb
+        del self.lieu_groupe[grande]
+        self.lieu_groupe[petite] = lieu_precis(la, lb)
+
+    def ajouter(self, stage):
+        """Ajoute une offre et renvoie le numéro de son groupe (déterministe)"""
+        numero = len(self.signatures)
+        titre = normaliser_titre(stage['title'])
+        sig = signature(titre)
+        nombres = frozenset(re.findall(r'\d+', titre))
+        entreprise = normaliser_entreprise(stage['company'])
+        lieu = normaliser_lieu(stage.get('location'))
+        self.signatures.append(sig)
+        self.nombres.append(nombres)
+        self.entreprises.append(entreprise)
+        self.lieux.append(lieu)
+        self.parents.append(numero)
+        self.entreprise_groupe[numero] = entreprise
+        self.lieu_groupe[numero] = lieu
+
+        candidats = set()
+        for bande in range(BANDES):
+            cle = (bande, sig[bande * LIGNES:(bande + 1) * LIGNES])
+            seau = self.seaux.setdefault(cle, [])
+            candidats.update(seau)
+            if len(seau) < TAILLE_MAX_SEAU:
+                seau.append(numero)
+
+        for autre in sorted(candidats):
+            if (nombres == self.nombres[autre]
+                    and entreprises_compatibles(entreprise, self.entreprises[autre])
+                    and lieux_compatibles(lieu, self.lieux[autre])
+                    and self.racine(autre) != self.racine(numero)
+                    and similarite(sig, self.signatures[autre]) >= self.seuil):
+                self.unir(numero, autre)
+        return self.racine(numero)
+
+    def groupes(self):
+        """Listes de numéros d'offres, dans l'ordre de première apparition"""
+        par_racine = {}
+        for numero in range(len(self.parents)):
+            par_racine.setdefault(self.racine(numero), []).append(numero)
+        return list(par_racine.values())
+
+
+def fusionner_groupe(stages):
+    """
+    Garde l'offre la plus complète (la première en cas d'égalité)
+    et complète ses valeurs par défaut avec celles des autres
+    """
+    meilleure = max(stages, key=score_richesse)
+    fusion = Stage(**meilleure)
+    for champ, defauts in VALEURS_PAR_DEFAUT.items():
+        if fusion.get(champ, '') in defauts:
+            for autre in stages:
+                if autre.get(champ, '') not in defauts:
+                    fusion[champ] = autre[champ]
+                    break
+    return fusion
+
+
+def regrouper(stages, seuil=SEUIL):
+    """Groupes de quasi-doublons (listes d'indices dans stages)"""
+    index = IndexQuasiDoublons(seuil)
+    for stage in stages:
+        index.ajouter(stage)
+    return index.groupes()
+
+
+def fusionner_quasi_doublons(stages, seuil=SEUIL):
+    """Une offre par groupe de quasi-doublons, à la place de la première du groupe"""
+    groupes = regrouper(stages, seuil)
+    compter('quasi_doublons_fusionnes', len(stages) - len(groupes))
+    return [fusionner_groupe([stages[i] for i in groupe]) if len(groupe) > 1 else stages[groupe[0]]
+            for groupe in groupes]
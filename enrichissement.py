@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enrichissement des offres par leur page de détail
+Les pages de résultats ne donnent ni la durée ni la date de début : chaque
+nouvelle offre reçoit donc "6 mois" et "Variable". Ici, la page de l'offre
+est lue pour y trouver la durée ("stage de 6 mois", "Dauer: 12 Monate"),
+la date de début ("Start: September 2026", "dès que possible") et un court
+extrait de la description, gardé dans le champ "description" de l'offre
+(il sert aussi à préciser le domaine, sauf pour les offres saisies à la main).
+
+Les pages sont lues par un nombre limité de travailleurs, avec le même
+débit par site que le crawl (limiteur.py). Le résultat est gardé par offre
+(identifiant de son lien canonique) dans details_offres.json : une page de
+détail n'est lue qu'une fois par offre, pas à chaque passage.
+
+Usage : python enrichissement.py   (complète les offres de la base)
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+
+from classification import classer
+from crawl import requeter
+from limiteur import Limiteurs
+from metriques import etiquettes
+from parseurs import analyser_html
+from sources import saisie_manuelle, source_du_lien, source_offre
+from urls import identifiant_offre
+
+FICHIER_DETAILS = 'details_offres.json'
+
+# Pages de détail lues en même temps (tous sites), puis par site
+TRAVAILLEURS = 6
+REQUETES_PAR_HOTE = 2
+
+TAILLE_EXTRAIT = 300
+# Texte lu dans une page (le début suffit : titre, chapeau, conditions)
+TAILLE_TEXTE = 20000
+
+MOIS = {
+    "Janvier": ['janvier', 'january', 'januar', 'jan'],
+    "Février": ['février', 'fevrier', 'february', 'februar', 'feb', 'fév'],
+    "Mars": ['mars', 'march', 'märz', 'maerz', 'mär', 'mar'],
+    "Avril": ['avril', 'april', 'apr', 'avr'],
+    "Mai": ['mai', 'may'],
+    "Juin": ['juin', 'june', 'juni', 'jun'],
+    "Juillet": ['juillet', 'july', 'juli', 'jul', 'juil'],
+    "Août": ['août', 'aout', 'august', 'aug'],
+    "Septembre": ['septembre', 'september', 'sept', 'sep'],
+    "Octobre": ['octobre', 'october', 'oktober', 'oct', 'okt'],
+    "Novembre": ['novembre', 'november', 'nov'],
+    "Décembre": ['décembre', 'decembre', 'december', 'dezember', 'dec', 'dez', 'déc'],
+}
+NOM_MOIS = {variante: nom for nom, variantes in MOIS.items() for variante in variantes}
+NUMERO_MOIS = list(MOIS)
+
+MOTS_MOIS = r'(?:mois|months?|monate?n?|mesi)'
+MOTIF_MOIS = '|'.join(sorted(map(re.escape, NOM_MOIS), key=len, reverse=True))
+
+DUREE_ANNONCEE = re.compile(
+    r'\b(?:durée|duree|duration|dauer|durata|période|period|pour|for|für|von|de|of)\W{0,3}(?:\w+\W+){0,3}?'
+    rf'(\d{{1,2}})\s*(?:(?:-|–|à|a|to|bis|al)\s*(\d{{1,2}})\s*)?{MOTS_MOIS}\b',
+    re.IGNORECASE)
+DUREE_ACCOLEE = re.compile(
+    rf'\b(\d{{1,2}})\s*(?:(?:-|–|à|to|bis)\s*(\d{{1,2}})\s*)?-?\s*{MOTS_MOIS}\w*\s+'
+    r'(?:internship|stage|praktikum|traineeship|trainee|tirocinio)',
+    re.IGNORECASE)
+DUREE_APRES_STAGE = re.compile(
+    r'\b(?:internship|stage|praktikum|traineeship|tirocinio)\W{1,3}'
+    rf'(\d{{1,2}})\s*(?:(?:-|–|à|to|bis)\s*(\d{{1,2}})\s*)?{MOTS_MOIS}\b',
+    re.IGNORECASE)
+
+MOTS_DEBUT = (r'(?:date de début|début|debut|start(?:ing)?(?: date)?|beginn|eintritt(?:sdatum)?|ab|dès|des|'
+              r'from|à partir d[eu]|a partir d[eu]|entrée en fonction|entree en fonction|per|inizio)')
+DEBUT_IMMEDIAT = re.compile(
+    r'\b(?:dès que possible|des que possible|de suite|tout de suite|asap|as soon as possible|'
+    r'immediately|immediate start|immédiatement|sofort|per sofort|ab sofort|subito)\b',
+    re.IGNORECASE)
+DEBUT_MOIS = re.compile(
+    rf'\b{MOTS_DEBUT}\W{{0,3}}(?:(?:le|on|am|in|en|du|im)\s+)?(?:\d{{1,2}}(?:er|st|nd|rd|th|\.)?\s*)?'
+    rf'({MOTIF_MOIS})\.?\s+(20\d\d)\b',
+    re.IGNORECASE)
+DEBUT_DATE = re.compile(
+    rf'\b{MOTS_DEBUT}\W{{0,3}}(?:(?:le|on|am|du)\s+)?\d{{1,2}}[./](\d{{1,2}})[./](20\d\d)\b',
+    re.IGNORECASE)
+
+
+def lire_details(chemin=FICHIER_DETAILS):
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def ecrire_details(details, chemin=FICHIER_DETAILS):
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(details, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporaire, chemin)
+
+
+def trouver_duree(texte):
+    """"6 mois", "6-12 mois" ou None"""
+    for motif in (DUREE_ANNONCEE, DUREE_ACCOLEE, DUREE_APRES_STAGE):
+        for trouve in motif.finditer(texte):
+            debut, fin = int(trouve.group(1)), trouve.group(2) and int(trouve.group(2))
+            if not 1 <= debut <= 24 or (fin and not debut < fin <= 24):
+                continue
+            return f"{debut}-{fin} mois" if fin else f"{debut} mois"
+    return None
+
+
+def trouver_debut(texte):
+    """"Septembre 2026", "Immédiat" ou None"""
+    trouve = DEBUT_MOIS.search(texte)
+    if trouve:
+        return f"{NOM_MOIS[trouve.group(1).lower()]} {trouve.group(2)}"
+    trouve = DEBUT_DATE.search(texte)
+    if trouve and 1 <= int(trouve.group(1)) <= 12:
+        return f"{NUMERO_MOIS[int(trouve.group(1)) - 1]} {trouve.group(2)}"
+    if DEBUT_IMMEDIAT.search(texte):
+        return "Immédiat"
+    return None
+
+
+def couper(texte, taille=TAILLE_EXTRAIT):
+    texte = ' '.join(texte.split())
+    if len(texte) <= taille:
+        return texte
+    return texte[:taille].rsplit(' ', 1)[0] + '…'
+
+
+def analyser_detail(contenu):
+    """{"duration", "startDate", "extrait"} trouvés dans une page de détail (champs absents sinon)"""
+    soup = analyser_html(contenu)
+    for balise in soup(['script', 'style', 'noscript', 'nav', 'header', 'footer']):
+        balise.decompose()
+
+    extrait = None
+    for attributs in ({'name': 'description'}, {'property': 'og:description'}):
+        meta = soup.find('meta', attrs=attributs)
+        if meta is not None and meta.get('content', '').strip():
+            extrait = meta['content']
+            break
+    if extrait is None:
+        paragraphe = next((p for p in soup.find_all('p') if len(p.get_text(strip=True)) >= 80), None)
+        if paragraphe is not None:
+            extrait = paragraphe.get_text(' ', strip=True)
+
+    texte = soup.get_text(' ', strip=True)[:TAILLE_TEXTE]
+    details = {}
+    duree = trouver_duree(texte)
+    if duree:
+        details['duration'] = duree
+    debut = trouver_debut(texte)
+    if debut:
+        details['startDate'] = debut
+    if extrait:
+        details['extrait'] = couper(extrait)
+    return details
+
+
+CHAMPS_ENRICHIS = ('duration', 'startDate', 'domain', 'description')
+
+
+def appliquer(stage, details):
+    """Complète l'offre ; renvoie True si elle a changé"""
+    avant = tuple(stage.get(champ) for champ in CHAMPS_ENRICHIS)
+    for champ in ('duration', 'startDate'):
+        if details.get(champ):
+            stage[champ] = details[champ]
+    if details.get('extrait'):
+        stage['description'] = details['extrait']
+        if not saisie_manuelle(stage):
+            stage['domain'] = classer(stage.get('title', ''), details['extrait'], defaut=stage.get('domain')).domaine
+    return tuple(stage.get(champ) for champ in CHAMPS_ENRICHIS) != avant
+
+
+def a_enrichir(stages):
+    """
+    {identifiant: lien} des offres qui ont une page à elles
+    (un lien partagé par plusieurs offres est celui d'une page de résultats)
+    """
+    liens = [stage.get('link', '') for stage in stages]
+    partages = Counter(liens)
+    return {identifiant_offre(lien): lien for lien in liens
+            if lien.startswith(('http://', 'https://')) and partages[lien] == 1}
+
+
+async def lire_pages(liens, travailleurs=TRAVAILLEURS, sources=None):
+    """
+    {identifiant: détails} pour chaque lien, lus par un nombre borné de
+    travailleurs ; chaque site garde sa propre limite de requêtes.
+    sources : {lien: nom du site dans le registre}, pour les étiquettes des mesures
+    (les mêmes que celles du crawl) ; à défaut, le site est retrouvé par son hôte.
+    """
+    sources = sources or {}
+    file = asyncio.Queue()
+    for identifiant, lien in liens.items():
+        file.put_nowait((identifiant, lien))
+    limiteurs = Limiteurs(REQUETES_PAR_HOTE)
+    resultats = {}
+
+    async def travailler():
+        while True:
+            try:
+                identifiant, lien = file.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                # Pas de cache HTTP : le résultat est gardé dans details_offres.json
+                with etiquettes(source=sources.get(lien) or source_du_lien(lien), page='detail'):
+                    response = await requeter(lien, limiteurs.pour(lien), utiliser_cache=False)
+            except Exception:
+                # Réseau ou site coupé : on réessaiera au prochain passage
+                continue
+            if response.status_code == 200:
+                resultats[identifiant] = await asyncio.to_thread(analyser_detail, response.content)
+            elif response.status_code in (404, 410):
+                # Offre retirée : rien à lire, inutile de revenir
+                resultats[identifiant] = {}
+
+    try:
+        await asyncio.gather(*(travailler() for _ in range(min(travailleurs, len(liens)))))
+    finally:
+        limiteurs.sauvegarder()
+    return resultats
+
+
+def enrichir(stages, chemin=FICHIER_DETAILS):
+    """
+    Complète durée, début, domaine et description des offres (en place) ; seules les pages
+    jamais lues sont téléchargées. Renvoie le nombre d'offres complétées.
+    """
+    details = lire_details(chemin)
+    liens = a_enrichir(stages)
+    manquants = {identifiant: lien for identifiant, lien in liens.items() if identifiant not in details}
+    if manquants:
+        debut = time.monotonic()
+        sources = {stage.get('link'): source_offre(stage) for stage in stages}
+        nouveaux = asyncio.run(lire_pages(manquants, sources=sources))
+        details.update(nouveaux)
+        ecrire_details(details, chemin)
+        print(f"  📄 {len(nouveaux)}/{len(manquants)} pages de détail lues en {time.monotonic() - debut:.1f} s")
+
+    completees = 0
+    for stage in stages:
+        lien = stage.get('link', '')
+        if lien.startswith(('http://', 'https://')):
+            identifiant = identifiant_offre(lien)
+            if identifiant in liens and identifiant in details and appliquer(stage, details[identifiant]):
+                completees += 1
+    return completees
+
+
+if __name__ == "__main__":
+    from donnees import charger_donnees, exporter, sauvegarder_donnees
+
+    data = charger_donnees()
+    nombre = enrichir(data.get('stages', []))
+    if nombre:
+        sauvegarder_donnees(data)
+        exporter()
+    print(f"✅ {nombre} offres complétées")
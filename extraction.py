@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur d'extraction commun
+Transforme une page de résultats en offres à partir de la description
+d'un site (voir sources.py)
+"""
+
+from classification import classer
+from index_dom import IndexDOM, correspond_fiche, fiche
+from localisation import nom_lieu
+from metriques import compter
+from parseurs import analyser_html
+from sources import ENTREPRISE_INCONNUE
+from stage import Stage
+from urls import canoniser
+
+
+def correspond(balise, selecteur):
+    """Vérifie si une balise respecte un sélecteur"""
+    if not hasattr(balise, 'attrs'):
+        return False
+    return correspond_fiche(fiche(balise), selecteur)
+
+
+def liste_selecteurs(selecteurs):
+    """Un champ peut avoir un sélecteur ou une liste de sélecteurs"""
+    return [selecteurs] if isinstance(selecteurs, dict) else list(selecteurs)
+
+
+def selecteurs_source(source):
+    """Tous les sélecteurs d'un site (pour construire l'index en une passe)"""
+    selecteurs = [source['cartes']]
+    for champ in ('titre', 'entreprise', 'lieu', 'lien'):
+        if champ in source:
+            for selecteur in liste_selecteurs(source[champ]):
+                selecteurs.append(selecteur)
+                if 'dans' in selecteur:
+                    selecteurs.append(selecteur['dans'])
+    return selecteurs
+
+
+def chercher(carte, selecteurs, index):
+    """Premier élément qui respecte un des sélecteurs (essayés dans l'ordre)"""
+    for selecteur in liste_selecteurs(selecteurs):
+        portee = selecteur.get('portee', 'carte')
+        if portee == 'soi':
+            return carte
+        racine = carte.parent if portee == 'parent' else carte
+        if racine is not None and 'dans' in selecteur:
+            racine = index.premier_dans(racine, selecteur['dans'])
+        if racine is None:
+            continue
+        element = index.premier_dans(racine, selecteur)
+        if element is not None:
+            return element
+    return None
+
+
+def trouver_cartes(index, source):
+    """Toutes les cartes d'offres de la page, dans l'ordre du document"""
+    return index.tous(source['cartes'])
+
+
+def premieres_cartes(index, cartes, nombre):
+    """
+    Les cartes jusqu'à la nombre-ième carte extérieure comprise (une carte
+    dans une autre, par exemple le titre d'un sélecteur de classe partielle,
+    ne compte pas : nombre est le nombre d'offres d'une page du site)
+    """
+    if not nombre:
+        return cartes
+    exterieures = 0
+    fin = -1
+    for rang, carte in enumerate(cartes):
+        debut, fin_carte = index.plage(carte)
+        if debut > fin:
+            exterieures += 1
+            if exterieures > nombre:
+                return cartes[:rang]
+            fin = fin_carte
+    return cartes
+
+
+def lien_absolu(source, href):
+    """Lien complet et canonique (adresse du site ajoutée, paramètres de suivi retirés)"""
+    return canoniser(href, source['base_lien'])
+
+
+def extraire_carte(carte, source, url, index, connus=None):
+    """
+    Construit une offre à partir d'une carte (None si la carte est rejetée).
+    Si connus est donné (voir urls.IndexIdentifiants), une carte dont
+    l'offre est déjà connue est ignorée avant le reste de l'extraction.
+    """
+    lien_elem = chercher(carte, source['lien'], index)
+    if lien_elem is not None and lien_elem.get('href'):
+        link = lien_absolu(source, lien_elem['href'])
+        if connus is not None and link in connus:
+            return None
+    else:
+        link = url
+
+    titre_elem = chercher(carte, source['titre'], index)
+    if titre_elem is None:
+        return None
+    title = titre_elem.get_text(' ', strip=True)
+
+    company_elem = chercher(carte, source['entreprise'], index) if 'entreprise' in source else None
+    if company_elem is None and 'entreprise' in source['champs_obligatoires']:
+        return None
+    company = company_elem.get_text(' ', strip=True) if company_elem else ENTREPRISE_INCONNUE
+
+    # Lieu ramené au nom français de la ville ("Genf", "Geneva" -> "Genève")
+    location = source['lieu_defaut']
+    if 'lieu' in source:
+        lieu_elem = chercher(carte, source['lieu'], index)
+        if lieu_elem is not None:
+            texte_lieu = lieu_elem.get_text(' ', strip=True)
+            location = nom_lieu(texte_lieu, defaut=texte_lieu)
+    elif source['lieu_dans_carte']:
+        # Tout le texte de la carte est lu une seule fois par l'automate
+        location = nom_lieu(' | '.join(carte.stripped_strings), defaut=location)
+
+    if len(title) < source['longueur_titre_min']:
+        return None
+    # Domaine et niveau d'après le titre (une passe, tous les mots-clés à la fois)
+    classement = classer(title, defaut=source['domaine'])
+    if source['niveaux'] and classement.niveau not in source['niveaux']:
+        return None
+
+    return Stage(
+        company=company,
+        title=title,
+        domain=classement.domaine,
+        location=location,
+        duration=source['duree'],
+        startDate=source['debut'],
+        link=link,
+    )
+
+
+def iterer_offres(contenu, url, source, connus=None):
+    """Analyse une page de résultats et rend les offres une par une (sauf les connues)"""
+    soup = analyser_html(contenu)
+    # Un seul parcours du document pour tous les sélecteurs du site
+    index = IndexDOM(soup, selecteurs_source(source))
+    cartes = premieres_cartes(index, trouver_cartes(index, source), source['max_cartes'])
+    gardees = 0
+    try:
+        for carte in cartes:
+            try:
+                stage = extraire_carte(carte, source, url, index, connus)
+            except Exception:
+                continue
+            if stage:
+                gardees += 1
+                yield stage
+    finally:
+        compter('cartes_trouvees', len(cartes))
+        compter('offres_gardees', gardees)
+
+
+def extraire_offres(contenu, url, source, connus=None):
+    """Analyse une page de résultats et renvoie la liste des offres"""
+    return list(iterer_offres(contenu, url, source, connus))
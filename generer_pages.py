@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Génère des pages HTML statiques et paginées à partir de la base d'offres
+    site/index.html                      page 1 de toutes les offres + compteurs
+    site/page-2.html, ...                pages suivantes
+    site/domaine/<domaine>/index.html    offres d'un domaine (puis page-2.html, ...)
+    site/ville/<ville>/index.html        offres d'une ville
+
+La première page s'affiche sans télécharger stages_data.json.
+La génération est incrémentale : une page n'est réécrite que si ses
+offres ont changé (empreintes gardées dans site/.pages.json).
+
+Usage : python generer_pages.py
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import unicodedata
+
+from donnees import charger_donnees
+from stage import en_dicts
+
+DOSSIER_SITE = 'site'
+OFFRES_PAR_PAGE = 50
+FICHIER_EMPREINTES = '.pages.json'
+# À changer quand le gabarit HTML change (toutes les pages seront refaites)
+VERSION_GABARIT = 1
+
+STYLE = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+       background: linear-gradient(135deg, #d4c5a0 0%, #b8a97d 100%); min-height: 100vh; padding: 20px; }
+.container { max-width: 1400px; margin: 0 auto; background-color: rgba(255, 255, 255, 0.95);
+             border-radius: 12px; padding: 30px; box-shadow: 0 8px 32px rgba(0, 0, 0, 0.15); }
+h1 { color: #5a4a3a; font-size: 2em; font-weight: 300; letter-spacing: 2px; margin-bottom: 10px; }
+.header { text-align: center; margin-bottom: 20px; padding-bottom: 15px; border-bottom: 3px solid #9b8b6f; }
+.last-update, .count { color: #7a6a5a; font-size: 0.9em; }
+.facets { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 15px;
+          margin-bottom: 20px; padding: 15px; background-color: #f5f0e8; border-radius: 8px; }
+.facets h2 { color: #5a4a3a; font-size: 1em; margin-bottom: 5px; }
+.facets a { color: #5a4a3a; }
+table { width: 100%; border-collapse: collapse; background-color: white; box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1); }
+thead { background: linear-gradient(135deg, #9b8b6f 0%, #7a6a5a 100%); }
+thead th { color: white; padding: 15px; text-align: left; font-weight: 600; }
+tbody tr { border-bottom: 1px solid #e0d5c5; }
+tbody tr:nth-child(even) { background-color: #f9f7f3; }
+tbody td { padding: 15px; color: #4a4a4a; }
+.duration-badge { display: inline-block; padding: 4px 10px; background-color: #e8dcc8; color: #5a4a3a;
+                  border-radius: 12px; font-size: 0.85em; font-weight: 600; }
+.link-cell a { display: inline-block; padding: 8px 16px; color: white; text-decoration: none; border-radius: 4px;
+               background: linear-gradient(135deg, #9b8b6f 0%, #7a6a5a 100%); }
+.pagination { text-align: center; margin-top: 20px; }
+.pagination a, .pagination span { margin: 0 4px; color: #5a4a3a; }
+"""
+
+
+def slug(texte):
+    """Nom de dossier sans accents ni espaces ('Genève' -> 'geneve')"""
+    texte = unicodedata.normalize('NFKD', texte).encode('ascii', 'ignore').decode('ascii')
+    texte = re.sub(r'[^a-z0-9]+', '-', texte.lower()).strip('-')
+    return texte or 'autre'
+
+
+def lien_sur(url):
+    """Seuls les liens http(s) sont gardés"""
+    return url if url.startswith(('http://', 'https://')) else '#'
+
+
+def nom_page(numero):
+    """Fichier de la page n (la première s'appelle index.html)"""
+    return 'index.html' if numero == 1 else f'page-{numero}.html'
+
+
+def rendre_ligne(stage):
+    """Une ligne du tableau (tout le texte est échappé)"""
+    e = html.escape
+    return (
+        "<tr>"
+        f"<td><strong>{e(stage.get('company', ''))}</strong></td>"
+        f"<td>{e(stage.get('title', ''))}</td>"
+        f"<td>{e(stage.get('domain', ''))}</td>"
+        f"<td>{e(stage.get('location', ''))}</td>"
+        f"<td><span class=\"duration-badge\">{e(stage.get('duration', ''))}</span></td>"
+        f"<td>{e(stage.get('startDate', ''))}</td>"
+        f"<td class=\"link-cell\"><a href=\"{e(lien_sur(stage.get('link', '')))}\" target=\"_blank\" rel=\"noopener\">Voir l'offre →</a></td>"
+        "</tr>"
+    )
+
+
+def rendre_pagination(numero, nb_pages):
+    """Liens vers les autres pages du même groupe"""
+    if nb_pages <= 1:
+        return ""
+    liens = []
+    for n in range(1, nb_pages + 1):
+        if n == numero:
+            liens.append(f"<span>{n}</span>")
+        else:
+            liens.append(f"<a href=\"{nom_page(n)}\">{n}</a>")
+    return f"<div class=\"pagination\">{' '.join(liens)}</div>"
+
+
+def rendre_facettes(facettes, racine):
+    """Listes des domaines et des villes avec leur nombre d'offres"""
+    blocs = []
+    for titre, dossier, compteurs in (("Domaines", "domaine", facettes['domaines']),
+                                      ("Villes", "ville", facettes['villes'])):
+        liens = ''.join(
+            f"<li><a href=\"{racine}{dossier}/{slug(nom)}/index.html\">{html.escape(nom)}</a> ({nombre})</li>"
+            for nom, nombre in compteurs
+        )
+        blocs.append(f"<div><h2>{titre}</h2><ul>{liens}</ul></div>")
+    return f"<div class=\"facets\">{''.join(blocs)}</div>"
+
+
+def rendre_page(titre, offres, numero, nb_pages, total, racine, entete=""):
+    """Une page complète (racine = chemin relatif vers site/)"""
+    lignes = ''.join(rendre_ligne(stage) for stage in offres)
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(titre)} - Recherche Stage Suisse 2026</title>
+<link rel="stylesheet" href="{racine}style.css">
+</head>
+<body>
+<div class="container">
+<div class="header">
+<h1>{html.escape(titre)}</h1>
+<p class="count">{total} stages disponibles · page {numero}/{nb_pages} · <a href="{racine}index.html">toutes les offres</a></p>
+</div>
+{entete}
+<table>
+<thead><tr><th>Entreprise</th><th>Poste</th><th>Domaine</th><th>Localisation</th><th>Durée</th><th>Début</th><th>Lien</th></tr></thead>
+<tbody>{lignes}</tbody>
+</table>
+{rendre_pagination(numero, nb_pages)}
+</div>
+</body>
+</html>
+"""
+
+
+def calculer_facettes(stages):
+    """Compteurs par domaine et par ville, du plus grand au plus petit"""
+    domaines = {}
+    villes = {}
+    for stage in stages:
+        domaine = stage.get('domain') or 'Non spécifié'
+        ville = stage.get('location') or 'Non spécifié'
+        domaines[domaine] = domaines.get(domaine, 0) + 1
+        villes[ville] = villes.get(ville, 0) + 1
+    trier = lambda compteurs: sorted(compteurs.items(), key=lambda x: (-x[1], x[0]))
+    return {"domaines": trier(domaines), "villes": trier(villes)}
+
+
+def lister_pages(data):
+    """
+    Toutes les pages à produire : (chemin, empreinte, fonction de rendu).
+    L'empreinte ne dépend que de ce que la page affiche.
+    """
+    stages = data.get('stages', [])
+    facettes = calculer_facettes(stages)
+
+    groupes = [("", "Recherche Stage", stages, True)]
+    for dossier, champ in (("domaine", 'domain'), ("ville", 'location')):
+        # Un seul passage sur les offres ; deux noms au même slug partagent le dossier
+        par_slug = {}
+        for stage in stages:
+            nom = stage.get(champ) or 'Non spécifié'
+            par_slug.setdefault(slug(nom), (nom, []))[1].append(stage)
+        for cle, (nom, offres) in sorted(par_slug.items()):
+            groupes.append((f"{dossier}/{cle}/", nom, offres, False))
+
+    pages = []
+    for prefixe, titre, offres, principal in groupes:
+        racine = '../' * prefixe.count('/')
+        nb_pages = max(1, -(-len(offres) // OFFRES_PAR_PAGE))
+        for numero in range(1, nb_pages + 1):
+            morceau = offres[(numero - 1) * OFFRES_PAR_PAGE:numero * OFFRES_PAR_PAGE]
+            # Seule la première page générale affiche date et compteurs
+            avec_entete = principal and numero == 1
+            contenu_empreinte = [VERSION_GABARIT, titre, numero, nb_pages, len(offres), en_dicts(morceau)]
+            if avec_entete:
+                contenu_empreinte += [data.get('derniere_maj', ''), facettes]
+            empreinte = hashlib.sha1(
+                json.dumps(contenu_empreinte, ensure_ascii=False, sort_keys=True).encode('utf-8')
+            ).hexdigest()
+
+            def rendu(titre=titre, morceau=morceau, numero=numero, nb_pages=nb_pages,
+                      total=len(offres), racine=racine, avec_entete=avec_entete):
+                entete = ""
+                if avec_entete:
+                    entete = (f"<p class=\"last-update\">Dernière mise à jour : {html.escape(data.get('derniere_maj', ''))}</p>"
+                              + rendre_facettes(facettes, racine))
+                return rendre_page(titre, morceau, numero, nb_pages, total, racine, entete)
+
+            pages.append((prefixe + nom_page(numero), empreinte, rendu))
+    return pages
+
+
+def generer_site(data, dossier=DOSSIER_SITE):
+    """
+    Écrit les pages qui ont changé et supprime celles qui n'existent plus.
+    Renvoie (pages écrites, pages inchangées, pages supprimées).
+    """
+    chemin_empreintes = os.path.join(dossier, FICHIER_EMPREINTES)
+    try:
+        with open(chemin_empreintes, 'r', encoding='utf-8') as f:
+            anciennes = json.load(f)
+    except (FileNotFoundError, ValueError):
+        anciennes = {}
+
+    os.makedirs(dossier, exist_ok=True)
+    with open(os.path.join(dossier, 'style.css'), 'w', encoding='utf-8') as f:
+        f.write(STYLE)
+
+    nouvelles = {}
+    ecrites = 0
+    for chemin, empreinte, rendu in lister_pages(data):
+        nouvelles[chemin] = empreinte
+        fichier = os.path.join(dossier, chemin)
+        if anciennes.get(chemin) == empreinte and os.path.exists(fichier):
+            continue
+        os.makedirs(os.path.dirname(fichier), exist_ok=True)
+        with open(fichier, 'w', encoding='utf-8') as f:
+            f.write(rendu())
+        ecrites += 1
+
+    supprimees = 0
+    for chemin in set(anciennes) - set(nouvelles):
+        try:
+            os.remove(os.path.join(dossier, chemin))
+            supprimees += 1
+        except FileNotFoundError:
+            pass
+
+    with open(chemin_empreintes, 'w', encoding='utf-8') as f:
+        json.dump(nouvelles, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+    return ecrites, len(nouvelles) - ecrites, supprimees
+
+
+if __name__ == "__main__":
+    ecrites, inchangees, supprimees = generer_site(charger_donnees())
+    print(f"✅ Site généré dans {DOSSIER_SITE}/ : {ecrites} pages écrites, "
+          f"{inchangees} inchangées, {supprimees} supprimées")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index d'un document HTML construit en UN SEUL parcours
+Chaque balise reçoit un numéro (ordre du document) et on note où finit
+son sous-arbre. Pour chaque sélecteur d'un site, on garde la liste triée
+des numéros des balises qui le respectent : chercher « le premier élément
+de la carte qui respecte X » devient une recherche dichotomique au lieu
+d'un nouveau parcours complet avec une fonction Python par nœud.
+"""
+
+from bisect import bisect_right
+
+from bs4 import Tag
+
+
+def fiche(balise, avec_texte=True):
+    """Ce dont les sélecteurs ont besoin, calculé une seule fois par balise"""
+    classes = balise.get('class') or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return {
+        "nom": balise.name,
+        "classes": classes,
+        "texte_classe": ' '.join(classes).lower(),
+        "href": balise.get('href'),
+        "string": balise.string if avec_texte else None,
+    }
+
+
+def correspond_fiche(f, selecteur):
+    """Vérifie si la fiche d'une balise respecte un sélecteur"""
+    if 'balises' in selecteur and f['nom'] not in selecteur['balises']:
+        return False
+    if 'classe_exacte' in selecteur and selecteur['classe_exacte'] not in f['classes']:
+        return False
+    if 'classe' in selecteur and not any(morceau in f['texte_classe'] for morceau in selecteur['classe']):
+        return False
+    if 'href' in selecteur and (f['href'] is None or selecteur['href'] not in f['href']):
+        return False
+    if 'texte' in selecteur:
+        texte = f['string']
+        if texte is None or not any(morceau in texte for morceau in selecteur['texte']):
+            return False
+    return True
+
+
+def cle_selecteur(selecteur):
+    """Identifiant d'un sélecteur (la portée et le conteneur ne changent pas les balises retenues)"""
+    return repr(sorted((k, v) for k, v in selecteur.items() if k not in ('portee', 'dans')))
+
+
+class IndexDOM:
+    """Positions des balises et correspondances de chaque sélecteur"""
+
+    def __init__(self, soup, selecteurs):
+        self.balises = []       # numéro -> balise
+        self.numeros = {}       # id(balise) -> numéro
+        self.fins = []          # numéro -> dernier numéro de son sous-arbre
+        self.correspondances = {}
+
+        a_tester = {}
+        for selecteur in selecteurs:
+            if selecteur.get('portee') != 'soi':
+                a_tester[cle_selecteur(selecteur)] = selecteur
+        for cle in a_tester:
+            self.correspondances[cle] = []
+        avec_texte = any('texte' in selecteur for selecteur in a_tester.values())
+
+        ouvertes = []  # balises dont le sous-arbre est en cours de parcours
+        for balise in soup.descendants:
+            if not isinstance(balise, Tag):
+                continue
+            numero = len(self.balises)
+            # Refermer les sous-arbres qui ne contiennent pas cette balise
+            while ouvertes and ouvertes[-1] is not balise.parent:
+                self.fins[self.numeros[id(ouvertes.pop())]] = numero - 1
+            ouvertes.append(balise)
+
+            self.balises.append(balise)
+            self.numeros[id(balise)] = numero
+            self.fins.append(numero)
+
+            f = fiche(balise, avec_texte)
+            for cle, selecteur in a_tester.items():
+                if correspond_fiche(f, selecteur):
+                    self.correspondances[cle].append(numero)
+
+        dernier = len(self.balises) - 1
+        for balise in ouvertes:
+            self.fins[self.numeros[id(balise)]] = dernier
+
+    def plage(self, balise):
+        """Numéros (exclus, inclus] des descendants d'une balise"""
+        numero = self.numeros.get(id(balise))
+        if numero is None:
+            # Racine du document : tout le document
+            return -1, len(self.balises) - 1
+        return numero, self.fins[numero]
+
+    def tous(self, selecteur):
+        """Toutes les balises qui respectent le sélecteur, dans l'ordre du document"""
+        return [self.balises[n] for n in self.correspondances[cle_selecteur(selecteur)]]
+
+    def premier_dans(self, racine, selecteur):
+        """Premier descendant de racine qui respecte le sélecteur (ou None)"""
+        numeros = self.correspondances[cle_selecteur(selecteur)]
+        debut, fin = self.plage(racine)
+        i = bisect_right(numeros, debut)
+        if i < len(numeros) and numeros[i] <= fin:
+            return self.balises[numeros[i]]
+        return None
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index de recherche pour index.html (stages_index.json)
+Produit à chaque sauvegarde, à côté de stages_data.json :
+    - pour l'entreprise, le poste et la localisation : la liste triée des mots
+      et, pour chaque mot, les numéros des offres qui le contiennent.
+      La page cherche les mots qui COMMENCENT par le texte tapé
+      (recherche dichotomique) et croise les listes au lieu de tout parcourir.
+    - pour le domaine et la durée : les numéros des offres de chaque valeur
+    - les compteurs par domaine, ville et durée (listes des filtres)
+
+Les listes de numéros sont stockées en écarts (3, 5, 9 -> 3, 2, 4) pour
+rester petites. Les numéros sont les positions dans stages_data.json.
+
+Usage : python index_recherche.py   (reconstruit l'index de stages_data.json)
+"""
+
+import json
+import os
+import re
+import unicodedata
+
+FICHIER_INDEX = 'stages_index.json'
+VERSION = 1
+
+CHAMPS_TEXTE = ['company', 'title', 'location']
+CHAMPS_VALEURS = ['domain', 'duration']
+CHAMPS_FACETTES = ['domain', 'location', 'duration']
+
+
+def normaliser(texte):
+    """Minuscules sans accents (la page fait la même chose avec normalize('NFD'))"""
+    decompose = unicodedata.normalize('NFD', texte)
+    return ''.join(c for c in decompose if not unicodedata.combining(c)).lower()
+
+
+def mots(texte):
+    """Mots d'un texte normalisé (lettres a-z et chiffres)"""
+    return [mot for mot in re.split(r'[^a-z0-9]+', normaliser(texte)) if mot]
+
+
+def en_ecarts(numeros):
+    """Liste triée -> écarts entre numéros successifs"""
+    precedent = 0
+    ecarts = []
+    for numero in numeros:
+        ecarts.append(numero - precedent)
+        precedent = numero
+    return ecarts
+
+
+def construire_index(data):
+    """Index et compteurs pour la liste data['stages'] (dans cet ordre)"""
+    stages = data.get('stages', [])
+    par_mot = {champ: {} for champ in CHAMPS_TEXTE}
+    par_valeur = {champ: {} for champ in CHAMPS_VALEURS}
+    compteurs = {champ: {} for champ in CHAMPS_FACETTES}
+
+    for numero, stage in enumerate(stages):
+        for champ in CHAMPS_TEXTE:
+            for mot in set(mots(stage.get(champ, ''))):
+                par_mot[champ].setdefault(mot, []).append(numero)
+        for champ in CHAMPS_VALEURS:
+            par_valeur[champ].setdefault(stage.get(champ, ''), []).append(numero)
+        for champ in CHAMPS_FACETTES:
+            valeur = stage.get(champ, '')
+            compteurs[champ][valeur] = compteurs[champ].get(valeur, 0) + 1
+
+    champs = {}
+    for champ, listes in par_mot.items():
+        tries = sorted(listes)
+        champs[champ] = {"mots": tries, "listes": [en_ecarts(listes[mot]) for mot in tries]}
+
+    return {
+        "version": VERSION,
+        "nombre": len(stages),
+        "derniere_maj": data.get('derniere_maj', ''),
+        "champs": champs,
+        "valeurs": {champ: {valeur: en_ecarts(numeros) for valeur, numeros in sorted(listes.items())}
+                    for champ, listes in par_valeur.items()},
+        "facettes": {champ: sorted(valeurs.items(), key=lambda x: (-x[1], x[0]))
+                     for champ, valeurs in compteurs.items()},
+    }
+
+
+def ecrire_index(data, chemin=FICHIER_INDEX):
+    """Écrit l'index compact (sans espaces) ; remplacé d'un coup"""
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(construire_index(data), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporaire, chemin)
+
+
+if __name__ == "__main__":
+    with open('stages_data.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    ecrire_index(data)
+    print(f"✅ {FICHIER_INDEX} écrit ({len(data.get('stages', []))} offres)")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instantané binaire de la base (stages.bin), rangé par COLONNES
+Chaque champ (domain, duration, location, company...) est stocké une fois
+par valeur distincte, puis chaque offre ne garde qu'un numéro :
+"Finance" ou "Entreprise non spécifiée" n'apparaissent qu'une fois dans le
+fichier ET en mémoire (toutes les offres partagent la même chaîne).
+
+Format (entiers en petit-boutiste) :
+    b'STG1'
+    longueur + en-tête JSON : version, autres clés de data, liste des colonnes
+    pour chaque colonne :
+        nombre de valeurs, taille du bloc, type des codes
+        valeurs UTF-8 séparées par '\0' (ou précédées de leurs longueurs
+        si une valeur contient '\0')
+        un code par offre (0 = champ absent, n = n-ième valeur) ; aucun code
+        si chaque offre a sa propre valeur, dans l'ordre (titres, liens)
+Une colonne spéciale garde l'ordre des champs de chaque offre : relire puis
+réécrire en JSON redonne exactement le même fichier.
+
+Usage : python instantane.py   (convertit stages_data.json et compare les temps)
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from itertools import accumulate, repeat
+
+FICHIER_INSTANTANE = 'stages.bin'
+MAGIQUE = b'STG1'
+VERSION = 1
+SEPARATEUR = '\0'
+SEPARATEUR_CHAMPS = '\x1f'
+
+
+def type_codes(nombre):
+    """Plus petit type d'entier capable de numéroter nombre valeurs (+ absent)"""
+    for code in ('B', 'H', 'I'):
+        if nombre < 256 ** array(code).itemsize:
+            return code
+    return 'Q'
+
+
+def petit_boutiste(tableau):
+    if sys.byteorder == 'big':
+        tableau.byteswap()
+    return tableau
+
+
+def ecrire_colonne(f, valeurs):
+    """Dictionnaire des valeurs distinctes puis un code par offre"""
+    dictionnaire = {}
+    codes = []
+    for valeur in valeurs:
+        if valeur is None:
+            codes.append(0)
+        else:
+            codes.append(dictionnaire.setdefault(valeur, len(dictionnaire) + 1))
+    textes = list(dictionnaire)
+
+    # 'S' : une valeur distincte par offre, dans l'ordre -> pas de codes
+    type_code = 'S' if len(textes) == len(codes) else type_codes(len(textes) + 1)
+    avec_longueurs = any(SEPARATEUR in texte for texte in textes)
+    blob = (''.join(textes) if avec_longueurs else SEPARATEUR.join(textes)).encode('utf-8')
+    f.write(struct.pack('<IIc?', len(textes), len(blob), type_code.encode('ascii'), avec_longueurs))
+    if avec_longueurs:
+        f.write(petit_boutiste(array('I', map(len, textes))).tobytes())
+    f.write(blob)
+    if type_code != 'S':
+        f.write(petit_boutiste(array(type_code, codes)).tobytes())
+
+
+def lire_colonne(f, nombre, avec_codes=False):
+    """
+    Valeurs d'une colonne, une par offre (None = absent),
+    ou (valeurs distinctes, codes) si avec_codes
+    """
+    nb_textes, taille_blob, type_code, avec_longueurs = struct.unpack('<IIc?', f.read(10))
+    if avec_longueurs:
+        longueurs = array('I')
+        longueurs.frombytes(f.read(4 * nb_textes))
+        petit_boutiste(longueurs)
+        blob = f.read(taille_blob).decode('utf-8')
+        textes = [blob[fin - longueur:fin] for fin, longueur in zip(accumulate(longueurs), longueurs)]
+    else:
+        blob = f.read(taille_blob).decode('utf-8')
+        textes = blob.split(SEPARATEUR) if nb_textes else []
+    if type_code == b'S':
+        codes = range(1, nb_textes + 1)
+    else:
+        codes = array(type_code.decode('ascii'))
+        codes.frombytes(f.read(codes.itemsize * nombre))
+        petit_boutiste(codes)
+    textes.insert(0, None)
+    if avec_codes:
+        return textes, codes
+    if type_code == b'S':
+        return textes[1:]
+    return list(map(textes.__getitem__, codes))
+
+
+def sauvegarder(data, chemin=FICHIER_INSTANTANE):
+    """Écrit l'instantané (remplacé d'un coup)"""
+    stages = data.get('stages', [])
+    colonnes = []
+    for stage in stages:
+        for cle in stage:
+            if cle not in colonnes:
+                colonnes.append(cle)
+    # Valeurs non textuelles (rares) : gardées en JSON dans la colonne
+    en_json = [cle for cle in colonnes
+               if any(not isinstance(stage[cle], str) for stage in stages if cle in stage)]
+
+    entete = {
+        "version": VERSION,
+        "nombre": len(stages),
+        "data": {cle: valeur for cle, valeur in data.items() if cle != 'stages'},
+        "colonnes": colonnes,
+        "en_json": en_json,
+    }
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'wb') as f:
+        f.write(MAGIQUE)
+        contenu = json.dumps(entete, ensure_ascii=False).encode('utf-8')
+        f.write(struct.pack('<I', len(contenu)))
+        f.write(contenu)
+        ecrire_colonne(f, (SEPARATEUR_CHAMPS.join(stage) for stage in stages))
+        for cle in colonnes:
+            if cle in en_json:
+                ecrire_colonne(f, (json.dumps(stage[cle], ensure_ascii=False) if cle in stage else None
+                                   for stage in stages))
+            else:
+                ecrire_colonne(f, (stage.get(cle) for stage in stages))
+    os.replace(temporaire, chemin)
+
+
+def charger(chemin=FICHIER_INSTANTANE):
+    """Relit l'instantané : même contenu que le JSON d'origine (FileNotFoundError s'il n'existe pas)"""
+    with open(chemin, 'rb') as f:
+        if f.read(4) != MAGIQUE:
+            raise ValueError(f"{chemin} n'est pas un instantané de la base")
+        taille, = struct.unpack('<I', f.read(4))
+        entete = json.loads(f.read(taille).decode('utf-8'))
+        if entete['version'] != VERSION:
+            raise ValueError(f"Version d'instantané inconnue : {entete['version']}")
+        nombre = entete['nombre']
+        ordres, codes_ordres = lire_colonne(f, nombre, avec_codes=True)
+        colonnes = {}
+        for cle in entete['colonnes']:
+            valeurs = lire_colonne(f, nombre)
+            if cle in entete['en_json']:
+                valeurs = [None if v is None else json.loads(v) for v in valeurs]
+            colonnes[cle] = valeurs
+
+    # Toutes les offres sont construites d'un coup avec les champs les plus
+    # fréquents ; les rares offres aux champs différents sont refaites ensuite
+    frequences = Counter(codes_ordres) if len(ordres) > 2 else {}
+    majoritaire = max(frequences, key=frequences.get) if frequences else 1
+    champs = ordres[majoritaire].split(SEPARATEUR_CHAMPS) if nombre and ordres[majoritaire] else []
+    if champs:
+        stages = list(map(dict, map(zip, repeat(champs), zip(*(colonnes[cle] for cle in champs)))))
+    else:
+        stages = [{} for _ in range(nombre)]
+    if frequences:
+        champs_par_code = [ordre.split(SEPARATEUR_CHAMPS) if ordre else [] for ordre in ordres]
+        for numero, code in enumerate(codes_ordres):
+            if code != majoritaire:
+                stages[numero] = {cle: colonnes[cle][numero] for cle in champs_par_code[code]}
+
+    data = dict(entete['data'])
+    data['stages'] = stages
+    return data
+
+
+if __name__ == "__main__":
+    with open('stages_data.json', 'r', encoding='utf-8') as f:
+        texte = f.read()
+    debut = time.perf_counter()
+    data = json.loads(texte)
+    duree_json = time.perf_counter() - debut
+
+    sauvegarder(data)
+    debut = time.perf_counter()
+    relu = charger()
+    duree_binaire = time.perf_counter() - debut
+
+    identique = json.dumps(relu, ensure_ascii=False, indent=2) == json.dumps(data, ensure_ascii=False, indent=2)
+    print(f"{len(data.get('stages', []))} offres")
+    print(f"  JSON   : {len(texte.encode('utf-8')) / 1024:8.1f} Ko, lecture {duree_json * 1000:.1f} ms")
+    print(f"  Binaire: {os.path.getsize(FICHIER_INSTANTANE) / 1024:8.1f} Ko, lecture {duree_binaire * 1000:.1f} ms")
+    print("✅ Relecture identique" if identique else "❌ Relecture différente !")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture en flux des pages de résultats
+Le corps d'une réponse est lu par morceaux et passe, au fur et à mesure,
+dans un petit analyseur HTML incrémental (html.parser) qui ne fait que
+compter les cartes d'offres. La lecture s'arrête :
+    - dès que la carte max_cartes + 1 commence : les max_cartes premières
+      sont complètes, le reste de la page ne servirait à rien (max_cartes
+      est le nombre d'offres d'une page du site ; seules les cartes
+      extérieures comptent, pas une carte dans une carte)
+    - après taille_max octets, quelle que soit la page (portail démesuré)
+La connexion est alors fermée : la fin de la page n'est ni téléchargée ni
+analysée, et la mémoire prise par une page reste bornée.
+Une page tronquée n'est pas gardée dans le cache HTTP (voir transport.get).
+"""
+
+import codecs
+from html.parser import HTMLParser
+
+from index_dom import correspond_fiche
+from metriques import compter
+
+TAILLE_MORCEAU = 16 * 1024
+
+
+class CompteurCartes(HTMLParser):
+    """
+    Compte les cartes extérieures : balises ouvrantes qui respectent le sélecteur
+    des cartes, hors d'une carte déjà ouverte (comme extraction.premieres_cartes)
+    """
+
+    def __init__(self, selecteur):
+        super().__init__(convert_charrefs=False)
+        self.selecteur = selecteur
+        self.cartes = 0
+        # Balise de la carte ouverte et profondeur des balises du même nom dedans
+        self.ouverte = None
+        self.profondeur = 0
+
+    def handle_starttag(self, nom, attributs):
+        if self.ouverte is not None:
+            if nom == self.ouverte:
+                self.profondeur += 1
+            return
+        attributs = dict(attributs)
+        classes = (attributs.get('class') or '').split()
+        # Même fiche que index_dom.fiche, sans le texte (inconnu à l'ouverture)
+        fiche = {"nom": nom, "classes": classes, "texte_classe": ' '.join(classes).lower(),
+                 "href": attributs.get('href'), "string": None}
+        if correspond_fiche(fiche, self.selecteur):
+            self.cartes += 1
+            self.ouverte = nom
+            self.profondeur = 1
+
+    def handle_startendtag(self, nom, attributs):
+        # Balise vide : ne reste pas ouverte
+        self.handle_starttag(nom, attributs)
+        if self.ouverte == nom:
+            self.handle_endtag(nom)
+
+    def handle_endtag(self, nom):
+        if nom == self.ouverte:
+            self.profondeur -= 1
+            if self.profondeur == 0:
+                self.ouverte = None
+
+
+def cartes_comptables(source):
+    """
+    Le site limite ses cartes (max_cartes) et une carte se reconnaît à sa
+    balise ouvrante (un critère sur le texte n'est connu qu'après)
+    """
+    return bool(source['max_cartes']) and 'texte' not in source['cartes']
+
+
+def decodeur(response):
+    try:
+        return codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
+def lecteur(source):
+    """
+    Fonction de lecture pour transport.get(lecteur=...) :
+    lire(response) -> (octets lus, raison de l'arrêt ou None si page complète)
+    """
+    max_cartes = source['max_cartes']
+    taille_max = source['taille_max']
+
+    def lire(response):
+        compteur = CompteurCartes(source['cartes']) if cartes_comptables(source) else None
+        texte = decodeur(response) if compteur else None
+        morceaux = []
+        lus = 0
+        for morceau in response.iter_content(min(TAILLE_MORCEAU, taille_max or TAILLE_MORCEAU)):
+            morceaux.append(morceau)
+            lus += len(morceau)
+            raison = None
+            if compteur is not None:
+                compteur.feed(texte.decode(morceau))
+                if compteur.cartes > max_cartes:
+                    raison = 'cartes'
+            if raison is None and taille_max and lus >= taille_max:
+                raison = 'taille'
+            if raison:
+                compter('pages_tronquees', raison=raison)
+                return b''.join(morceaux), raison
+        return b''.join(morceaux), None
+
+    return lire
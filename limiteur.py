@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Débit adaptatif par site (remplace le délai fixe entre deux requêtes)
+Chaque site a un « seau de jetons » : une requête prend un jeton, les jetons
+reviennent au rythme du débit du site.
+    - tant que le site répond bien, le débit monte peu à peu (jusqu'à DEBIT_MAX)
+    - sur un 429 / 503 / délai dépassé, il est divisé par deux et le site est
+      mis en pause : Retry-After s'il est donné, sinon 1 s, 2 s, 4 s...
+    - après ECHECS_COUPURE échecs de suite, le site est COUPÉ : plus aucune
+      requête (CircuitOuvert) pendant DUREE_COUPURE, doublée à chaque rechute.
+      Passé ce délai, une requête d'essai est permise ; si elle réussit, le
+      site est rétabli.
+
+L'état de chaque site (débit appris, pauses, coupures) est gardé dans
+etat_sites.json et repris au passage suivant.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+FICHIER_ETAT = 'etat_sites.json'
+
+DEBIT_INITIAL = 0.5      # requêtes par seconde (une toutes les 2 s)
+DEBIT_MIN = 0.2          # une requête toutes les 5 s au plus lent
+DEBIT_MAX = 2.0
+HAUSSE_DEBIT = 0.05      # ajouté après chaque succès
+RAFALE = 2               # jetons qu'un site peut accumuler
+
+PAUSE_BASE = 1.0         # secondes, doublée à chaque échec consécutif
+PAUSE_MAX = 300.0        # au-delà (Retry-After très long), le site est coupé
+ECHECS_COUPURE = 5
+DUREE_COUPURE = 600.0
+DUREE_COUPURE_MAX = 24 * 3600.0
+
+
+class CircuitOuvert(Exception):
+    """Le site est coupé : la requête n'est pas envoyée"""
+
+    def __init__(self, hote, jusqu_a):
+        super().__init__(f"{hote} coupé jusqu'à {time.strftime('%H:%M', time.localtime(jusqu_a))}")
+        self.hote = hote
+        self.jusqu_a = jusqu_a
+
+
+def duree_retry_after(valeur):
+    """Secondes d'attente demandées par l'en-tête Retry-After (None si absent ou illisible)"""
+    if not valeur:
+        return None
+    valeur = valeur.strip()
+    if valeur.isdigit():
+        return float(valeur)
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LimiteurHote:
+    """
+    Débit, pauses et coupure pour UN site.
+    async with limiteur: ... attend un jeton (et la fin d'une pause) ;
+    le résultat est ensuite signalé avec succes() ou echec().
+    """
+
+    def __init__(self, hote, simultanees=1, etat=None):
+        etat = etat or {}
+        self.hote = hote
+        self.semaphore = asyncio.Semaphore(simultanees)
+        self.verrou = asyncio.Lock()
+        self.debit = etat.get('debit', DEBIT_INITIAL)
+        self.echecs = etat.get('echecs', 0)
+        # Heures « murales » (time.time()) : elles restent valables d'un passage à l'autre
+        self.pause_jusqu_a = etat.get('pause_jusqu_a', 0.0)
+        self.coupe_jusqu_a = etat.get('coupe_jusqu_a', 0.0)
+        self.jetons = 1.0
+        self.dernier_remplissage = time.monotonic()
+
+    def etat(self):
+        return {"debit": round(self.debit, 4), "echecs": self.echecs,
+                "pause_jusqu_a": self.pause_jusqu_a, "coupe_jusqu_a": self.coupe_jusqu_a}
+
+    def coupe(self):
+        return time.time() < self.coupe_jusqu_a
+
+    async def __aenter__(self):
+        if self.coupe():
+            raise CircuitOuvert(self.hote, self.coupe_jusqu_a)
+        await self.semaphore.acquire()
+        try:
+            # Réserver un jeton (éventuellement à venir), puis attendre son tour
+            async with self.verrou:
+                maintenant = time.monotonic()
+                self.jetons = min(RAFALE, self.jetons + (maintenant - self.dernier_remplissage) * self.debit)
+                self.dernier_remplissage = maintenant
+                self.jetons -= 1
+                attente = max(-self.jetons / self.debit, self.pause_jusqu_a - time.time(), 0.0)
+            if attente:
+                await asyncio.sleep(attente)
+            if self.coupe():
+                raise CircuitOuvert(self.hote, self.coupe_jusqu_a)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+    def succes(self):
+        """Le site a bien répondu : on accélère un peu, et une coupure est levée"""
+        self.echecs = 0
+        self.coupe_jusqu_a = 0.0
+        self.debit = min(DEBIT_MAX, self.debit + HAUSSE_DEBIT)
+
+    def echec(self, attente=None):
+        """
+        Le site refuse ou ne répond pas : débit divisé par deux, pause
+        (attente = Retry-After si donné) et coupure après trop d'échecs
+        """
+        self.echecs += 1
+        self.debit = max(DEBIT_MIN, self.debit / 2)
+        if attente is None:
+            attente = PAUSE_BASE * 2 ** (self.echecs - 1) * random.uniform(1.0, 1.5)
+        maintenant = time.time()
+        if attente > PAUSE_MAX or self.echecs >= ECHECS_COUPURE:
+            rechutes = max(0, self.echecs - ECHECS_COUPURE)
+            duree = max(attente, min(DUREE_COUPURE * 2 ** rechutes, DUREE_COUPURE_MAX))
+            self.coupe_jusqu_a = maintenant + duree
+        else:
+            self.pause_jusqu_a = max(self.pause_jusqu_a, maintenant + attente)
+
+
+class Limiteurs:
+    """Un LimiteurHote par site, avec leur état gardé sur disque"""
+
+    def __init__(self, simultanees=1, chemin=FICHIER_ETAT):
+        self.simultanees = simultanees
+        self.chemin = chemin
+        self.hotes = {}
+        try:
+            with open(chemin, 'r', encoding='utf-8') as f:
+                self.etats = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.etats = {}
+
+    def pour(self, url):
+        """Limiteur du site de cette adresse (créé au premier appel)"""
+        hote = urlparse(url).netloc
+        if hote not in self.hotes:
+            self.hotes[hote] = LimiteurHote(hote, self.simultanees, self.etats.get(hote))
+        return self.hotes[hote]
+
+    def sauvegarder(self):
+        """Écrit l'état des sites (ceux de ce passage remplacent les anciens)"""
+        self.etats.update({hote: limiteur.etat() for hote, limiteur in self.hotes.items()})
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.etats, f, indent=1, sort_keys=True)
+        os.replace(temporaire, self.chemin)
+
+    def coupes(self):
+        """Sites actuellement coupés"""
+        return sorted(hote for hote, limiteur in self.hotes.items() if limiteur.coupe())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Localisation des offres : ville, canton et coordonnées
+Les sites écrivent la même ville de plusieurs façons ("Genève", "Geneva",
+"Genf", "1204 Genève GE"...). Un répertoire des villes et cantons suisses,
+avec leurs noms en français, allemand, italien et anglais, est compilé en un
+automate d'Aho-Corasick : le texte d'une carte est lu UNE fois, caractère
+par caractère, et tous les noms connus qu'il contient sont trouvés d'un coup.
+
+    localiser("8001 Zürich, ZH")  -> Lieu(ville='Zurich', canton='ZH', latitude=47.37.., longitude=8.54..)
+    nom_lieu("Basel-Stadt")       -> 'Bâle'
+
+Les noms rendus sont les noms français (ceux de index.html).
+"""
+
+import re
+import unicodedata
+from collections import deque, namedtuple
+from functools import lru_cache
+
+Lieu = namedtuple('Lieu', ['ville', 'canton', 'latitude', 'longitude'])
+
+# Code -> (nom, autres noms, chef-lieu)
+CANTONS = {
+    "ZH": ("Zurich", ["zürich", "zuerich", "zurigo"], "Zurich"),
+    "BE": ("Berne", ["bern", "berna"], "Berne"),
+    "LU": ("Lucerne", ["luzern", "lucerna"], "Lucerne"),
+    "UR": ("Uri", [], "Altdorf"),
+    "SZ": ("Schwyz", ["svitto"], "Schwyz"),
+    "OW": ("Obwald", ["obwalden", "obvaldo"], "Sarnen"),
+    "NW": ("Nidwald", ["nidwalden", "nidvaldo"], "Stans"),
+    "GL": ("Glaris", ["glarus", "glarona"], "Glaris"),
+    "ZG": ("Zoug", ["zug", "zugo"], "Zoug"),
+    "FR": ("Fribourg", ["freiburg", "friburgo"], "Fribourg"),
+    "SO": ("Soleure", ["solothurn", "soletta"], "Soleure"),
+    "BS": ("Bâle-Ville", ["basel-stadt", "basel stadt", "basilea città"], "Bâle"),
+    "BL": ("Bâle-Campagne", ["basel-landschaft", "baselland", "basilea campagna"], "Liestal"),
+    "SH": ("Schaffhouse", ["schaffhausen", "sciaffusa"], "Schaffhouse"),
+    "AR": ("Appenzell Rhodes-Extérieures", ["appenzell ausserrhoden", "appenzello esterno"], "Herisau"),
+    "AI": ("Appenzell Rhodes-Intérieures", ["appenzell innerrhoden", "appenzello interno"], "Appenzell"),
+    "SG": ("Saint-Gall", ["st. gallen", "sankt gallen", "san gallo"], "Saint-Gall"),
+    "GR": ("Grisons", ["graubünden", "graubuenden", "grigioni", "grischun"], "Coire"),
+    "AG": ("Argovie", ["aargau", "argovia"], "Aarau"),
+    "TG": ("Thurgovie", ["thurgau", "turgovia"], "Frauenfeld"),
+    "TI": ("Tessin", ["ticino"], "Bellinzone"),
+    "VD": ("Vaud", ["waadt"], "Lausanne"),
+    "VS": ("Valais", ["wallis", "vallese"], "Sion"),
+    "NE": ("Neuchâtel", ["neuenburg"], "Neuchâtel"),
+    "GE": ("Genève", ["genf", "geneva", "ginevra"], "Genève"),
+    "JU": ("Jura", [], "Delémont"),
+}
+
+# (nom, canton, latitude, longitude, autres noms)
+VILLES = [
+    ("Zurich", "ZH", 47.3769, 8.5417, ["zürich", "zuerich", "zurigo"]),
+    ("Genève", "GE", 46.2044, 6.1432, ["genf", "geneva", "ginevra"]),
+    ("Bâle", "BS", 47.5596, 7.5886, ["basel", "basle", "basilea"]),
+    ("Lausanne", "VD", 46.5197, 6.6323, ["losanna"]),
+    ("Berne", "BE", 46.9480, 7.4474, ["bern", "berna"]),
+    ("Winterthour", "ZH", 47.4988, 8.7237, ["winterthur"]),
+    ("Lucerne", "LU", 47.0502, 8.3093, ["luzern", "lucerna"]),
+    ("Saint-Gall", "SG", 47.4245, 9.3767, ["st. gallen", "st gallen", "sankt gallen", "st-gall", "san gallo"]),
+    ("Lugano", "TI", 46.0037, 8.9511, []),
+    ("Bienne", "BE", 47.1368, 7.2468, ["biel"]),
+    ("Thoune", "BE", 46.7580, 7.6280, ["thun"]),
+    ("Köniz", "BE", 46.9245, 7.4146, ["koeniz"]),
+    ("La Chaux-de-Fonds", "NE", 47.0999, 6.8259, []),
+    ("Fribourg", "FR", 46.8065, 7.1620, ["freiburg", "friburgo"]),
+    ("Schaffhouse", "SH", 47.6960, 8.6340, ["schaffhausen", "sciaffusa"]),
+    ("Coire", "GR", 46.8508, 9.5320, ["chur", "coira"]),
+    ("Vernier", "GE", 46.2170, 6.0850, []),
+    ("Neuchâtel", "NE", 46.9900, 6.9293, ["neuenburg"]),
+    ("Uster", "ZH", 47.3471, 8.7209, []),
+    ("Sion", "VS", 46.2331, 7.3606, ["sitten"]),
+    ("Lancy", "GE", 46.1896, 6.1136, []),
+    ("Emmen", "LU", 47.0782, 8.2733, []),
+    ("Yverdon-les-Bains", "VD", 46.7785, 6.6410, ["yverdon"]),
+    ("Zoug", "ZG", 47.1662, 8.5155, ["zug", "zugo"]),
+    ("Kriens", "LU", 47.0340, 8.2779, []),
+    ("Rapperswil-Jona", "SG", 47.2266, 8.8184, ["rapperswil"]),
+    ("Dübendorf", "ZH", 47.3972, 8.6186, ["duebendorf"]),
+    ("Montreux", "VD", 46.4312, 6.9107, []),
+    ("Dietikon", "ZH", 47.4017, 8.4001, []),
+    ("Frauenfeld", "TG", 47.5536, 8.8987, []),
+    ("Wetzikon", "ZH", 47.3265, 8.7977, []),
+    ("Baar", "ZG", 47.1963, 8.5295, []),
+    ("Riehen", "BS", 47.5788, 7.6468, []),
+    ("Wädenswil", "ZH", 47.2303, 8.6716, ["waedenswil"]),
+    ("Renens", "VD", 46.5399, 6.5881, []),
+    ("Aarau", "AG", 47.3925, 8.0444, []),
+    ("Baden", "AG", 47.4733, 8.3059, []),
+    ("Kloten", "ZH", 47.4515, 8.5849, []),
+    ("Opfikon", "ZH", 47.4310, 8.5720, ["glattbrugg"]),
+    ("Schlieren", "ZH", 47.3970, 8.4470, []),
+    ("Horgen", "ZH", 47.2590, 8.5980, []),
+    ("Nyon", "VD", 46.3833, 6.2396, []),
+    ("Vevey", "VD", 46.4628, 6.8419, []),
+    ("Morges", "VD", 46.5113, 6.4985, []),
+    ("Pully", "VD", 46.5100, 6.6620, []),
+    ("Gland", "VD", 46.4200, 6.2700, []),
+    ("Rolle", "VD", 46.4580, 6.3350, []),
+    ("Carouge", "GE", 46.1810, 6.1390, []),
+    ("Meyrin", "GE", 46.2340, 6.0800, []),
+    ("Plan-les-Ouates", "GE", 46.1670, 6.1170, []),
+    ("Bellinzone", "TI", 46.1946, 9.0244, ["bellinzona"]),
+    ("Locarno", "TI", 46.1670, 8.7943, []),
+    ("Mendrisio", "TI", 45.8703, 8.9817, []),
+    ("Soleure", "SO", 47.2088, 7.5323, ["solothurn", "soletta"]),
+    ("Olten", "SO", 47.3520, 7.9078, []),
+    ("Liestal", "BL", 47.4840, 7.7350, []),
+    ("Allschwil", "BL", 47.5510, 7.5360, []),
+    ("Schwyz", "SZ", 47.0207, 8.6530, []),
+    ("Altdorf", "UR", 46.8806, 8.6444, []),
+    ("Sarnen", "OW", 46.8960, 8.2460, []),
+    ("Stans", "NW", 46.9580, 8.3660, []),
+    ("Glaris", "GL", 47.0404, 9.0672, ["glarus"]),
+    ("Herisau", "AR", 47.3861, 9.2792, []),
+    ("Appenzell", "AI", 47.3310, 9.4090, []),
+    ("Delémont", "JU", 47.3650, 7.3440, ["delsberg"]),
+    ("Martigny", "VS", 46.1028, 7.0720, []),
+    ("Monthey", "VS", 46.2550, 6.9540, []),
+    ("Sierre", "VS", 46.2920, 7.5350, ["siders"]),
+    ("Davos", "GR", 46.8027, 9.8360, []),
+    ("Saint-Moritz", "GR", 46.4908, 9.8355, ["st. moritz", "st moritz", "sankt moritz"]),
+    ("Wil", "SG", 47.4615, 9.0455, []),
+]
+
+# Une ville l'emporte sur un canton du même nom (Genève, Zurich, Berne...)
+PRIORITE_VILLE = 0
+PRIORITE_CANTON = 1
+
+
+def normaliser(texte):
+    """Minuscules sans accents, tout ce qui n'est ni lettre ni chiffre devient une espace"""
+    decompose = unicodedata.normalize('NFD', texte)
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c)).lower()
+    return ' '.join(re.split(r'[^a-z0-9]+', sans_accents)).strip()
+
+
+class Automate:
+    """Automate d'Aho-Corasick : trouve tous les motifs d'un texte en un passage"""
+
+    def __init__(self, motifs):
+        # Nœud 0 = racine ; transitions, lien d'échec et motifs finissant en chaque nœud
+        self.transitions = [{}]
+        self.echecs = [0]
+        self.sorties = [[]]
+        self.motifs = []
+        for motif, valeur in motifs:
+            noeud = 0
+            for caractere in motif:
+                suivant = self.transitions[noeud].get(caractere)
+                if suivant is None:
+                    suivant = len(self.transitions)
+                    self.transitions[noeud][caractere] = suivant
+                    self.transitions.append({})
+                    self.echecs.append(0)
+                    self.sorties.append([])
+                noeud = suivant
+            self.sorties[noeud].append(len(self.motifs))
+            self.motifs.append((len(motif), valeur))
+
+        # Liens d'échec en largeur : plus long suffixe qui est aussi un préfixe
+        file = deque(self.transitions[0].values())
+        while file:
+            noeud = file.popleft()
+            for caractere, suivant in self.transitions[noeud].items():
+                file.append(suivant)
+                repli = self.echecs[noeud]
+                while repli and caractere not in self.transitions[repli]:
+                    repli = self.echecs[repli]
+                cible = self.transitions[repli].get(caractere, 0)
+                self.echecs[suivant] = cible if cible != suivant else 0
+                self.sorties[suivant] = self.sorties[suivant] + self.sorties[self.echecs[suivant]]
+
+    def chercher(self, texte):
+        """(début, fin, valeur) de chaque motif trouvé"""
+        transitions, echecs, sorties, motifs = self.transitions, self.echecs, self.sorties, self.motifs
+        noeud = 0
+        for position, caractere in enumerate(texte):
+            while noeud and caractere not in transitions[noeud]:
+                noeud = echecs[noeud]
+            noeud = transitions[noeud].get(caractere, 0)
+            for numero in sorties[noeud]:
+                longueur, valeur = motifs[numero]
+                yield position + 1 - longueur, position + 1, valeur
+
+
+def construire_automate():
+    motifs = {}
+    for nom, canton, latitude, longitude, autres in VILLES:
+        lieu = Lieu(nom, canton, latitude, longitude)
+        for variante in [nom, *autres]:
+            motifs.setdefault(normaliser(variante), (PRIORITE_VILLE, lieu))
+    coordonnees = {ville[0]: ville[2:4] for ville in VILLES}
+    for code, (nom, autres, chef_lieu) in CANTONS.items():
+        lieu = Lieu(None, code, *coordonnees[chef_lieu])
+        for variante in [nom, *autres]:
+            motifs.setdefault(normaliser(variante), (PRIORITE_CANTON, lieu))
+    return Automate(sorted(motifs.items()))
+
+
+AUTOMATE = construire_automate()
+
+
+@lru_cache(maxsize=4096)
+def localiser(texte):
+    """
+    Premier lieu suisse nommé dans le texte (le plus long s'ils commencent
+    au même endroit, la ville avant le canton), None si aucun
+    """
+    normalise = f" {normaliser(texte)} "
+    meilleur = None
+    for debut, fin, (priorite, lieu) in AUTOMATE.chercher(normalise):
+        # Mots entiers seulement ("Sion" n'est pas dans "Mission")
+        if normalise[debut - 1] != ' ' or normalise[fin] != ' ':
+            continue
+        cle = (debut, debut - fin, priorite)
+        if meilleur is None or cle < meilleur[0]:
+            meilleur = (cle, lieu)
+    return meilleur[1] if meilleur else None
+
+
+def nom_lieu(texte, defaut=None):
+    """Nom français de la ville (ou du canton) nommée dans le texte, sinon defaut"""
+    lieu = localiser(texte)
+    if lieu is None:
+        return defaut
+    return lieu.ville or CANTONS[lieu.canton][0]
+
+
+def canton(texte):
+    """Code du canton nommé dans le texte (ou de sa ville), None si aucun"""
+    lieu = localiser(texte)
+    return lieu.canton if lieu else None
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesures d'un passage : ce que fait chaque site, chaque recherche, chaque phase
+    compteurs     : cartes trouvées / gardées, doublons écartés, offres fusionnées...
+    histogrammes  : latence HTTP, octets par page, temps d'analyse
+    phases        : durée de crawl, enrichissement, quasi-doublons, sauvegarde
+Chaque mesure porte des étiquettes (source, terme, ...). Celles du contexte
+(with etiquettes(source=..., terme=...)) sont ajoutées d'office : le crawl
+les pose une fois par recherche et tout ce qui s'exécute dessous (y compris
+dans les threads de asyncio.to_thread) en hérite.
+
+En fin de passage, ecrire() produit :
+    rapport_passage.json   le rapport complet (avec un résumé par recherche)
+    metriques.prom         le même contenu au format texte de Prometheus
+                           (à faire lire par le « textfile collector » de node_exporter)
+
+Profilage des phases, choisi par variables d'environnement :
+    STAGES_PROFIL=analyse,doublons   (ou "tout") : cProfile autour de ces phases,
+                                     écrit dans profil_<phase>.prof
+                                     (python -m pstats profil_analyse.prof)
+    STAGES_MEMOIRE=1                 : tracemalloc, pic de mémoire de chaque phase
+                                     dans le rapport (mémoire de tout le processus)
+"""
+
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+CONFIG = {
+    "rapport": 'rapport_passage.json',
+    "prometheus": 'metriques.prom',
+    "profil": os.environ.get('STAGES_PROFIL', ''),
+    "memoire": os.environ.get('STAGES_MEMOIRE', '') not in ('', '0'),
+}
+
+PREFIXE_PROMETHEUS = 'stages_'
+
+# Bornes des histogrammes (secondes ou octets)
+BORNES = {
+    "http_latence_secondes": (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+    "http_octets": (4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304),
+    "analyse_secondes": (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+}
+BORNES_DEFAUT = (0.001, 0.01, 0.1, 0.5, 1, 5, 10, 60)
+
+DESCRIPTIONS = {
+    "http_latence_secondes": "Durée d'une requête HTTP (envoi à fin du corps)",
+    "http_octets": "Taille du corps d'une réponse HTTP",
+    "http_reponses": "Réponses HTTP par statut",
+    "analyse_secondes": "Temps d'analyse d'une page de résultats",
+    "pages_non_modifiees": "Pages inchangées (304) dont les offres viennent du cache",
+    "pages_tronquees": "Pages dont la lecture s'est arrêtée avant la fin (assez de cartes, ou trop grande)",
+    "cartes_trouvees": "Cartes d'offres trouvées dans les pages",
+    "offres_gardees": "Offres extraites des cartes (après filtres)",
+    "doublons": "Offres écartées comme doublons, par raison",
+    "fusion_offres": "Résultat de la fusion avec la base, par sorte d'offre",
+    "quasi_doublons_fusionnes": "Offres fusionnées avec un quasi-doublon d'un autre site",
+    "phase_secondes": "Durée cumulée de chaque phase du passage",
+}
+
+_etiquettes = contextvars.ContextVar('etiquettes', default={})
+
+
+@contextmanager
+def etiquettes(**valeurs):
+    """Étiquettes ajoutées à toutes les mesures faites dans ce bloc"""
+    jeton = _etiquettes.set({**_etiquettes.get(), **valeurs})
+    try:
+        yield
+    finally:
+        _etiquettes.reset(jeton)
+
+
+def cle_etiquettes(valeurs):
+    valeurs = {**_etiquettes.get(), **valeurs}
+    return tuple(sorted((nom, str(valeur)) for nom, valeur in valeurs.items()))
+
+
+class Histogramme:
+    """Nombre d'observations par tranche (bornes supérieures), somme et nombre"""
+
+    __slots__ = ('bornes', 'comptes', 'somme', 'nombre')
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.comptes = [0] * (len(bornes) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        self.comptes[bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def ajouter(self, autre):
+        """Ajoute les observations d'un histogramme de mêmes bornes"""
+        self.comptes = [a + b for a, b in zip(self.comptes, autre.comptes)]
+        self.somme += autre.somme
+        self.nombre += autre.nombre
+
+    def quantile(self, q):
+        """Estimation (interpolée dans la tranche), comme histogram_quantile de Prometheus"""
+        if not self.nombre:
+            return None
+        rang = q * self.nombre
+        cumul = 0
+        for i, compte in enumerate(self.comptes):
+            if cumul + compte >= rang and compte:
+                if i == len(self.bornes):
+                    return self.bornes[-1]
+                bas = self.bornes[i - 1] if i else 0.0
+                return round(bas + (self.bornes[i] - bas) * (rang - cumul) / compte, 6)
+            cumul += compte
+        return self.bornes[-1]
+
+    def en_dict(self):
+        return {
+            "nombre": self.nombre,
+            "somme": round(self.somme, 6),
+            "moyenne": round(self.somme / self.nombre, 6) if self.nombre else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "tranches": {str(borne): compte for borne, compte in zip((*self.bornes, '+Inf'), self.comptes)},
+        }
+
+
+class Registre:
+    """Toutes les mesures du passage (utilisable depuis plusieurs threads)"""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        with self.verrou:
+            self.debut = time.time()
+            self.compteurs = {}
+            self.histogrammes = {}
+            self.phases = {}
+            self.profils = {}
+
+    def compter(self, nom, valeur=1, **valeurs):
+        cle = (nom, cle_etiquettes(valeurs))
+        with self.verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    def observer(self, nom, valeur, **valeurs):
+        cle = (nom, cle_etiquettes(valeurs))
+        with self.verrou:
+            histogramme = self.histogrammes.get(cle)
+            if histogramme is None:
+                histogramme = self.histogrammes[cle] = Histogramme(BORNES.get(nom, BORNES_DEFAUT))
+            histogramme.observer(valeur)
+
+    def noter_phase(self, nom, duree, memoire_pic=None, profil=None):
+        with self.verrou:
+            phase = self.phases.setdefault(nom, {"appels": 0, "secondes": 0.0})
+            phase['appels'] += 1
+            phase['secondes'] += duree
+            if memoire_pic is not None:
+                phase['memoire_pic_octets'] = max(phase.get('memoire_pic_octets', 0), memoire_pic)
+            if profil is not None:
+                if nom in self.profils:
+                    self.profils[nom].add(profil)
+                else:
+                    self.profils[nom] = pstats.Stats(profil)
+
+    def vider(self):
+        """
+        Retire et renvoie compteurs, histogrammes et phases (sans les profils) :
+        un processus d'analyse les renvoie ainsi à son parent (voir fusionner)
+        """
+        with self.verrou:
+            mesures = {"compteurs": self.compteurs, "histogrammes": self.histogrammes, "phases": self.phases}
+            self.compteurs, self.histogrammes, self.phases = {}, {}, {}
+        return mesures
+
+    def fusionner(self, mesures):
+        """Ajoute les mesures d'un autre processus, avec les étiquettes du contexte"""
+        with self.verrou:
+            for (nom, cle), valeur in mesures['compteurs'].items():
+                cle = (nom, cle_etiquettes(dict(cle)))
+                self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+            for (nom, cle), autre in mesures['histogrammes'].items():
+                cle = (nom, cle_etiquettes(dict(cle)))
+                histogramme = self.histogrammes.get(cle)
+                if histogramme is None:
+                    histogramme = self.histogrammes[cle] = Histogramme(autre.bornes)
+                histogramme.ajouter(autre)
+            for nom, autre in mesures['phases'].items():
+                phase = self.phases.setdefault(nom, {"appels": 0, "secondes": 0.0})
+                phase['appels'] += autre['appels']
+                phase['secondes'] += autre['secondes']
+                if 'memoire_pic_octets' in autre:
+                    phase['memoire_pic_octets'] = max(phase.get('memoire_pic_octets', 0), autre['memoire_pic_octets'])
+
+    def par_recherche(self):
+        """Résumé par (source, terme) : requêtes, latence, octets, analyse, cartes"""
+        resume = {}
+        for (nom, cle), valeur in list(self.compteurs.items()) + list(self.histogrammes.items()):
+            valeurs = dict(cle)
+            if 'terme' not in valeurs:
+                continue
+            ligne = resume.setdefault(f"{valeurs.get('source', '?')} / {valeurs['terme']}", {})
+            if isinstance(valeur, Histogramme):
+                ligne[nom] = {"nombre": valeur.nombre, "somme": round(valeur.somme, 6)}
+            elif nom in ('cartes_trouvees', 'offres_gardees', 'pages_non_modifiees'):
+                ligne[nom] = ligne.get(nom, 0) + valeur
+        return dict(sorted(resume.items()))
+
+    def rapport(self):
+        with self.verrou:
+            compteurs, histogrammes = {}, {}
+            for (nom, cle), valeur in sorted(self.compteurs.items()):
+                compteurs.setdefault(nom, []).append({"etiquettes": dict(cle), "valeur": valeur})
+            for (nom, cle), histogramme in sorted(self.histogrammes.items()):
+                histogrammes.setdefault(nom, []).append({"etiquettes": dict(cle), **histogramme.en_dict()})
+            fin = time.time()
+            return {
+                "debut": datetime.fromtimestamp(self.debut).isoformat(timespec='seconds'),
+                "fin": datetime.fromtimestamp(fin).isoformat(timespec='seconds'),
+                "duree_secondes": round(fin - self.debut, 3),
+                "phases": {nom: dict(phase, secondes=round(phase['secondes'], 6))
+                           for nom, phase in self.phases.items()},
+                "par_recherche": self.par_recherche(),
+                "compteurs": compteurs,
+                "histogrammes": histogrammes,
+            }
+
+    def prometheus(self):
+        """Texte au format d'exposition de Prometheus"""
+        lignes = []
+
+        def entete(nom, sorte, suffixe=''):
+            lignes.append(f"# HELP {PREFIXE_PROMETHEUS}{nom}{suffixe} {DESCRIPTIONS.get(nom, nom)}")
+            lignes.append(f"# TYPE {PREFIXE_PROMETHEUS}{nom}{suffixe} {sorte}")
+
+        with self.verrou:
+            precedent = None
+            for (nom, cle), valeur in sorted(self.compteurs.items()):
+                if nom != precedent:
+                    entete(nom, 'counter', '_total')
+                    precedent = nom
+                lignes.append(f"{PREFIXE_PROMETHEUS}{nom}_total{format_etiquettes(cle)} {valeur}")
+            precedent = None
+            for (nom, cle), histogramme in sorted(self.histogrammes.items()):
+                if nom != precedent:
+                    entete(nom, 'histogram')
+                    precedent = nom
+                cumul = 0
+                for borne, compte in zip((*histogramme.bornes, '+Inf'), histogramme.comptes):
+                    cumul += compte
+                    lignes.append(f"{PREFIXE_PROMETHEUS}{nom}_bucket{format_etiquettes(cle + (('le', str(borne)),))} {cumul}")
+                lignes.append(f"{PREFIXE_PROMETHEUS}{nom}_sum{format_etiquettes(cle)} {histogramme.somme}")
+                lignes.append(f"{PREFIXE_PROMETHEUS}{nom}_count{format_etiquettes(cle)} {histogramme.nombre}")
+            if self.phases:
+                entete('phase_secondes', 'gauge')
+                for nom, phase in self.phases.items():
+                    lignes.append(f"{PREFIXE_PROMETHEUS}phase_secondes{format_etiquettes((('phase', nom),))} "
+                                  f"{phase['secondes']:.6f}")
+        return '\n'.join(lignes) + '\n'
+
+
+def echapper(texte):
+    return texte.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_etiquettes(cle):
+    """{nom="valeur",...} (rien sans étiquette)"""
+    if not cle:
+        return ''
+    return '{' + ','.join(f'{nom}="{echapper(valeur)}"' for nom, valeur in cle) + '}'
+
+
+REGISTRE = Registre()
+compter = REGISTRE.compter
+observer = REGISTRE.observer
+
+
+def phase_profilee(nom):
+    choix = {morceau.strip() for morceau in CONFIG['profil'].split(',')}
+    return nom in choix or 'tout' in choix
+
+
+# Un seul profileur actif à la fois dans le processus (Python 3.12 refuse le second)
+_profil_actif = threading.Lock()
+
+
+@contextmanager
+def phase(nom):
+    """
+    Mesure la durée d'une phase (cumulée si elle est appelée plusieurs fois,
+    même depuis plusieurs threads) ; la profile si STAGES_PROFIL la désigne.
+    Si un autre profil tourne déjà (autre thread, ou phase englobante),
+    la phase est mesurée sans être profilée.
+    """
+    if CONFIG['memoire']:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    profil = None
+    if phase_profilee(nom) and _profil_actif.acquire(blocking=False):
+        profil = cProfile.Profile()
+        profil.enable()
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        if profil is not None:
+            profil.disable()
+            _profil_actif.release()
+        memoire_pic = tracemalloc.get_traced_memory()[1] if CONFIG['memoire'] else None
+        REGISTRE.noter_phase(nom, duree, memoire_pic, profil)
+
+
+@contextmanager
+def chronometre(nom, **valeurs):
+    """Observe la durée du bloc dans l'histogramme nom"""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        observer(nom, time.perf_counter() - debut, **valeurs)
+
+
+def ecrire(rapport=None, prometheus=None):
+    """Écrit le rapport JSON, le fichier Prometheus et les profils demandés"""
+    rapport = rapport or CONFIG['rapport']
+    prometheus = prometheus or CONFIG['prometheus']
+    with open(rapport, 'w', encoding='utf-8') as f:
+        json.dump(REGISTRE.rapport(), f, ensure_ascii=False, indent=1)
+    # Écrit puis renommé : le collecteur ne lit jamais un fichier à moitié écrit
+    with open(prometheus + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(REGISTRE.prometheus())
+    os.replace(prometheus + '.tmp', prometheus)
+    with REGISTRE.verrou:
+        profils = dict(REGISTRE.profils)
+    for nom, statistiques in profils.items():
+        statistiques.dump_stats(f"profil_{nom}.prof")
+    print(f"📈 Mesures du passage : {rapport}, {prometheus}"
+          + (f", {', '.join(f'profil_{nom}.prof' for nom in profils)}" if profils else ''))
+
+
+if __name__ == "__main__":
+    # python metriques.py : résumé du dernier rapport
+    with open(CONFIG['rapport'], 'r', encoding='utf-8') as f:
+        dernier = json.load(f)
+    print(f"Passage du {dernier['debut']} ({dernier['duree_secondes']:.1f} s)")
+    for nom, phase_ in dernier['phases'].items():
+        print(f"   • {nom:20} : {phase_['secondes']:8.2f} s ({phase_['appels']} fois)")
+    print(f"\n{'recherche':50} {'cartes':>7} {'gardées':>8} {'requêtes':>9} {'latence':>9}")
+    for recherche, ligne in dernier['par_recherche'].items():
+        latence = ligne.get('http_latence_secondes', {"nombre": 0, "somme": 0})
+        moyenne = f"{latence['somme'] / latence['nombre']:.2f} s" if latence['nombre'] else '—'
+        print(f"{recherche[:50]:50} {ligne.get('cartes_trouvees', 0):7} {ligne.get('offres_gardees', 0):8} "
+              f"{latence['nombre']:9} {moyenne:>9}")
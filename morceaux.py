@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export de la base en morceaux (dossier export/)
+    export/manifeste.json            liste des morceaux : fichier, empreinte, nombre d'offres
+    export/stages-<empreinte>.json   offres en JSON compact (+ .gz et .br déjà compressés)
+    export/index-<empreinte>.json    index de recherche (index_recherche.py) dans l'ordre des morceaux
+
+index.html affiche le premier morceau tout de suite et charge les autres ensuite.
+Le nom d'un morceau dépend de son contenu : un morceau inchangé garde
+son nom et peut rester indéfiniment en cache. Seul le manifeste change.
+
+Deux découpages :
+    "recence" : dans l'ordre des données, les plus récentes d'abord (ordre
+                de stages_data.json, et ORDER BY id DESC avec SQLite) ; les
+                morceaux sont comptés depuis les plus anciennes, si bien que
+                de nouvelles offres ne changent que le premier morceau
+    "domaine" : un groupe de morceaux par domaine (le plus fourni d'abord)
+
+Activer avec STAGES_MORCEAUX=recence (ou domaine), ou : python morceaux.py recence
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+import index_recherche
+
+DOSSIER_EXPORT = 'export'
+FICHIER_MANIFESTE = 'manifeste.json'
+TAILLE_MORCEAU = 500
+MODES = ('recence', 'domaine')
+VERSION = 1
+
+
+def compresseur_brotli():
+    """Fonction de compression brotli si le module est installé, sinon None"""
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            return None
+    return brotli.compress
+
+
+def decouper(stages, taille=TAILLE_MORCEAU):
+    """Morceaux de taille fixe comptés depuis la fin : seul le premier peut être incomplet"""
+    debut_complets = len(stages) % taille
+    if debut_complets:
+        yield stages[:debut_complets]
+    for debut in range(debut_complets, len(stages), taille):
+        yield stages[debut:debut + taille]
+
+
+def groupes(stages, mode, taille=TAILLE_MORCEAU):
+    """(domaine ou None, offres) pour chaque morceau, dans l'ordre de publication"""
+    if mode == 'recence':
+        for morceau in decouper(stages, taille):
+            yield None, morceau
+        return
+    par_domaine = {}
+    for stage in stages:
+        par_domaine.setdefault(stage.get('domain', ''), []).append(stage)
+    for domaine, offres in sorted(par_domaine.items(), key=lambda x: (-len(x[1]), x[0])):
+        for morceau in decouper(offres, taille):
+            yield domaine, morceau
+
+
+def ecrire_fichier(dossier, prefixe, contenu, brotli_compress):
+    """
+    Écrit <prefixe>-<empreinte>.json et ses versions compressées
+    (rien à faire si le fichier existe : même nom = même contenu)
+    """
+    empreinte = hashlib.sha256(contenu).hexdigest()
+    nom = f"{prefixe}-{empreinte[:16]}.json"
+    chemin = os.path.join(dossier, nom)
+    versions = {'': lambda: contenu, '.gz': lambda: gzip.compress(contenu, compresslevel=9, mtime=0)}
+    if brotli_compress is not None:
+        versions['.br'] = lambda: brotli_compress(contenu)
+    for extension, compresser in versions.items():
+        fichier = chemin + extension
+        if os.path.exists(fichier):
+            continue
+        temporaire = fichier + '.tmp'
+        with open(temporaire, 'wb') as f:
+            f.write(compresser())
+        os.replace(temporaire, fichier)
+    return nom, empreinte
+
+
+def ecrire_morceaux(data, mode='recence', dossier=DOSSIER_EXPORT, taille=TAILLE_MORCEAU):
+    """
+    Écrit les morceaux qui n'existent pas encore, l'index et le manifeste,
+    puis supprime les fichiers qui ne servent plus. Renvoie le manifeste.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Découpage inconnu : {mode} (choix : {', '.join(MODES)})")
+    os.makedirs(dossier, exist_ok=True)
+    brotli_compress = compresseur_brotli()
+
+    morceaux = []
+    ordre = []
+    for domaine, offres in groupes(data.get('stages', []), mode, taille):
+        contenu = json.dumps(offres, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        nom, empreinte = ecrire_fichier(dossier, 'stages', contenu, brotli_compress)
+        morceau = {"fichier": nom, "sha256": empreinte, "nombre": len(offres), "octets": len(contenu)}
+        if domaine is not None:
+            morceau["domaine"] = domaine
+        morceaux.append(morceau)
+        ordre.extend(offres)
+
+    # Les numéros de l'index sont les positions dans les morceaux mis bout à bout
+    index = index_recherche.construire_index({"derniere_maj": data.get('derniere_maj', ''), "stages": ordre})
+    contenu = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    nom_index, empreinte_index = ecrire_fichier(dossier, 'index', contenu, brotli_compress)
+
+    manifeste = {
+        "version": VERSION,
+        "mode": mode,
+        "derniere_maj": data.get('derniere_maj', ''),
+        "nombre": len(ordre),
+        "domaines": index['facettes']['domain'],
+        "index": {"fichier": nom_index, "sha256": empreinte_index},
+        "morceaux": morceaux,
+    }
+    temporaire = os.path.join(dossier, FICHIER_MANIFESTE + '.tmp')
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=1)
+    os.replace(temporaire, os.path.join(dossier, FICHIER_MANIFESTE))
+
+    utiles = {nom_index} | {morceau['fichier'] for morceau in morceaux}
+    for fichier in os.listdir(dossier):
+        base = fichier[:-3] if fichier.endswith(('.gz', '.br')) else fichier
+        if base.startswith(('stages-', 'index-')) and base not in utiles:
+            os.remove(os.path.join(dossier, fichier))
+    return manifeste
+
+
+def retirer_manifeste(dossier=DOSSIER_EXPORT):
+    """Sans manifeste, index.html revient à stages_data.json"""
+    try:
+        os.remove(os.path.join(dossier, FICHIER_MANIFESTE))
+    except FileNotFoundError:
+        pass
+
+
+def publier(data, mode, dossier=DOSSIER_EXPORT):
+    """Export en morceaux si un découpage est choisi, sinon retrait de l'ancien manifeste"""
+    if mode:
+        return ecrire_morceaux(data, mode, dossier)
+    retirer_manifeste(dossier)
+    return None
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'recence'
+    with open('stages_data.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    manifeste = ecrire_morceaux(data, mode)
+    print(f"✅ {len(manifeste['morceaux'])} morceaux ({manifeste['nombre']} offres) dans {DOSSIER_EXPORT}/")
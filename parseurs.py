@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Choix du parseur HTML utilisé par BeautifulSoup
+'lxml' (écrit en C, beaucoup plus rapide) si installé, sinon 'html.parser'.
+
+Choisir le parseur :
+    STAGES_PARSEUR=lxml python scraper_suisse_complet.py
+ou dans le code : parseurs.configurer('html.parser')
+
+Comparer les parseurs sur les pages du cache HTTP (ou sur un fichier) :
+    python parseurs.py
+    python parseurs.py page.html jobup_ch
+"""
+
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+# Ordre de préférence (le plus rapide d'abord)
+PARSEURS = ['lxml', 'html.parser']
+
+CONFIG = {
+    "parseur": os.environ.get('STAGES_PARSEUR', 'auto'),
+}
+
+_choix = {}
+
+
+def parseurs_disponibles():
+    """Parseurs réellement installés, dans l'ordre de préférence"""
+    return [nom for nom in PARSEURS if builder_registry.lookup(nom) is not None]
+
+
+def choisir_parseur(nom=None):
+    """
+    Parseur à utiliser : celui demandé s'il est installé,
+    sinon le plus rapide disponible ('html.parser' existe toujours)
+    """
+    demande = nom or CONFIG['parseur']
+    if demande in _choix:
+        return _choix[demande]
+
+    disponibles = parseurs_disponibles()
+    if demande == 'auto':
+        choix = disponibles[0]
+    elif demande in disponibles:
+        choix = demande
+    else:
+        choix = disponibles[0]
+        print(f"  ⚠️  Parseur '{demande}' indisponible, utilisation de '{choix}'")
+    _choix[demande] = choix
+    return choix
+
+
+def configurer(parseur):
+    """Change le parseur utilisé par toutes les extractions"""
+    CONFIG['parseur'] = parseur
+
+
+def analyser_html(contenu, parseur=None):
+    """Construit l'arbre BeautifulSoup avec le parseur choisi"""
+    return BeautifulSoup(contenu, choisir_parseur(parseur))
+
+
+def pages_du_cache():
+    """(source, url, contenu) pour chaque page gardée dans le cache HTTP"""
+    import cache_http
+    from sources import source_de_page
+
+    dossier = cache_http.CONFIG['dossier']
+    if not os.path.isdir(dossier):
+        return
+    for nom in sorted(os.listdir(dossier)):
+        if not nom.endswith('.json') or nom.endswith('.offres.json'):
+            continue
+        with open(os.path.join(dossier, nom), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        url = meta['url']
+        source = source_de_page(url)
+        contenu = cache_http.lire_corps(url)
+        if source and contenu:
+            yield source, url, contenu
+
+
+def comparer_parseurs(pages, repetitions=3):
+    """
+    Mesure le temps d'analyse HTML par site et par parseur,
+    et vérifie que tous les parseurs donnent les mêmes offres
+    """
+    from extraction import extraire_offres
+
+    disponibles = parseurs_disponibles()
+    ancien_choix = CONFIG['parseur']
+    temps = {}
+    resultats = {}
+    try:
+        for source, url, contenu in pages:
+            for parseur in disponibles:
+                debut = time.perf_counter()
+                for _ in range(repetitions):
+                    analyser_html(contenu, parseur)
+                duree = (time.perf_counter() - debut) / repetitions
+                cle = (source['libelle'], parseur)
+                temps[cle] = temps.get(cle, 0) + duree
+
+                configurer(parseur)
+                resultats.setdefault((url, source['nom']), {})[parseur] = extraire_offres(contenu, url, source)
+    finally:
+        configurer(ancien_choix)
+
+    print(f"\n{'Site':22} " + ' '.join(f"{p:>14}" for p in disponibles))
+    for libelle in sorted({cle[0] for cle in temps}):
+        ligne = ' '.join(f"{temps.get((libelle, p), 0) * 1000:11.1f} ms" for p in disponibles)
+        print(f"{libelle:22} {ligne}")
+
+    differences = [cle for cle, par_parseur in resultats.items()
+                   if any(offres != par_parseur[disponibles[0]] for offres in par_parseur.values())]
+    if differences:
+        print(f"\n⚠️  Résultats différents selon le parseur pour {len(differences)} page(s) :")
+        for url, nom in differences[:10]:
+            print(f"   • {nom} : {url}")
+    else:
+        print(f"\n✅ Offres identiques avec tous les parseurs ({len(resultats)} pages)")
+    return temps, differences
+
+
+if __name__ == "__main__":
+    from sources import get_source
+
+    print(f"Parseurs disponibles : {', '.join(parseurs_disponibles())}")
+    if len(sys.argv) == 3:
+        with open(sys.argv[1], 'rb') as f:
+            pages = [(get_source(sys.argv[2]), sys.argv[1], f.read())]
+    else:
+        pages = list(pages_du_cache())
+        print(f"{len(pages)} pages trouvées dans le cache HTTP")
+    comparer_parseurs(pages)
@@ -5,151 +5,31 @@ Script de scraping FONCTIONNEL pour jobs.ch et autres sites suisses
 Version simplifiée et qui marche vraiment !
 """
 
-import json
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import time
 
-def charger_donnees():
-    """Charge le fichier JSON"""
-    try:
-        with open('stages_data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"derniere_maj": "", "stages": []}
-
-def sauvegarder_donnees(data):
-    """Sauvegarde dans le fichier JSON"""
-    with open('stages_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+from crawl import scraper_sources
+from donnees import charger_donnees, differences, exporter, sauvegarder_donnees
+from doublons import fusionner_quasi_doublons
+from enrichissement import enrichir
+from metriques import compter, ecrire, phase
+from stage import cle_stage
+from statistiques import Statistiques, afficher_classement
 
 def scraper_jobs_ch():
     """
     Scrape jobs.ch - un des sites d'emploi les plus populaires en Suisse
+    (sélecteurs et mots-clés : source "jobs_ch_articles" dans sources.py)
     """
     print("\n🔍 Recherche sur jobs.ch...")
-    stages = []
-    
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
-        # Mots-clés à chercher
-        keywords = ['finance internship', 'stage finance', 'trainee finance']
-        
-        for keyword in keywords:
-            print(f"  → Recherche '{keyword}'...")
-            
-            # URL de recherche jobs.ch
-            url = f"https://www.jobs.ch/en/vacancies/?term={keyword.replace(' ', '+')}&location=Switzerland"
-            
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Chercher les offres (la structure peut changer)
-                    # Ceci est un exemple - il faut adapter selon la vraie structure du site
-                    job_cards = soup.find_all('article', class_='job-item')
-                    
-                    for card in job_cards[:5]:  # Limite à 5 par recherche
-                        try:
-                            # Extraire les informations
-                            title_elem = card.find('h2')
-                            company_elem = card.find('span', class_='company')
-                            location_elem = card.find('span', class_='location')
-                            link_elem = card.find('a', href=True)
-                            
-                            if title_elem and company_elem:
-                                stage = {
-                                    "company": company_elem.text.strip(),
-                                    "title": title_elem.text.strip(),
-                                    "domain": "Finance",  # On suppose Finance vu nos keywords
-                                    "location": location_elem.text.strip() if location_elem else "Switzerland",
-                                    "duration": "6 mois",  # Valeur par défaut
-                                    "startDate": "Variable",
-                                    "link": f"https://www.jobs.ch{link_elem['href']}" if link_elem else url
-                                }
-                                stages.append(stage)
-                        except:
-                            continue
-                    
-                    print(f"    ✓ {len([s for s in stages if s])} offres trouvées")
-                else:
-                    print(f"    ⚠️  Erreur HTTP {response.status_code}")
-                    
-            except Exception as e:
-                print(f"    ⚠️  Erreur: {str(e)[:50]}...")
-            
-            time.sleep(2)  # Pause pour être poli avec le serveur
-        
-    except Exception as e:
-        print(f"  ❌ Erreur générale: {e}")
-    
-    return stages
+    return scraper_sources(['jobs_ch_articles'])
 
 def scraper_indeed_ch():
     """
     Scrape Indeed Suisse - site international avec présence suisse
+    (sélecteurs : source "indeed_ch" dans sources.py)
     """
     print("\n🔍 Recherche sur Indeed CH...")
-    stages = []
-    
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        # URL de recherche Indeed
-        url = "https://ch.indeed.com/jobs?q=finance+internship&l=Switzerland"
-        
-        print("  → Recherche d'offres...")
-        
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Structure Indeed (peut varier)
-                job_cards = soup.find_all('div', class_='job_seen_beacon')
-                
-                for card in job_cards[:10]:  # Limite à 10
-                    try:
-                        title = card.find('h2', class_='jobTitle')
-                        company = card.find('span', class_='companyName')
-                        location = card.find('div', class_='companyLocation')
-                        
-                        if title and company:
-                            # Extraire le lien
-                            link_elem = title.find('a', href=True)
-                            job_key = link_elem['href'] if link_elem else ''
-                            
-                            stage = {
-                                "company": company.text.strip(),
-                                "title": title.text.strip(),
-                                "domain": "Finance",
-                                "location": location.text.strip() if location else "Switzerland",
-                                "duration": "6 mois",
-                                "startDate": "Variable",
-                                "link": f"https://ch.indeed.com{job_key}" if job_key else url
-                            }
-                            stages.append(stage)
-                    except:
-                        continue
-                
-                print(f"  ✓ {len(stages)} offres trouvées")
-            else:
-                print(f"  ⚠️  Erreur HTTP {response.status_code}")
-                
-        except Exception as e:
-            print(f"  ⚠️  Erreur: {str(e)[:50]}...")
-        
-    except Exception as e:
-        print(f"  ❌ Erreur générale: {e}")
-    
-    return stages
+    return scraper_sources(['indeed_ch'])
 
 def nettoyer_doublons(stages):
     """Supprime les doublons basés sur entreprise + titre"""
@@ -157,11 +37,12 @@ def nettoyer_doublons(stages):
     stages_uniques = []
     
     for stage in stages:
-        cle = (stage['company'].lower().strip(), stage['title'].lower().strip())
+        cle = cle_stage(stage)
         if cle not in vus:
             vus.add(cle)
             stages_uniques.append(stage)
     
+    compter('doublons', len(stages) - len(stages_uniques), raison='entreprise_titre')
     return stages_uniques
 
 def fusionner_avec_existants(nouveaux_stages, anciens_stages):
@@ -169,15 +50,22 @@ def fusionner_avec_existants(nouveaux_stages, anciens_stages):
     # Créer un dictionnaire des nouveaux
     nouveaux_dict = {}
     for stage in nouveaux_stages:
-        cle = (stage['company'].lower().strip(), stage['title'].lower().strip())
+        cle = cle_stage(stage)
         nouveaux_dict[cle] = stage
+    nb_nouveaux = len(nouveaux_dict)
     
     # Garder les anciens qui ne sont pas dans les nouveaux
+    remplacees = 0
     for ancien in anciens_stages:
-        cle = (ancien['company'].lower().strip(), ancien['title'].lower().strip())
+        cle = cle_stage(ancien)
         if cle not in nouveaux_dict:
             nouveaux_dict[cle] = ancien
+        else:
+            remplacees += 1
     
+    compter('fusion_offres', nb_nouveaux - remplacees, sorte='nouvelle')
+    compter('fusion_offres', remplacees, sorte='mise_a_jour')
+    compter('fusion_offres', len(nouveaux_dict) - nb_nouveaux, sorte='ancienne')
     return list(nouveaux_dict.values())
 
 def main():
@@ -189,6 +77,7 @@ def main():
     # Charger données existantes
     data = charger_donnees()
     anciens_stages = data.get('stages', [])
+    stats = Statistiques(anciens_stages)
     
     print(f"\n📊 État actuel : {len(anciens_stages)} offres dans la base")
     print("\n⚠️  Note : Ce scraping est basique et peut ne pas capturer toutes les offres.")
@@ -202,19 +91,26 @@ def main():
     print("🌐 DÉBUT DU SCRAPING")
     print("="*70)
     
-    # Jobs.ch
-    nouveaux_stages.extend(scraper_jobs_ch())
-    
-    # Indeed
-    nouveaux_stages.extend(scraper_indeed_ch())
+    with phase('crawl'):
+        # Jobs.ch
+        nouveaux_stages.extend(scraper_jobs_ch())
+        
+        # Indeed
+        nouveaux_stages.extend(scraper_indeed_ch())
     
     # Nettoyer doublons
-    nouveaux_stages = nettoyer_doublons(nouveaux_stages)
+    with phase('doublons'):
+        nouveaux_stages = nettoyer_doublons(nouveaux_stages)
+    
+    # Durée et date de début lues sur la page de chaque offre
+    with phase('enrichissement'):
+        nb_completes = enrichir(nouveaux_stages)
     
     print("\n" + "="*70)
     print("📊 RÉSULTATS DU SCRAPING")
     print("="*70)
     print(f"\n✨ Nouvelles offres trouvées : {len(nouveaux_stages)}")
+    print(f"   ({nb_completes} complétées par leur page de détail)")
     
     # Afficher les nouvelles offres
     if nouveaux_stages:
@@ -227,9 +123,14 @@ def main():
             print(f"\n   ... et {len(nouveaux_stages) - 5} autres offres")
     
     # Fusionner avec existants
-    tous_stages = fusionner_avec_existants(nouveaux_stages, anciens_stages)
+    with phase('doublons'):
+        tous_stages = fusionner_avec_existants(nouveaux_stages, anciens_stages)
+    nb_avant_fusion = len(tous_stages)
+    with phase('quasi_doublons'):
+        tous_stages = fusionner_quasi_doublons(tous_stages)
     
     print(f"\n📈 Total après fusion : {len(tous_stages)} offres")
+    print(f"   ({nb_avant_fusion - len(tous_stages)} quasi-doublons fusionnés)")
     print(f"   (+{len(tous_stages) - len(anciens_stages)} offres)")
     
     # Mettre à jour
@@ -238,7 +139,13 @@ def main():
     data['stages'] = tous_stages
     
     # Sauvegarder
-    sauvegarder_donnees(data)
+    with phase('sauvegarde'):
+        # Seules les offres ajoutées, remplacées ou fusionnées sont écrites
+        sauvegarder_donnees(data, differences(anciens_stages, tous_stages))
+        exporter()
+        # Seules les offres ajoutées ou fusionnées changent les compteurs
+        stats.synchroniser(tous_stages)
+        stats.sauvegarder()
     
     print("\n✅ Fichier stages_data.json mis à jour !")
     
@@ -247,14 +154,12 @@ def main():
     print("📊 STATISTIQUES FINALES")
     print("="*70)
     
-    domaines = {}
-    for stage in tous_stages:
-        domain = stage.get('domain', 'Non spécifié')
-        domaines[domain] = domaines.get(domain, 0) + 1
+    afficher_classement(stats, 'domaine', "Par domaine :")
+    afficher_classement(stats, 'source', "Par site :")
     
-    print("\nPar domaine :")
-    for domain, count in sorted(domaines.items(), key=lambda x: x[1], reverse=True):
-        print(f"   • {domain:25} : {count} offres")
+    # Rapport du passage : requêtes, cartes, doublons par site et par recherche
+    print()
+    ecrire()
     
     print("\n" + "="*70)
     print("🎉 SCRAPING TERMINÉ !")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registre des sites d'emploi
+Chaque site est DÉCRIT ici (URL, recherches, sélecteurs, pagination) :
+ajouter un site = ajouter un appel à enregistrer_source(), sans nouveau code.
+
+Un sélecteur est un dictionnaire :
+    "balises"       : noms de balises acceptées (absent = toutes)
+    "classe"        : morceaux de texte cherchés dans l'attribut class (minuscules)
+    "classe_exacte" : une des classes doit être exactement celle-ci
+    "texte"         : morceaux de texte cherchés dans le texte de la balise
+    "href"          : morceau de texte cherché dans l'attribut href
+    "portee"        : "carte" (défaut), "parent" (chercher depuis le parent de la carte)
+                      ou "soi" (la carte elle-même)
+    "dans"          : un autre sélecteur : chercher seulement dans le premier élément
+                      (de la portée) qui le respecte, ex. le lien DANS le titre
+Un champ peut recevoir une LISTE de sélecteurs : ils sont essayés dans l'ordre.
+"""
+
+import hashlib
+import re
+
+from classification import VERSION_REGLES
+from urls import hote_site
+
+ENTREPRISE_INCONNUE = "Entreprise non spécifiée"
+
+# À changer quand extraction.py change les offres produites
+# (les offres gardées dans le cache HTTP seront recalculées)
+VERSION_EXTRACTION = 5
+
+# Valeurs communes à toutes les sources (surchargées par chaque site si besoin)
+DEFAUTS = {
+    "domaine": "Finance",    # si le titre ne permet pas de trouver le domaine (classification.py)
+    "duree": "6 mois",
+    "debut": "Variable",
+    "lieu_defaut": "Switzerland",
+    "longueur_titre_min": 11,
+    "max_cartes": None,     # offres par page du site : la lecture s'arrête après (None = toute la page)
+    "taille_max": 2 * 1024 * 1024,  # octets lus au plus par page de résultats (lecture_flux.py)
+    "champs_obligatoires": [],
+    "niveaux": [],           # niveaux gardés ("Stage", "Trainee", "Graduate", "Junior") ; vide = tous
+    "lieu_dans_carte": False,   # sans sélecteur "lieu" : chercher la ville dans tout le texte de la carte
+    "lien": {"balises": ['a'], "href": ""},
+    "pagination": {"parametre": "page", "premiere": 1, "pas": 1},
+}
+
+SOURCES = {}
+
+# Valeur du champ 'saisie' des offres entrées par ajouter_stage.py
+SAISIE_MANUELLE = 'manuelle'
+
+
+def enregistrer_source(nom, **config):
+    """Ajoute (ou remplace) un site dans le registre"""
+    source = dict(DEFAUTS)
+    source.update(config)
+    source['nom'] = nom
+    for champ in ('libelle', 'url_recherche', 'base_lien', 'recherches', 'cartes', 'titre'):
+        if champ not in source:
+            raise ValueError(f"Source {nom} : champ '{champ}' manquant")
+    SOURCES[nom] = source
+    return source
+
+
+def get_source(nom):
+    """Renvoie la description d'un site"""
+    try:
+        return SOURCES[nom]
+    except KeyError:
+        raise ValueError(f"Source inconnue : {nom} (disponibles : {', '.join(SOURCES)})")
+
+
+def source_du_lien(lien):
+    """
+    Nom du premier site du registre sur le même hôte que lien (l'hôte lui-même si aucun).
+    Plusieurs sites peuvent partager un hôte : voir source_offre().
+    """
+    hote = hote_site(lien)
+    return next((nom for nom, source in SOURCES.items() if hote_site(source['base_lien']) == hote), hote)
+
+
+def source_offre(stage):
+    """Nom du site d'une offre pour les mesures : celui du crawl (stage.source), sinon d'après son lien"""
+    return getattr(stage, 'source', None) or source_du_lien(stage.get('link', ''))
+
+
+def saisie_manuelle(stage):
+    """Offre entrée à la main : marquée par ajouter_stage.py, ou dont le lien n'est sur aucun site du registre"""
+    return stage.get('saisie') == SAISIE_MANUELLE or source_du_lien(stage.get('link', '')) not in SOURCES
+
+
+def empreinte_source(source):
+    """Empreinte de la description d'un site (change dès qu'un sélecteur change)"""
+    versions = (VERSION_EXTRACTION, VERSION_REGLES)
+    return hashlib.sha1(repr((versions, sorted(source.items()))).encode('utf-8')).hexdigest()
+
+
+def url_page(source, terme, page):
+    """URL de la page 'page' (1, 2, ...) des résultats d'une recherche"""
+    url = source['url_recherche'].format(terme=terme)
+    if page == 1:
+        return url
+    pagination = source['pagination']
+    valeur = pagination['premiere'] + (page - 1) * pagination['pas']
+    separateur = '&' if '?' in url else '?'
+    return f"{url}{separateur}{pagination['parametre']}={valeur}"
+
+
+def source_de_page(url):
+    """
+    Site du registre dont url est une page de résultats (url_page d'un de ses
+    termes), ou None. Toute l'URL est comparée au modèle url_recherche : deux
+    sites sur le même hôte (jobs_ch, jobs_ch_articles) ne sont pas confondus.
+    """
+    for source in SOURCES.values():
+        avant, _, apres = source['url_recherche'].partition('{terme}')
+        parametre = re.escape(source['pagination']['parametre'])
+        motif = f"{re.escape(avant)}[^&#]*{re.escape(apres)}(?:[?&]{parametre}=\\d+)?"
+        if re.fullmatch(motif, url):
+            return source
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Sites suisses (scraper_suisse_complet.py)
+# ---------------------------------------------------------------------------
+
+enregistrer_source(
+    "jobs_ch",
+    libelle="Jobs.ch",
+    url_recherche="https://www.jobs.ch/en/vacancies/?term={terme}",
+    base_lien="https://www.jobs.ch",
+    recherches=['finance+internship+zurich', 'stage+finance+geneva', 'trainee+finance+basel'],
+    # Chaque lien vers une offre est une carte
+    cartes={"balises": ['a'], "href": '/job/'},
+    max_cartes=20,
+    titre={"portee": "soi"},
+    entreprise={"balises": ['span'], "classe": ['company'], "portee": "parent"},
+    lien={"portee": "soi"},
+)
+
+enregistrer_source(
+    "jobup_ch",
+    libelle="Jobup.ch",
+    url_recherche="https://www.jobup.ch/en/jobs/?term={terme}",
+    base_lien="https://www.jobup.ch",
+    recherches=['finance+internship', 'stage+finance', 'financial+analyst+trainee'],
+    cartes={"balises": ['article', 'div'], "classe": ['job']},
+    max_cartes=20,
+    titre={"balises": ['h2', 'h3', 'a']},
+    entreprise={"balises": ['span', 'div', 'p'], "classe": ['company', 'employer']},
+    lieu={"balises": ['span', 'div'], "classe": ['location']},
+)
+
+enregistrer_source(
+    "travail_swiss",
+    libelle="Travail.swiss",
+    url_recherche="https://www.travail.swiss/job-search/?keywords={terme}",
+    base_lien="https://www.travail.swiss",
+    recherches=['finance+internship', 'stage+finance', 'stagiaire+finance'],
+    cartes={"balises": ['article', 'li', 'div'], "classe": ['job', 'listing']},
+    max_cartes=20,
+    titre={"balises": ['h2', 'h3', 'h4', 'a', 'strong']},
+    entreprise=[
+        {"balises": ['span', 'div', 'p'], "texte": ['SA', 'AG', 'GmbH', 'Ltd']},
+        {"balises": ['span', 'div'], "classe": ['company']},
+    ],
+    lieu_dans_carte=True,
+)
+
+enregistrer_source(
+    "efinancialcareers",
+    libelle="eFinancialCareers",
+    url_recherche="https://www.efinancialcareers.ch/jobs/search?keywords={terme}&location=Switzerland",
+    base_lien="https://www.efinancialcareers.ch",
+    recherches=['internship', 'trainee', 'graduate'],
+    cartes={"balises": ['article', 'div', 'li'], "classe": ['job', 'result']},
+    max_cartes=20,
+    titre=[
+        {"balises": ['h2', 'h3', 'a'], "classe": ['title']},
+        {"balises": ['h2', 'h3', 'a']},
+    ],
+    entreprise=[
+        {"balises": ['span', 'div', 'p'], "classe": ['company', 'employer']},
+        {"balises": ['span', 'div'], "texte": ['Bank', 'Group', 'AG', 'SA']},
+    ],
+    lieu={"balises": ['span', 'div'], "classe": ['location']},
+    # Garder seulement les stages/internships
+    niveaux=['Stage', 'Trainee', 'Graduate'],
+)
+
+# ---------------------------------------------------------------------------
+# Variantes utilisées par scraper_reel.py
+# ---------------------------------------------------------------------------
+
+enregistrer_source(
+    "jobs_ch_articles",
+    libelle="Jobs.ch",
+    url_recherche="https://www.jobs.ch/en/vacancies/?term={terme}&location=Switzerland",
+    base_lien="https://www.jobs.ch",
+    recherches=['finance+internship', 'stage+finance', 'trainee+finance'],
+    cartes={"balises": ['article'], "classe_exacte": 'job-item'},
+    max_cartes=20,
+    titre={"balises": ['h2']},
+    entreprise={"balises": ['span'], "classe_exacte": 'company'},
+    lieu={"balises": ['span'], "classe_exacte": 'location'},
+    champs_obligatoires=['entreprise'],
+    longueur_titre_min=1,
+)
+
+enregistrer_source(
+    "indeed_ch",
+    libelle="Indeed CH",
+    url_recherche="https://ch.indeed.com/jobs?q={terme}&l=Switzerland",
+    base_lien="https://ch.indeed.com",
+    recherches=['finance+internship'],
+    cartes={"balises": ['div'], "classe_exacte": 'job_seen_beacon'},
+    # La page suivante commence 10 offres plus loin (pagination "start")
+    max_cartes=10,
+    titre={"balises": ['h2'], "classe_exacte": 'jobTitle'},
+    # Le lien de l'offre est celui du titre (pas le premier lien de la carte)
+    lien={"balises": ['a'], "href": "", "dans": {"balises": ['h2'], "classe_exacte": 'jobTitle'}},
+    entreprise={"balises": ['span'], "classe_exacte": 'companyName'},
+    lieu={"balises": ['div'], "classe_exacte": 'companyLocation'},
+    champs_obligatoires=['entreprise'],
+    longueur_titre_min=1,
+    pagination={"parametre": "start", "premiere": 0, "pas": 10},
+)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Une offre de stage
+Stage garde les 7 champs dans des emplacements fixes (__slots__) au lieu
+d'un dictionnaire par offre. Les valeurs qui se répètent (domaine, ville,
+durée, début, entreprise) sont « internées » : toutes les offres "Finance"
+partagent la même chaîne. La clé de dédoublonnage (entreprise, titre) en
+minuscules n'est calculée qu'une fois.
+
+Une offre se lit comme un dictionnaire (stage['title'], stage.get('domain'),
+stage.items(), dict(stage)...) : le code existant fonctionne tel quel.
+Elle est convertie en vrai dictionnaire pour être écrite en JSON (en_dict).
+"""
+
+import sys
+
+# Champs d'une offre, dans l'ordre du fichier JSON
+CHAMPS = ('company', 'title', 'domain', 'location', 'duration', 'startDate', 'link')
+# Champs aux valeurs répétées : une seule copie de chaque valeur en mémoire
+CHAMPS_INTERNES = frozenset({'company', 'domain', 'location', 'duration', 'startDate'})
+
+
+def _interner(champ, valeur):
+    if champ in CHAMPS_INTERNES and type(valeur) is str:
+        return sys.intern(valeur)
+    return valeur
+
+
+class Stage:
+    """Offre de stage (un champ à None est un champ absent)"""
+
+    __slots__ = CHAMPS + ('extras', '_cle', 'source')
+
+    def __init__(self, company=None, title=None, domain=None, location=None,
+                 duration=None, startDate=None, link=None, **extras):
+        self.company = _interner('company', company)
+        self.title = title
+        self.domain = _interner('domain', domain)
+        self.location = _interner('location', location)
+        self.duration = _interner('duration', duration)
+        self.startDate = _interner('startDate', startDate)
+        self.link = link
+        # Champs supplémentaires (rares) : un dictionnaire seulement s'il y en a
+        self.extras = extras or None
+        self._cle = None
+        # Nom du site (registre sources.py) qui a trouvé l'offre pendant ce passage ;
+        # ni champ ni clé : il n'est pas écrit dans le JSON
+        self.source = None
+
+    @classmethod
+    def depuis(cls, stage):
+        """Stage à partir d'un dictionnaire (un Stage est rendu tel quel)"""
+        if isinstance(stage, cls):
+            return stage
+        return cls(**stage)
+
+    @property
+    def cle(self):
+        """Clé de dédoublonnage (entreprise, titre) normalisée, calculée une fois"""
+        if self._cle is None:
+            self._cle = ((self.company or '').lower().strip(), (self.title or '').lower().strip())
+        return self._cle
+
+    def en_dict(self):
+        """Dictionnaire prêt pour le JSON (mêmes clés qu'avant)"""
+        return {cle: self[cle] for cle in self.keys()}
+
+    # Interface dictionnaire
+
+    def keys(self):
+        cles = [champ for champ in CHAMPS if getattr(self, champ) is not None]
+        if self.extras:
+            cles.extend(self.extras)
+        return cles
+
+    def __getitem__(self, cle):
+        if cle in CHAMPS:
+            valeur = getattr(self, cle)
+            if valeur is not None:
+                return valeur
+        elif self.extras and cle in self.extras:
+            return self.extras[cle]
+        raise KeyError(cle)
+
+    def __setitem__(self, cle, valeur):
+        if cle in CHAMPS:
+            setattr(self, cle, _interner(cle, valeur))
+            if cle in ('company', 'title'):
+                self._cle = None
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[cle] = valeur
+
+    def get(self, cle, defaut=None):
+        try:
+            return self[cle]
+        except KeyError:
+            return defaut
+
+    def __contains__(self, cle):
+        try:
+            self[cle]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(cle, self[cle]) for cle in self.keys()]
+
+    def values(self):
+        return [self[cle] for cle in self.keys()]
+
+    def __eq__(self, autre):
+        if isinstance(autre, (Stage, dict)):
+            return self.en_dict() == dict(autre)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Stage({self.en_dict()!r})"
+
+
+def cle_stage(stage):
+    """Clé (entreprise, titre) normalisée d'un Stage ou d'un dictionnaire"""
+    if isinstance(stage, Stage):
+        return stage.cle
+    return (stage['company'].lower().strip(), stage['title'].lower().strip())
+
+
+def en_stages(stages):
+    """Liste de Stage à partir de dictionnaires (ou de Stage)"""
+    return [Stage.depuis(stage) for stage in stages]
+
+
+def en_dicts(stages):
+    """Liste de dictionnaires à partir de Stage (ou de dictionnaires)"""
+    return [stage.en_dict() if isinstance(stage, Stage) else stage for stage in stages]
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistiques des offres par domaine, ville, canton, site et semaine
+Les offres sont rangées en colonnes : chaque valeur distincte (un domaine,
+une ville...) reçoit un numéro, et chaque colonne est un tableau de numéros.
+Un comptage croisé (domaine × ville, site × semaine...) se fait en une
+seule passe sur ces tableaux, avec NumPy s'il est installé.
+
+Les résultats sont gardés en mémoire : ajouter, remplacer ou retirer une
+offre ne met à jour que ses propres compteurs, sans tout recompter.
+Les lignes des offres retirées sont supprimées à chaque sauvegarde.
+
+La semaine est celle où l'offre a été vue pour la première fois ; elle est
+gardée dans stages_semaines.json (supprimer ce fichier pour repartir de zéro).
+
+Usage : python statistiques.py [dimension ...]   (ex. : domaine ville)
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import compress
+
+from localisation import canton
+from sources import source_offre
+from stage import cle_stage
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FICHIER_SEMAINES = 'stages_semaines.json'
+NON_SPECIFIE = 'Non spécifié'
+SEPARATEUR_CLE = '\x1f'
+
+
+def semaine_courante():
+    annee, semaine, _ = date.today().isocalendar()
+    return f"{annee}-S{semaine:02d}"
+
+
+def site_offre(stage):
+    """Site d'où vient l'offre (nom du registre, comme dans les mesures), "manuel" si elle n'a pas de lien"""
+    if not stage.get('link', '').startswith(('http://', 'https://')):
+        return 'manuel'
+    return source_offre(stage)
+
+
+# Valeur d'une offre pour chaque dimension (semaine : voir Statistiques.semaine)
+DIMENSIONS = {
+    "domaine": lambda stage: stage.get('domain') or NON_SPECIFIE,
+    "ville": lambda stage: stage.get('location') or NON_SPECIFIE,
+    "canton": lambda stage: canton(stage.get('location', '')) or NON_SPECIFIE,
+    "source": site_offre,
+}
+TOUTES_DIMENSIONS = (*DIMENSIONS, 'semaine')
+
+
+class Statistiques:
+    """Comptages croisés des offres, mis à jour offre par offre"""
+
+    def __init__(self, stages=(), chemin_semaines=FICHIER_SEMAINES):
+        self.chemin_semaines = chemin_semaines
+        try:
+            with open(chemin_semaines, 'r', encoding='utf-8') as f:
+                self.semaines = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.semaines = {}
+        # Par dimension : valeurs distinctes, leur numéro, et la colonne des numéros
+        self.valeurs = {dimension: [] for dimension in TOUTES_DIMENSIONS}
+        self.numeros = {dimension: {} for dimension in TOUTES_DIMENSIONS}
+        self.colonnes = {dimension: array('I') for dimension in TOUTES_DIMENSIONS}
+        self.actives = bytearray()   # 0 = ligne d'une offre remplacée ou retirée
+        self.lignes = {}             # clé de l'offre -> ligne
+        self.offres = []             # offre de chaque ligne (pour reconnaître un remplacement)
+        self.cache = {}              # dimensions -> Counter des n-uplets de numéros
+        for stage in stages:
+            self.ajouter(stage)
+
+    def __len__(self):
+        return len(self.lignes)
+
+    def semaine(self, stage):
+        """Semaine de première apparition (notée la première fois que l'offre est vue)"""
+        return self.semaines.setdefault(SEPARATEUR_CLE.join(cle_stage(stage)), semaine_courante())
+
+    def _numero(self, dimension, valeur):
+        numeros = self.numeros[dimension]
+        numero = numeros.get(valeur)
+        if numero is None:
+            numero = numeros[valeur] = len(numeros)
+            self.valeurs[dimension].append(valeur)
+        return numero
+
+    def _codes(self, ligne, dimensions):
+        return tuple(self.colonnes[dimension][ligne] for dimension in dimensions)
+
+    def ajouter(self, stage):
+        """Ajoute une offre (remplace celle de même clé)"""
+        cle = cle_stage(stage)
+        if cle in self.lignes:
+            if self.offres[self.lignes[cle]] is stage:
+                return
+            self.retirer(stage)
+        ligne = len(self.actives)
+        for dimension, valeur_de in DIMENSIONS.items():
+            self.colonnes[dimension].append(self._numero(dimension, valeur_de(stage)))
+        self.colonnes['semaine'].append(self._numero('semaine', self.semaine(stage)))
+        self.actives.append(1)
+        self.offres.append(stage)
+        self.lignes[cle] = ligne
+        for dimensions, compteur in self.cache.items():
+            compteur[self._codes(ligne, dimensions)] += 1
+
+    def retirer(self, stage):
+        """Retire l'offre de même clé (rien si elle n'y est pas)"""
+        ligne = self.lignes.pop(cle_stage(stage), None)
+        if ligne is None:
+            return
+        self.actives[ligne] = 0
+        self.offres[ligne] = None
+        for dimensions, compteur in self.cache.items():
+            codes = self._codes(ligne, dimensions)
+            compteur[codes] -= 1
+            if not compteur[codes]:
+                del compteur[codes]
+
+    def synchroniser(self, stages):
+        """
+        Met les compteurs à jour pour la nouvelle liste d'offres (après une
+        fusion) : seules les offres ajoutées, remplacées ou disparues comptent
+        """
+        cles = set()
+        for stage in stages:
+            cles.add(cle_stage(stage))
+            self.ajouter(stage)
+        for cle in [cle for cle in self.lignes if cle not in cles]:
+            self.retirer(self.offres[self.lignes[cle]])
+
+    def _compter(self, dimensions):
+        """Un passage sur les colonnes : Counter des n-uplets de numéros"""
+        if not self.lignes:
+            return Counter()
+        if np is not None:
+            actives = np.frombuffer(self.actives, dtype=np.uint8).astype(bool)
+            # Les numéros des dimensions sont combinés en un seul entier par ligne
+            combine = np.zeros(int(actives.sum()), dtype=np.int64)
+            tailles = []
+            for dimension in dimensions:
+                taille = max(len(self.valeurs[dimension]), 1)
+                colonne = np.frombuffer(self.colonnes[dimension], dtype=np.uint32)[actives]
+                combine = combine * taille + colonne
+                tailles.append(taille)
+            uniques, nombres = np.unique(combine, return_counts=True)
+            compteur = Counter()
+            for combine_unique, nombre in zip(uniques.tolist(), nombres.tolist()):
+                codes = []
+                for taille in reversed(tailles):
+                    combine_unique, code = divmod(combine_unique, taille)
+                    codes.append(code)
+                compteur[tuple(reversed(codes))] = nombre
+            return compteur
+        colonnes = [compress(self.colonnes[dimension], self.actives) for dimension in dimensions]
+        return Counter(zip(*colonnes))
+
+    def compter(self, *dimensions):
+        """
+        {(valeur, ...): nombre d'offres} pour les dimensions demandées,
+        ou {valeur: nombre} pour une seule dimension
+        """
+        inconnues = [dimension for dimension in dimensions if dimension not in TOUTES_DIMENSIONS]
+        if inconnues or not dimensions:
+            raise ValueError(f"Dimensions possibles : {', '.join(TOUTES_DIMENSIONS)}")
+        if dimensions not in self.cache:
+            self.cache[dimensions] = self._compter(dimensions)
+        resultat = {}
+        for codes, nombre in self.cache[dimensions].items():
+            valeurs = tuple(self.valeurs[dimension][code] for dimension, code in zip(dimensions, codes))
+            resultat[valeurs[0] if len(dimensions) == 1 else valeurs] = nombre
+        return resultat
+
+    def classement(self, *dimensions, limite=None):
+        """[(valeur, nombre)] du plus fréquent au moins fréquent"""
+        return sorted(self.compter(*dimensions).items(), key=lambda x: x[1], reverse=True)[:limite]
+
+    def compacter(self):
+        """
+        Supprime les lignes des offres remplacées ou retirées. Les numéros des
+        valeurs ne changent pas : les comptages en cache restent justes.
+        """
+        if len(self.lignes) == len(self.actives):
+            return
+        for dimension in TOUTES_DIMENSIONS:
+            self.colonnes[dimension] = array('I', compress(self.colonnes[dimension], self.actives))
+        self.offres = list(compress(self.offres, self.actives))
+        self.lignes = {cle_stage(stage): ligne for ligne, stage in enumerate(self.offres)}
+        self.actives = bytearray(b'\x01') * len(self.offres)
+
+    def sauvegarder(self):
+        """
+        Garde les semaines de première apparition (fichier remplacé d'un coup),
+        sans celles des offres retirées, dont les lignes sont aussi supprimées
+        """
+        self.compacter()
+        presentes = {SEPARATEUR_CLE.join(cle) for cle in self.lignes}
+        self.semaines = {cle: semaine for cle, semaine in self.semaines.items() if cle in presentes}
+        temporaire = self.chemin_semaines + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.semaines, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporaire, self.chemin_semaines)
+
+
+def afficher_classement(stats, dimension, titre, limite=None):
+    print(f"\n{titre}")
+    for valeur, nombre in stats.classement(dimension, limite=limite):
+        print(f"   • {valeur:25} : {nombre} offres")
+
+
+if __name__ == "__main__":
+    from donnees import charger_donnees
+
+    dimensions = tuple(sys.argv[1:]) or ('domaine',)
+    stats = Statistiques(charger_donnees().get('stages', []))
+    print(f"{len(stats)} offres (NumPy : {'oui' if np is not None else 'non'})")
+    for valeurs, nombre in stats.classement(*dimensions):
+        print(f"   {' × '.join(valeurs) if len(dimensions) > 1 else valeurs:50} : {nombre}")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage des offres dans une base SQLite (stages.db)
+Chaque offre est une ligne : ajouter ou modifier une offre ne réécrit
+que cette ligne. stages_data.json (lu par index.html) est produit
+par exporter_json().
+"""
+
+import json
+import sqlite3
+
+from stage import CHAMPS, cle_stage
+
+FICHIER_BASE = 'stages.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stages (
+    id          INTEGER PRIMARY KEY,
+    cle_company TEXT NOT NULL,
+    cle_title   TEXT NOT NULL,
+    company     TEXT,
+    title       TEXT,
+    domain      TEXT,
+    location    TEXT,
+    duration    TEXT,
+    startDate   TEXT,
+    link        TEXT,
+    extras      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_stages_cle ON stages (cle_company, cle_title);
+CREATE INDEX IF NOT EXISTS idx_stages_link ON stages (link);
+CREATE INDEX IF NOT EXISTS idx_stages_domain ON stages (domain);
+CREATE INDEX IF NOT EXISTS idx_stages_location ON stages (location);
+CREATE TABLE IF NOT EXISTS meta (
+    cle    TEXT PRIMARY KEY,
+    valeur TEXT
+);
+"""
+
+# Insertion ou mise à jour selon la clé (entreprise, titre) normalisée.
+# La clause WHERE évite de réécrire une ligne qui n'a pas changé.
+UPSERT = f"""
+INSERT INTO stages (cle_company, cle_title, {', '.join(CHAMPS)}, extras)
+VALUES (?, ?, {', '.join('?' for _ in CHAMPS)}, ?)
+ON CONFLICT (cle_company, cle_title) DO UPDATE SET
+    {', '.join(f'{champ} = excluded.{champ}' for champ in CHAMPS)},
+    extras = excluded.extras
+WHERE {' OR '.join(f'{champ} IS NOT excluded.{champ}' for champ in (*CHAMPS, 'extras'))}
+"""
+
+
+def ouvrir(chemin=FICHIER_BASE):
+    """Ouvre (ou crée) la base"""
+    conn = sqlite3.connect(chemin)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _ligne(stage):
+    """Valeurs SQL d'une offre (les champs inconnus vont dans 'extras')"""
+    extras = {cle: valeur for cle, valeur in stage.items() if cle not in CHAMPS}
+    return (*cle_stage(stage), *(stage.get(champ) for champ in CHAMPS),
+            json.dumps(extras, ensure_ascii=False) if extras else None)
+
+
+def _stage(ligne):
+    """Offre (dictionnaire) à partir d'une ligne SQL"""
+    stage = {champ: valeur for champ, valeur in zip(CHAMPS, ligne[:-1]) if valeur is not None}
+    if ligne[-1]:
+        stage.update(json.loads(ligne[-1]))
+    return stage
+
+
+def enregistrer_stages(conn, stages):
+    """
+    Ajoute ou met à jour un lot d'offres en UNE transaction.
+    stages est dans l'ordre d'arrivée : la dernière offre nouvelle reçoit
+    le plus grand id, c'est-à-dire la première place dans lire_stages().
+    Renvoie le nombre de lignes réellement écrites.
+    """
+    avant = conn.total_changes
+    with conn:
+        conn.executemany(UPSERT, (_ligne(stage) for stage in stages))
+    return conn.total_changes - avant
+
+
+def supprimer_absents(conn, stages):
+    """
+    Supprime les lignes dont la clé n'est plus dans stages
+    (offres fusionnées avec un quasi-doublon). Renvoie le nombre de lignes supprimées.
+    """
+    with conn:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS cles_gardees (cle_company TEXT, cle_title TEXT)")
+        conn.execute("DELETE FROM cles_gardees")
+        conn.executemany("INSERT INTO cles_gardees VALUES (?, ?)", (cle_stage(stage) for stage in stages))
+        curseur = conn.execute(
+            "DELETE FROM stages WHERE (cle_company, cle_title) NOT IN "
+            "(SELECT cle_company, cle_title FROM cles_gardees)"
+        )
+        conn.execute("DELETE FROM cles_gardees")
+    return curseur.rowcount
+
+
+def supprimer_cles(conn, cles):
+    """Supprime les lignes de ces clés (entreprise, titre) normalisées ; renvoie le nombre supprimé"""
+    avant = conn.total_changes
+    with conn:
+        conn.executemany("DELETE FROM stages WHERE cle_company = ? AND cle_title = ?", cles)
+    return conn.total_changes - avant
+
+
+def lire_stages(conn):
+    """Toutes les offres, les plus récentes d'abord (comme stages_data.json)"""
+    curseur = conn.execute(f"SELECT {', '.join(CHAMPS)}, extras FROM stages ORDER BY id DESC")
+    return [_stage(ligne) for ligne in curseur]
+
+
+def chercher_par_lien(conn, link):
+    """Offre ayant ce lien (ou None)"""
+    ligne = conn.execute(f"SELECT {', '.join(CHAMPS)}, extras FROM stages WHERE link = ?", (link,)).fetchone()
+    return _stage(ligne) if ligne else None
+
+
+def compter(conn):
+    """Nombre d'offres dans la base"""
+    return conn.execute("SELECT COUNT(*) FROM stages").fetchone()[0]
+
+
+def lire_meta(conn, cle, defaut=""):
+    """Valeur d'un réglage de la base (ex. 'derniere_maj')"""
+    ligne = conn.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+    return ligne[0] if ligne else defaut
+
+
+def ecrire_meta(conn, cle, valeur):
+    """Change un réglage de la base"""
+    with conn:
+        conn.execute("INSERT INTO meta (cle, valeur) VALUES (?, ?) "
+                     "ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur", (cle, valeur))
+
+
+def est_vide(conn):
+    """Vrai si la base vient d'être créée"""
+    return conn.execute("SELECT 1 FROM stages LIMIT 1").fetchone() is None and not lire_meta(conn, 'derniere_maj')
+
+
+def importer_json(conn, chemin):
+    """Remplit la base à partir d'un fichier stages_data.json existant"""
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    ecrire_meta(conn, 'derniere_maj', data.get('derniere_maj', ''))
+    # Le fichier commence par les plus récentes : elles sont ajoutées en dernier
+    return enregistrer_stages(conn, reversed(data.get('stages', [])))
+
+
+def exporter_json(conn, chemin):
+    """Écrit le fichier JSON lu par index.html (même format qu'avant) et renvoie son contenu"""
+    data = {"derniere_maj": lire_meta(conn, 'derniere_maj'), "stages": lire_stages(conn)}
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return data
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Couche HTTP commune à tous les scrapers
+Une seule session partagée : connexions gardées ouvertes (keep-alive),
+pool limité par site, compression gzip/brotli et timeouts réglables.
+Les pages sont gardées dans un cache sur disque (voir cache_http.py).
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import cache_http
+
+# Réglages (modifiables avec configurer())
+CONFIG = {
+    "sites_en_cache": 10,           # nombre de sites dont on garde les connexions
+    "connexions_par_site": 4,       # taille maximale du pool pour un même site
+    "bloquer_si_pool_plein": True,  # attendre une connexion libre plutôt qu'en ouvrir une de plus
+    "timeout_connexion": 5,
+    "timeout_lecture": 15,
+    "cache": True,                  # requêtes conditionnelles avec cache_http
+    "user_agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+_session = None
+_verrou = threading.Lock()
+
+
+def encodages_acceptes():
+    """gzip/deflate toujours, brotli seulement si le module est installé"""
+    encodages = ['gzip', 'deflate']
+    try:
+        import brotli  # noqa: F401
+        encodages.append('br')
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodages.append('br')
+        except ImportError:
+            pass
+    return ', '.join(encodages)
+
+
+def get_headers():
+    """Headers envoyés avec chaque requête"""
+    return {
+        'User-Agent': CONFIG['user_agent'],
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9,fr;q=0.8',
+        'Accept-Encoding': encodages_acceptes(),
+        'Connection': 'keep-alive',
+    }
+
+
+def creer_session():
+    """Construit une session avec un pool de connexions borné par site"""
+    session = requests.Session()
+    adaptateur = HTTPAdapter(
+        pool_connections=CONFIG['sites_en_cache'],
+        pool_maxsize=CONFIG['connexions_par_site'],
+        pool_block=CONFIG['bloquer_si_pool_plein'],
+    )
+    session.mount('https://', adaptateur)
+    session.mount('http://', adaptateur)
+    session.headers.update(get_headers())
+    return session
+
+
+def get_session():
+    """Renvoie la session partagée (créée au premier appel)"""
+    global _session
+    with _verrou:
+        if _session is None:
+            _session = creer_session()
+        return _session
+
+
+def configurer(**reglages):
+    """
+    Change les réglages, par exemple :
+    configurer(connexions_par_site=2, timeout_lecture=30)
+    La session est recréée au prochain appel.
+    """
+    inconnus = set(reglages) - set(CONFIG)
+    if inconnus:
+        raise ValueError(f"Réglages inconnus : {', '.join(sorted(inconnus))}")
+    CONFIG.update(reglages)
+    fermer()
+
+
+def fermer():
+    """Ferme toutes les connexions ouvertes"""
+    global _session
+    with _verrou:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def reponse_depuis_cache(url, corps, response_304):
+    """Reconstruit une réponse 200 à partir de la copie locale"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = corps
+    response.headers.update(response_304.headers)
+    response.encoding = response_304.encoding
+    # Permet au moteur de réutiliser les offres déjà extraites
+    response.non_modifie = True
+    return response
+
+
+def lire_en_flux(response, lecteur):
+    """
+    Corps d'une réponse demandée en flux, lu par lecteur(response) -> (octets, raison).
+    Si le lecteur s'arrête avant la fin, response.tronquee donne la raison
+    et la connexion est fermée (le reste n'est pas téléchargé).
+    """
+    try:
+        corps, raison = lecteur(response)
+    finally:
+        response.close()
+    response._content = corps
+    response._content_consumed = True
+    response.tronquee = raison
+    return response
+
+
+def get(url, timeout=None, utiliser_cache=None, lecteur=None, **kwargs):
+    """
+    GET à travers la session partagée (connexions réutilisées).
+    Avec le cache : envoie If-None-Match / If-Modified-Since et,
+    sur une réponse 304, renvoie la page gardée sur disque.
+    Avec un lecteur (voir lecture_flux.py) : le corps est lu par morceaux et
+    la lecture peut s'arrêter avant la fin ; une page tronquée n'est pas gardée.
+    """
+    if timeout is None:
+        timeout = (CONFIG['timeout_connexion'], CONFIG['timeout_lecture'])
+    if utiliser_cache is None:
+        utiliser_cache = CONFIG['cache']
+    if lecteur is not None:
+        kwargs['stream'] = True
+    session = get_session()
+
+    if not utiliser_cache:
+        response = session.get(url, timeout=timeout, **kwargs)
+        return lire_en_flux(response, lecteur) if lecteur else response
+
+    en_tetes_appelant = kwargs.pop('headers', None) or {}
+    conditionnels = cache_http.en_tetes_conditionnels(url)
+    response = session.get(url, timeout=timeout, headers={**en_tetes_appelant, **conditionnels}, **kwargs)
+
+    if response.status_code == 304 and conditionnels:
+        response.close()
+        corps = cache_http.lire_corps(url)
+        if corps is None:
+            # Copie locale perdue : sans ses validateurs, la page entière est
+            # redemandée et gardée à nouveau (sinon : un 304 puis un GET à chaque passage)
+            cache_http.oublier(url)
+            return get(url, timeout=timeout, utiliser_cache=True, lecteur=lecteur,
+                       headers=en_tetes_appelant, **kwargs)
+        cache_http.rafraichir(url, response)
+        return reponse_depuis_cache(url, corps, response)
+
+    if lecteur is not None:
+        lire_en_flux(response, lecteur)
+    if response.status_code == 200 and not getattr(response, 'tronquee', None):
+        cache_http.enregistrer(url, response)
+    return response
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adresses des offres : forme canonique et identifiant
+    canoniser(url)          lien propre (sans paramètres de suivi, sans #ancre)
+    identifiant_offre(url)  "jobs.ch:<numéro>" : la même offre a toujours le même
+                            identifiant, quel que soit le chemin qui y mène
+
+IndexIdentifiants garde (dans liens_connus.bin) l'empreinte des offres déjà
+vues : une carte dont l'offre est connue est ignorée avant d'être analysée.
+Supprimer ce fichier pour tout relire.
+"""
+
+import hashlib
+import os
+import re
+from array import array
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+FICHIER_INDEX = 'liens_connus.bin'
+
+# Identifiants de clic (publicité, e-mails) : retirés sur tous les sites
+PARAMETRES_SUIVI = {
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi',
+}
+# Paramètres de campagne (Google Analytics, Matomo) : retirés sur tous les sites
+PREFIXES_SUIVI = ('utm_', 'pk_', 'mtm_')
+# Noms trop courants pour être retirés partout ("source", "from"...) :
+# seulement sur les sites où l'on sait qu'ils ne servent qu'au suivi (hôte sans "www.")
+PARAMETRES_SUIVI_PAR_SITE = {
+    "jobs.ch": {'source', 'ref', 'referrer', 'origin', 'searchid', 'trackingid', 'tracking'},
+    "jobup.ch": {'source', 'ref', 'referrer', 'origin', 'searchid', 'trackingid', 'tracking'},
+    "efinancialcareers.ch": {'src', 'trk', 'campaign', 'cmp'},
+    "ch.indeed.com": {'from', 'tk', 'sid', 'advn', 'adid', 'xpse', 'xfps', 'xkcb'},
+}
+
+PORTS_PAR_DEFAUT = {'http': 80, 'https': 443}
+
+UUID = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+# Identifiant d'une offre selon le site (hôte sans "www.")
+# Chaque motif lit le chemin ; "parametres" lit la requête
+MOTIFS_IDENTIFIANT = {
+    "jobs.ch": {"chemin": re.compile(rf'/(?:detail|job)/({UUID}|\d+)')},
+    "jobup.ch": {"chemin": re.compile(rf'/(?:detail|job)/({UUID}|\d+)')},
+    "travail.swiss": {"chemin": re.compile(rf'/job-search/({UUID})')},
+    "job-room.ch": {"chemin": re.compile(rf'/job-search/({UUID})')},
+    "efinancialcareers.ch": {"chemin": re.compile(r'\.id(\d+)')},
+    "ch.indeed.com": {"parametres": ('jk', 'vjk')},
+}
+
+
+def est_parametre_suivi(nom, site=''):
+    """site : hôte sans "www." (voir hote_site), pour les paramètres propres à un site"""
+    nom = nom.lower()
+    return (nom in PARAMETRES_SUIVI or nom.startswith(PREFIXES_SUIVI)
+            or nom in PARAMETRES_SUIVI_PAR_SITE.get(site, ()))
+
+
+def canoniser(url, base=None):
+    """
+    Lien absolu et propre : schéma et hôte en minuscules, port par défaut
+    retiré, paramètres de suivi et ancre supprimés, paramètres triés
+    """
+    if base:
+        url = urljoin(base, url)
+    morceaux = urlsplit(url.strip())
+    schema = morceaux.scheme.lower()
+    hote = (morceaux.hostname or '').rstrip('.')
+    if morceaux.port and morceaux.port != PORTS_PAR_DEFAUT.get(schema):
+        hote = f"{hote}:{morceaux.port}"
+    chemin = re.sub(r'/{2,}', '/', morceaux.path) or '/'
+    site = hote[4:] if hote.startswith('www.') else hote
+    parametres = sorted((nom, valeur) for nom, valeur in parse_qsl(morceaux.query, keep_blank_values=True)
+                        if not est_parametre_suivi(nom, site))
+    return urlunsplit((schema, hote, chemin, urlencode(parametres), ''))
+
+
+def hote_site(url):
+    """Hôte sans "www." (jobs.ch et www.jobs.ch sont le même site)"""
+    hote = (urlsplit(url).hostname or '').rstrip('.')
+    return hote[4:] if hote.startswith('www.') else hote
+
+
+def numero_offre(url):
+    """Numéro "<site>:<numéro>" si l'adresse est celle d'une offre d'un site connu, sinon None"""
+    morceaux = urlsplit(url)
+    site = hote_site(url)
+    motifs = MOTIFS_IDENTIFIANT.get(site, {})
+    if 'chemin' in motifs:
+        trouve = motifs['chemin'].search(morceaux.path.lower())
+        if trouve:
+            return f"{site}:{trouve.group(1)}"
+    if 'parametres' in motifs:
+        parametres = dict(parse_qsl(morceaux.query))
+        for nom in motifs['parametres']:
+            if parametres.get(nom):
+                return f"{site}:{parametres[nom]}"
+    return None
+
+
+def identifiant_offre(url):
+    """
+    Identifiant stable d'une offre : "<site>:<numéro>" si le site est connu,
+    sinon l'adresse canonique sans schéma ni "www."
+    """
+    canonique = canoniser(url)
+    numero = numero_offre(canonique)
+    if numero:
+        return numero
+    morceaux = urlsplit(canonique)
+    chemin = morceaux.path.rstrip('/') or '/'
+    return f"{hote_site(canonique)}{chemin}" + (f"?{morceaux.query}" if morceaux.query else '')
+
+
+def empreinte(identifiant):
+    """Empreinte 64 bits d'un identifiant (8 octets par offre dans l'index)"""
+    return int.from_bytes(hashlib.blake2b(identifiant.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class IndexIdentifiants:
+    """Ensemble persistant des offres déjà vues (empreintes de leur identifiant)"""
+
+    def __init__(self, chemin=FICHIER_INDEX):
+        self.chemin = chemin
+        self.empreintes = set()
+        try:
+            with open(chemin, 'rb') as f:
+                valeurs = array('Q')
+                valeurs.frombytes(f.read())
+            self.empreintes.update(valeurs)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return len(self.empreintes)
+
+    def __contains__(self, url):
+        return empreinte(identifiant_offre(url)) in self.empreintes
+
+    def ajouter(self, url):
+        self.empreintes.add(empreinte(identifiant_offre(url)))
+
+    def ajouter_stages(self, stages):
+        """Ajoute le lien de chaque offre (celles sans lien propre sont ignorées)"""
+        for stage in stages:
+            if stage.get('link', '').startswith(('http://', 'https://')):
+                self.ajouter(stage['link'])
+
+    def sauvegarder(self):
+        """Écrit l'index (fichier trié, remplacé d'un coup)"""
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'wb') as f:
+            array('Q', sorted(self.empreintes)).tofile(f)
+        os.replace(temporaire, self.chemin)